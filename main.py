@@ -4,11 +4,6 @@
 """
 
 import sys
-import os
-from pathlib import Path
-
-# 添加 src 到 Python 路徑
-sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from src.core.config import config_manager
 from src.utils.logger import LoggerManager, get_logger
@@ -0,0 +1,38 @@
+"""
+分析模組
+
+提供技術面、基本面和情緒分析器，子模組在首次訪問對應屬性時才載入
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .fundamental import FundamentalAnalyzer
+    from .sentiment import SentimentAnalyzer
+    from .technical import PriceArrays, TechnicalAnalyzer
+
+# 屬性名稱 -> 定義所在的子模組
+_LAZY_ATTRS = {
+    'FundamentalAnalyzer': '.fundamental',
+    'SentimentAnalyzer': '.sentiment',
+    'TechnicalAnalyzer': '.technical',
+    'PriceArrays': '.technical',
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name: str) -> Any:
+    """PEP 562：首次訪問時導入子模組並緩存到模組命名空間"""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,514 @@
+"""
+分析模組的數值計算內核
+
+純數值的逐行計算集中於此。安裝 numba 時以 @njit 編譯為機器碼；
+未安裝時 njit 退化為原樣返回函數，調用方應改走 NumPy 向量化路徑。
+"""
+
+import math
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - 取決於運行環境
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """numba 不可用時的佔位裝飾器，原樣返回被裝飾函數"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# 基本面指標矩陣中營收增長與利潤增長所在列（利潤增長以營收增長為基準評分）
+_REVENUE_GROWTH_COLUMN = 9
+_PROFIT_GROWTH_COLUMN = 10
+_GROWTH_DIMENSION = 3
+_VALUATION_DIMENSION = 4
+
+
+@njit(cache=True)
+def fundamental_dimension_scores(matrix, has_valuation, column_dims, column_tables,
+                                 thresholds, counts, right, deltas):
+    """
+    逐行計算基本面各維度得分
+
+    閾值表由調用方打包傳入，與單筆分析共用同一份定義。
+
+    Args:
+        matrix: (N, K) 指標矩陣
+        has_valuation: (N,) 是否提供估值數據
+        column_dims: (K,) 每列所屬維度下標
+        column_tables: (K,) 每列對應的閾值表下標，-1 表示不查表
+        thresholds: (T, M) 升序閾值，不足 M 個以 inf 填充
+        counts: (T,) 每張表的有效閾值個數
+        right: (T,) True 時區間下標為小於等於數值的閾值個數，否則為小於數值的閾值個數
+        deltas: (T, M + 1) 各區間加分
+
+    Returns:
+        (N, 5) 維度得分矩陣，結果截斷至 0-100；NaN 指標按 bisect 的比較結果歸入區間
+    """
+    n_rows, n_columns = matrix.shape
+    scores = np.empty((n_rows, 5))
+
+    for r in range(n_rows):
+        for d in range(5):
+            scores[r, d] = 50.0
+
+        for c in range(n_columns):
+            value = matrix[r, c]
+            d = column_dims[c]
+            t = column_tables[c]
+            if t < 0:
+                continue
+            k = 0
+            if np.isnan(value):
+                # 與 bisect 一致：NaN 與閾值比較均為假，right 側落在末個區間，left 側落在首個區間
+                if right[t]:
+                    k = counts[t]
+            elif right[t]:
+                while k < counts[t] and thresholds[t, k] <= value:
+                    k += 1
+            else:
+                while k < counts[t] and thresholds[t, k] < value:
+                    k += 1
+            scores[r, d] += deltas[t, k]
+
+        revenue_growth = matrix[r, _REVENUE_GROWTH_COLUMN]
+        profit_growth = matrix[r, _PROFIT_GROWTH_COLUMN]
+        if profit_growth > revenue_growth + 10:
+            scores[r, _GROWTH_DIMENSION] += 15
+        elif profit_growth > revenue_growth:
+            scores[r, _GROWTH_DIMENSION] += 10
+        elif profit_growth > 0:
+            scores[r, _GROWTH_DIMENSION] += 5
+        else:
+            scores[r, _GROWTH_DIMENSION] -= 5
+
+        if not has_valuation[r]:
+            scores[r, _VALUATION_DIMENSION] = 50.0
+
+        for d in range(5):
+            if scores[r, d] < 0.0:
+                scores[r, d] = 0.0
+            elif scores[r, d] > 100.0:
+                scores[r, d] = 100.0
+
+    return scores
+
+
+# 情緒分佈的正面/負面閾值
+_POSITIVE_THRESHOLD = 0.3
+_NEGATIVE_THRESHOLD = -0.3
+
+
+@njit(cache=True)
+def sentiment_aggregate(scores, type_ids, n_types):
+    """
+    單次遍歷匯總新聞情緒得分
+
+    Args:
+        scores: (N,) 各條新聞的情緒得分
+        type_ids: (N,) 各條新聞的類型下標
+        n_types: 類型數量
+
+    Returns:
+        (正面條數, 負面條數, (T,) 各類型得分合計, (T,) 各類型條數, 得分離差平方和)
+    """
+    type_sums = np.zeros(n_types)
+    type_counts = np.zeros(n_types, dtype=np.int64)
+    positive = 0
+    negative = 0
+    mean = 0.0
+    m2 = 0.0
+
+    for i in range(scores.shape[0]):
+        score = scores[i]
+        t = type_ids[i]
+        type_sums[t] += score
+        type_counts[t] += 1
+
+        if score > _POSITIVE_THRESHOLD:
+            positive += 1
+        elif score < _NEGATIVE_THRESHOLD:
+            negative += 1
+
+        # Welford 在線更新
+        delta = score - mean
+        mean += delta / (i + 1)
+        m2 += delta * (score - mean)
+
+    return positive, negative, type_sums, type_counts, m2
+
+
+
+# 技術指標的窗口長度與平滑係數（ewm 的 span/com 換算為 alpha）
+_MA_WINDOWS = (5, 10, 20, 60)
+_RSI_WINDOW = 14
+_BOLLINGER_WINDOW = 20
+_VOLUME_WINDOW = 20
+_KDJ_WINDOW = 9
+_VOLATILITY_WINDOW = 20
+_MACD_FAST_ALPHA = 2.0 / (1 + 12)
+_MACD_SLOW_ALPHA = 2.0 / (1 + 26)
+_MACD_SIGNAL_ALPHA = 2.0 / (1 + 9)
+_KDJ_ALPHA = 1.0 / (1 + 2)
+
+# 滑動均值狀態：[合計, 加入補償, 移除補償, 個數, 負數個數, 連續相同個數, 前值]
+# 滑動方差狀態：[均值, 離差平方和, 加入補償, 移除補償, 個數, 連續相同個數, 前值]
+_STATE_SIZE = 7
+
+
+@njit(cache=True)
+def _new_state(first):
+    """創建滑動窗口狀態，前值取序列首個數據"""
+    state = np.zeros(_STATE_SIZE)
+    state[6] = first
+    return state
+
+
+@njit(cache=True)
+def _rolling_mean_step(state, added, removed):
+    """
+    滑動均值前進一步：先移除離開窗口的數據（NaN 表示無），再加入新數據
+
+    Kahan 補償求和、連續相同值與正負號修正均與 pandas rolling().mean() 一致，
+    結果逐位相同。
+    """
+    if removed == removed:
+        state[3] -= 1
+        y = -removed - state[2]
+        t = state[0] + y
+        state[2] = t - state[0] - y
+        state[0] = t
+        if math.copysign(1.0, removed) < 0:
+            state[4] -= 1
+
+    if added == added:
+        state[3] += 1
+        y = added - state[1]
+        t = state[0] + y
+        state[1] = t - state[0] - y
+        state[0] = t
+        if math.copysign(1.0, added) < 0:
+            state[4] += 1
+        if added == state[6]:
+            state[5] += 1
+        else:
+            state[5] = 1
+        state[6] = added
+
+    nobs = state[3]
+    if nobs <= 0:
+        return np.nan
+    if state[5] >= nobs:
+        return state[6]
+    result = state[0] / nobs
+    if state[4] == 0 and result < 0:
+        return 0.0
+    if state[4] == nobs and result > 0:
+        return 0.0
+    return result
+
+
+@njit(cache=True)
+def _rolling_var_step(state, added, removed):
+    """
+    滑動樣本方差前進一步（Welford 增刪窗口，Kahan 補償均值）
+
+    與 pandas rolling().var() 逐位相同；不足兩個數據時為 NaN。
+    """
+    if removed == removed:
+        state[4] -= 1
+        if state[4] > 0:
+            prev_mean = state[0] - state[3]
+            y = removed - state[3]
+            t = y - state[0]
+            state[3] = t + state[0] - y
+            state[0] = state[0] - t / state[4]
+            state[1] = state[1] - (removed - prev_mean) * (removed - state[0])
+        else:
+            state[0] = 0.0
+            state[1] = 0.0
+
+    if added == added:
+        state[4] += 1
+        if added == state[6]:
+            state[5] += 1
+        else:
+            state[5] = 1
+        state[6] = added
+        prev_mean = state[0] - state[2]
+        y = added - state[2]
+        t = y - state[0]
+        state[2] = t + state[0] - y
+        state[0] = state[0] + t / state[4]
+        state[1] = state[1] + (added - prev_mean) * (added - state[0])
+
+    nobs = state[4]
+    if nobs < 2:
+        return np.nan
+    if state[5] >= nobs:
+        return 0.0
+    return state[1] / (nobs - 1)
+
+
+@njit(cache=True)
+def _std(variance):
+    """方差開方，負的舍入誤差記為 0"""
+    if variance < 0:
+        return 0.0
+    return np.sqrt(variance)
+
+
+@njit(cache=True)
+def _ewm_update(weighted, value, alpha):
+    """adjust=False 的指數加權遞推，運算次序與 pandas ewm().mean() 一致"""
+    if weighted != value:
+        old_weight = 1.0 - alpha
+        weighted = (old_weight * weighted + alpha * value) / (old_weight + alpha)
+    return weighted
+
+
+@njit(cache=True)
+def ema(x, alpha):
+    """
+    整列遞推 adjust=False 的指數移動平均
+
+    與 pandas ewm(alpha=alpha, adjust=False).mean() 逐位相同（輸入不含 NaN）。
+    """
+    result = np.empty(x.shape[0])
+    if x.shape[0] == 0:
+        return result
+    weighted = x[0]
+    result[0] = weighted
+    for i in range(1, x.shape[0]):
+        weighted = _ewm_update(weighted, x[i], alpha)
+        result[i] = weighted
+    return result
+
+
+@njit(cache=True)
+def rolling_min_max(low, high, window):
+    """
+    滑動窗口內 low 的最小值與 high 的最大值，單調隊列單次遍歷（每個下標至多入隊、出隊一次）
+
+    與 pandas rolling(window, min_periods=1).min() / .max() 逐位相同：跳過缺失值，
+    窗口內全為缺失值時為 NaN。
+    """
+    n = low.shape[0]
+    mins = np.empty(n)
+    maxs = np.empty(n)
+    # 環形緩衝區保存窗口內候選值的下標，隊首為當前極值，隊內數值單調
+    min_queue = np.empty(window, np.int64)
+    max_queue = np.empty(window, np.int64)
+    min_head = 0
+    min_size = 0
+    max_head = 0
+    max_size = 0
+    for i in range(n):
+        # 移出滑出窗口的隊首（下標遞增，每步至多一個）
+        if min_size > 0 and min_queue[min_head] <= i - window:
+            min_head = (min_head + 1) % window
+            min_size -= 1
+        if max_size > 0 and max_queue[max_head] <= i - window:
+            max_head = (max_head + 1) % window
+            max_size -= 1
+
+        # 新值入隊前，從隊尾彈出不會再成為極值的候選
+        value = low[i]
+        if value == value:
+            while min_size > 0 and low[min_queue[(min_head + min_size - 1) % window]] >= value:
+                min_size -= 1
+            min_queue[(min_head + min_size) % window] = i
+            min_size += 1
+        value = high[i]
+        if value == value:
+            while max_size > 0 and high[max_queue[(max_head + max_size - 1) % window]] <= value:
+                max_size -= 1
+            max_queue[(max_head + max_size) % window] = i
+            max_size += 1
+
+        mins[i] = low[min_queue[min_head]] if min_size > 0 else np.nan
+        maxs[i] = high[max_queue[max_head]] if max_size > 0 else np.nan
+    return mins, maxs
+
+
+@njit(cache=True)
+def _price_gain_loss(close, i):
+    """第 i 根 K 線的上漲與下跌幅度，首根 K 線記為 0（與 diff().where(..., 0) 一致）"""
+    delta = close[i] - close[i - 1] if i > 0 else np.nan
+    gain = delta if delta > 0 else 0.0
+    loss = -(delta if delta < 0 else 0.0)
+    return gain, loss
+
+
+@njit(cache=True, error_model='numpy')
+def technical_indicators(close, high, low, volume):
+    """
+    單次遍歷計算技術面各指標的最新數值
+
+    均線、RSI、布林帶與均量以滑動合計遞推，EMA/KDJ 以指數加權遞推，
+    波動率為收益率的滑動標準差，全部在同一循環內完成；
+    僅 KDJ 的滑動極值由單調隊列預先求出。
+
+    Args:
+        close, high, low, volume: (N,) 價格與成交量序列，N >= 1
+
+    Returns:
+        (ma5, ma10, ma20, ma60, rsi, 前一日 rsi, macd, signal, histogram, 前一日 histogram,
+         布林中軌, 布林標準差, 均量, k, d, 前一日 k, 前一日 d,
+         當前波動率, 平均波動率, 近 5 日平均波動率, 此前 5 日平均波動率)，
+        數據不足的項為 NaN
+    """
+    n = close.shape[0]
+
+    ma_states = np.zeros((len(_MA_WINDOWS), _STATE_SIZE))
+    ma_values = np.empty(len(_MA_WINDOWS))
+    for w in range(len(_MA_WINDOWS)):
+        ma_states[w, 6] = close[0]
+    bollinger_state = _new_state(close[0])
+    volume_state = _new_state(volume[0])
+    gain_state = _new_state(0.0)
+    loss_state = _new_state(-0.0)
+
+    bb_std = np.nan
+    avg_volume = np.nan
+    rsi = np.nan
+    prev_rsi = np.nan
+
+    ema_fast = close[0]
+    ema_slow = close[0]
+    macd = ema_fast - ema_slow
+    signal = macd
+    hist = macd - signal
+    prev_hist = np.nan
+    k = 0.0
+    d = 0.0
+    lowest_low, highest_high = rolling_min_max(low, high, _KDJ_WINDOW)
+    prev_k = np.nan
+    prev_d = np.nan
+
+    # 收益率序列長度與滑動窗口
+    n_returns = n - 1
+    vol_window = min(_VOLATILITY_WINDOW, n_returns)
+    vol_state = _new_state(close[1] / close[0] - 1 if n > 1 else 0.0)
+    vol_current = np.nan
+    vol_total = 0.0
+    vol_valid = 0
+    recent_total = 0.0
+    recent_valid = 0
+    earlier_total = 0.0
+    earlier_valid = 0
+
+    for i in range(n):
+        price = close[i]
+
+        # 均線與布林帶
+        for w in range(len(_MA_WINDOWS)):
+            window = _MA_WINDOWS[w]
+            removed = close[i - window] if i >= window else np.nan
+            ma_values[w] = _rolling_mean_step(ma_states[w], price, removed)
+        removed = close[i - _BOLLINGER_WINDOW] if i >= _BOLLINGER_WINDOW else np.nan
+        bb_std = _std(_rolling_var_step(bollinger_state, price, removed))
+
+        # 均量
+        removed = volume[i - _VOLUME_WINDOW] if i >= _VOLUME_WINDOW else np.nan
+        avg_volume = _rolling_mean_step(volume_state, volume[i], removed)
+
+        # RSI
+        gain, loss = _price_gain_loss(close, i)
+        if i >= _RSI_WINDOW:
+            removed_gain, removed_loss = _price_gain_loss(close, i - _RSI_WINDOW)
+        else:
+            removed_gain, removed_loss = np.nan, np.nan
+        avg_gain = _rolling_mean_step(gain_state, gain, removed_gain)
+        avg_loss = _rolling_mean_step(loss_state, loss, removed_loss)
+        if avg_loss == 0:
+            avg_loss = 1e-10  # 避免除零
+        prev_rsi = rsi
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+
+        # MACD
+        if i > 0:
+            prev_hist = hist
+            ema_fast = _ewm_update(ema_fast, price, _MACD_FAST_ALPHA)
+            ema_slow = _ewm_update(ema_slow, price, _MACD_SLOW_ALPHA)
+            macd = ema_fast - ema_slow
+            signal = _ewm_update(signal, macd, _MACD_SIGNAL_ALPHA)
+            hist = macd - signal
+
+        # KDJ
+        lowest = lowest_low[i]
+        rsv = 100 * (price - lowest) / (highest_high[i] - lowest)
+        if rsv != rsv:
+            rsv = 50.0
+        if i == 0:
+            k = rsv
+            d = k
+        else:
+            prev_k = k
+            prev_d = d
+            k = _ewm_update(k, rsv, _KDJ_ALPHA)
+            d = _ewm_update(d, k, _KDJ_ALPHA)
+
+        # 收益率的滑動標準差
+        if i == 0 or n_returns < 2:
+            continue
+        t = i - 1
+        value = price / close[i - 1] - 1
+        if t >= vol_window:
+            removed = close[i - vol_window] / close[i - vol_window - 1] - 1
+        else:
+            removed = np.nan
+        std = _std(_rolling_var_step(vol_state, value, removed))
+
+        vol_current = std
+        if std == std:
+            vol_total += std
+            vol_valid += 1
+            if t >= n_returns - 5:
+                recent_total += std
+                recent_valid += 1
+            elif t >= n_returns - 10:
+                earlier_total += std
+                earlier_valid += 1
+
+    vol_average = vol_total / vol_valid if vol_valid > 0 else np.nan
+    vol_recent = recent_total / recent_valid if recent_valid > 0 else np.nan
+    vol_earlier = earlier_total / earlier_valid if earlier_valid > 0 else np.nan
+
+    return (
+        ma_values[0], ma_values[1], ma_values[2], ma_values[3],
+        rsi, prev_rsi, macd, signal, hist, prev_hist,
+        ma_values[2], bb_std,  # 布林中軌即 20 日均線
+        avg_volume, k, d, prev_k, prev_d,
+        vol_current, vol_average, vol_recent, vol_earlier
+    )
+
+
+# technical_indicators 返回的數值個數
+TECHNICAL_INDICATOR_COUNT = 21
+
+
+@njit(cache=True, parallel=True, error_model='numpy')
+def technical_indicators_batch(closes, highs, lows, volumes):
+    """
+    多隻股票並行計算 technical_indicators
+
+    Args:
+        closes, highs, lows, volumes: (S, N) 價格與成交量矩陣，每行一隻股票，N >= 1
+
+    Returns:
+        (S, TECHNICAL_INDICATOR_COUNT) 矩陣，每行為對應股票的 technical_indicators 結果
+    """
+    n_symbols = closes.shape[0]
+    out = np.empty((n_symbols, TECHNICAL_INDICATOR_COUNT))
+    for s in prange(n_symbols):
+        values = technical_indicators(closes[s], highs[s], lows[s], volumes[s])
+        for j in range(TECHNICAL_INDICATOR_COUNT):
+            out[s, j] = values[j]
+    return out
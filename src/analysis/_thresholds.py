@@ -0,0 +1,130 @@
+"""
+基本面評分閾值表
+
+默認閾值與加分為人工設定。可用離線擬合（如按指標對實際收益做保序回歸）
+得到的分段常數結果覆蓋，以 save_tables 保存為 .npz 文件，運行時由 load_tables 載入。
+擬合結果必須保持各表的區間數量不變，評價文案與區間一一對應。
+"""
+
+import math
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, fields, replace
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class ScoreTable:
+    """評分閾值表：升序閾值把數軸切成 len(thresholds)+1 個區間，每個區間對應加分與評價"""
+    thresholds: Tuple[float, ...]
+    deltas: Tuple[float, ...]
+    labels: Optional[Tuple[str, ...]] = None
+    # 'left': 區間下標 = 小於數值的閾值個數（對應 x > t 的規則）
+    # 'right': 區間下標 = 小於等於數值的閾值個數（對應 x < t / x >= t 的規則）
+    side: str = 'left'
+
+    def bucket(self, value: float) -> int:
+        """返回數值所在區間的下標"""
+        if self.side == 'left':
+            return bisect_left(self.thresholds, value)
+        return bisect_right(self.thresholds, value)
+
+    def lookup(self, values: np.ndarray) -> np.ndarray:
+        """向量化查詢加分，與 bucket 的區間劃分一致（含 NaN）"""
+        index = np.searchsorted(self.thresholds, values, side=self.side)
+        if self.side == 'left':
+            # NaN 與任何閾值比較均為假：bisect_left 落在首個區間，searchsorted 則把 NaN 排在最後
+            index = np.where(np.isnan(values), 0, index)
+        return np.asarray(self.deltas, dtype=np.float64)[index]
+
+
+@dataclass(frozen=True)
+class ScoreTables:
+    """基本面各指標的評分閾值表"""
+    # 盈利能力
+    roe: ScoreTable
+    gross_margin: ScoreTable
+    net_margin: ScoreTable
+    # 償債能力
+    debt_ratio: ScoreTable
+    current_ratio: ScoreTable
+    quick_ratio: ScoreTable
+    # 營運能力
+    inventory_turnover: ScoreTable
+    receivable_turnover: ScoreTable
+    asset_turnover: ScoreTable
+    # 成長能力（利潤增長以營收增長為基準，閾值隨數據變化，不適用固定表）
+    revenue_growth: ScoreTable
+    # 估值水平（非正數視為無效估值）
+    pe_ratio: ScoreTable
+    pb_ratio: ScoreTable
+    peg_ratio: ScoreTable
+
+
+# 大於 0 的最小浮點數，用於表達 0 < x 的開區間邊界
+_POSITIVE = math.ulp(0.0)
+
+DEFAULT_TABLES = ScoreTables(
+    roe=ScoreTable((5, 10, 15, 20), (-10, 5, 10, 15, 20), ('較差', '偏低', '正常', '良好', '優秀')),
+    gross_margin=ScoreTable((25, 40), (0, 5, 10), ('低毛利', '中等毛利', '高毛利')),
+    net_margin=ScoreTable((math.nextafter(5, -math.inf), 10, 15), (-5, 0, 5, 10)),
+    debt_ratio=ScoreTable((30, 50, 70), (15, 10, 5, -10), ('低負債', '適中負債', '較高負債', '高負債'), 'right'),
+    current_ratio=ScoreTable(
+        (1, 1.5, 2), (-10, 0, 5, 10), ('流動性不足', '流動性一般', '流動性良好', '流動性充足')
+    ),
+    quick_ratio=ScoreTable((0.7, 1), (-5, 5, 10)),
+    inventory_turnover=ScoreTable((2, 4, 6), (-5, 0, 5, 10), ('緩慢', '偏慢', '正常', '快速')),
+    receivable_turnover=ScoreTable((6, 12), (0, 5, 10), ('回款慢', '回款正常', '回款快')),
+    asset_turnover=ScoreTable((0.5, 1), (-5, 5, 10)),
+    revenue_growth=ScoreTable(
+        (0, 10, 20, 30), (-10, 5, 10, 15, 20), ('負增長', '緩慢增長', '穩定增長', '快速增長', '高速增長')
+    ),
+    pe_ratio=ScoreTable((_POSITIVE, 15, 25, 40), (-5, 15, 10, 5, -5), ('高估', '低估', '合理', '偏高', '高估'), 'right'),
+    pb_ratio=ScoreTable((_POSITIVE, 1, 3), (0, 10, 5, 0), ('偏高', '破淨', '正常', '偏高'), 'right'),
+    peg_ratio=ScoreTable((_POSITIVE, 1, 2), (0, 10, 5, 0), side='right'),
+)
+
+
+def save_tables(tables: ScoreTables, path: str) -> None:
+    """
+    保存閾值表為 .npz 文件
+
+    每張表保存為 <名稱>_thresholds 與 <名稱>_deltas 兩個數組。
+    """
+    arrays = {}
+    for field in fields(ScoreTables):
+        table = getattr(tables, field.name)
+        arrays[f'{field.name}_thresholds'] = np.asarray(table.thresholds, dtype=np.float64)
+        arrays[f'{field.name}_deltas'] = np.asarray(table.deltas, dtype=np.float64)
+    np.savez(path, **arrays)
+
+
+def load_tables(path: str) -> ScoreTables:
+    """
+    從 .npz 文件載入閾值表
+
+    文件中缺少的表沿用默認值；評價文案與區間方向沿用默認表。
+
+    Raises:
+        ValueError: 閾值未升序排列，或區間數量與默認表不一致
+    """
+    overrides = {}
+    with np.load(path) as data:
+        for field in fields(ScoreTables):
+            key = f'{field.name}_thresholds'
+            if key not in data:
+                continue
+
+            default = getattr(DEFAULT_TABLES, field.name)
+            thresholds = tuple(float(value) for value in data[key])
+            deltas = tuple(float(value) for value in data[f'{field.name}_deltas'])
+
+            if len(thresholds) != len(default.thresholds) or len(deltas) != len(thresholds) + 1:
+                raise ValueError(f"閾值表 {field.name} 的區間數量與默認表不一致")
+            if any(low > high for low, high in zip(thresholds, thresholds[1:])):
+                raise ValueError(f"閾值表 {field.name} 的閾值未升序排列")
+
+            overrides[field.name] = replace(default, thresholds=thresholds, deltas=deltas)
+
+    return replace(DEFAULT_TABLES, **overrides)
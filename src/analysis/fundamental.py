@@ -4,24 +4,262 @@
 提供財務指標分析和基本面評分功能
 """
 
-from typing import Dict, Any, Optional, List
+import sys
+from collections import ChainMap
+from functools import lru_cache
+from numbers import Real
+from operator import itemgetter
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Tuple
+import numpy as np
 from ..utils.logger import get_logger
-from ..core.config import Config
+from ._kernels import NUMBA_AVAILABLE, fundamental_dimension_scores
+from ._thresholds import DEFAULT_TABLES, ScoreTables, load_tables
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from ..core.config import ConfigManager as Config
 
 logger = get_logger(__name__)
 
 
+def _intern_keys(mapping: Dict[Any, Any]) -> Dict[Any, Any]:
+    """返回字符串鍵經 sys.intern 駐留後的新字典"""
+    return {
+        sys.intern(key) if type(key) is str else key: value
+        for key, value in mapping.items()
+    }
+
+
+# 分析維度（固定順序）及中文名稱
+_DIMENSIONS = ('profitability', 'solvency', 'operation', 'growth', 'valuation')
+_DIM_NAMES = MappingProxyType({
+    'profitability': '盈利能力',
+    'solvency': '償債能力',
+    'operation': '營運能力',
+    'growth': '成長能力',
+    'valuation': '估值水平'
+})
+
+# 各維度評價文案模板（預先綁定 str.format）
+_PROFIT_FMT = "ROE {0}（{1:.1f}%），{2}（{3:.1f}%）".format
+_SOLVENCY_FMT = "{0}（{1:.1f}%），{2}（{3:.2f}）".format
+_OPERATION_FMT = "存貨週轉{0}（{1:.1f}次/年），{2}（{3:.1f}次/年）".format
+_GROWTH_FMT = "營收{0}（{1:.1f}%），{2}（{3:.1f}%）".format
+_VALUATION_FMT = "PE{0}（{1:.1f}），PB{2}（{3:.2f}）".format
+
+# 各維度提取的指標及缺省值，以 itemgetter 一次取出（ChainMap 回退缺省值）
+# 指標名稱經 sys.intern 駐留，與入口處駐留後的數據鍵比較時可走指針相等的快速路徑
+_PROFIT_DEFAULTS = MappingProxyType(_intern_keys({
+    '淨資產收益率': 0, '總資產收益率': 0, '毛利率': 0, '淨利率': 0, '營業利潤率': 0
+}))
+_SOLVENCY_DEFAULTS = MappingProxyType(_intern_keys({
+    '資產負債率': 50, '流動比率': 1, '速動比率': 0.8, '利息保障倍數': 2, '現金比率': 0.2
+}))
+_OPERATION_DEFAULTS = MappingProxyType(_intern_keys({
+    '存貨週轉率': 0, '應收帳款週轉率': 0, '總資產週轉率': 0, '固定資產週轉率': 0, '營運資金週轉率': 0
+}))
+_GROWTH_DEFAULTS = MappingProxyType(_intern_keys({
+    '營收同比增長率': 0, '淨利潤同比增長率': 0, '總資產增長率': 0, '淨資產增長率': 0, '每股收益增長率': 0
+}))
+_VALUATION_DEFAULTS = MappingProxyType(_intern_keys({
+    '市盈率': 0, '市淨率': 0, '市銷率': 0, 'PEG': 0
+}))
+_PROFIT_GET = itemgetter(*_PROFIT_DEFAULTS)
+_SOLVENCY_GET = itemgetter(*_SOLVENCY_DEFAULTS)
+_OPERATION_GET = itemgetter(*_OPERATION_DEFAULTS)
+_GROWTH_GET = itemgetter(*_GROWTH_DEFAULTS)
+_VALUATION_GET = itemgetter(*_VALUATION_DEFAULTS)
+
+# 各維度輸出明細中的指標顯示名稱，與 _*_DEFAULTS 的順序一一對應
+_PROFIT_DISPLAY_KEYS = ('ROE', 'ROA', '毛利率', '淨利率', '營業利潤率')
+_SOLVENCY_DISPLAY_KEYS = ('資產負債率', '流動比率', '速動比率', '利息保障倍數', '現金比率')
+_OPERATION_DISPLAY_KEYS = ('存貨週轉率', '應收帳款週轉率', '總資產週轉率', '固定資產週轉率', '營運資金週轉率')
+_GROWTH_DISPLAY_KEYS = ('營收增長率', '淨利潤增長率', '總資產增長率', '淨資產增長率', '每股收益增長率')
+_VALUATION_DISPLAY_KEYS = ('市盈率(PE)', '市淨率(PB)', '市銷率(PS)', 'PEG')
+
+
+# 分析過程中字典取值、類型轉換與數值比較可能拋出的異常
+_ANALYSIS_ERRORS = (KeyError, TypeError, ValueError, AttributeError)
+
+
+def _clip2(score: float, _min: float = 0.0, _max: float = 100.0) -> float:
+    """把分數截斷至 0-100 並保留兩位小數"""
+    return round(_max if score > _max else _min if score < _min else score, 2)
+
+
+# 批量評分的指標欄位：(數據分組, 指標名稱, 缺省值)，順序即矩陣列順序
+_BATCH_COLUMNS = tuple((group, sys.intern(key), default) for group, key, default in (
+    ('financial_indicators', '淨資產收益率', 0),
+    ('financial_indicators', '毛利率', 0),
+    ('financial_indicators', '淨利率', 0),
+    ('financial_indicators', '資產負債率', 50),
+    ('financial_indicators', '流動比率', 1),
+    ('financial_indicators', '速動比率', 0.8),
+    ('financial_indicators', '存貨週轉率', 0),
+    ('financial_indicators', '應收帳款週轉率', 0),
+    ('financial_indicators', '總資產週轉率', 0),
+    ('financial_indicators', '營收同比增長率', 0),
+    ('financial_indicators', '淨利潤同比增長率', 0),
+    ('valuation', '市盈率', 0),
+    ('valuation', '市淨率', 0),
+    ('valuation', 'PEG', 0),
+))
+
+# 各維度在矩陣中佔用的列區間
+_BATCH_DIMENSION_SLICES = (
+    ('profitability', slice(0, 3)),
+    ('solvency', slice(3, 6)),
+    ('operation', slice(6, 9)),
+    ('growth', slice(9, 11)),
+    ('valuation', slice(11, 14)),
+)
+
+# 各維度評分所需的指標欄位，單筆分析在入口處據此校驗數據類型
+_DIMENSION_INPUTS = MappingProxyType({
+    dim: _BATCH_COLUMNS[columns] for dim, columns in _BATCH_DIMENSION_SLICES
+})
+
+
+# 各列對應的閾值表名稱（利潤增長以營收增長為基準，不查表），與 _BATCH_COLUMNS 一一對應
+_COLUMN_TABLES = (
+    'roe', 'gross_margin', 'net_margin',
+    'debt_ratio', 'current_ratio', 'quick_ratio',
+    'inventory_turnover', 'receivable_turnover', 'asset_turnover',
+    'revenue_growth', None,
+    'pe_ratio', 'pb_ratio', 'peg_ratio',
+)
+
+
+@lru_cache(maxsize=8)
+def _pack_kernel_tables(score_tables: ScoreTables) -> Tuple[np.ndarray, ...]:
+    """把閾值表打包為編譯內核可用的定長數組"""
+    tables = [getattr(score_tables, name) for name in _COLUMN_TABLES if name is not None]
+    width = max(len(table.thresholds) for table in tables)
+
+    thresholds = np.full((len(tables), width), np.inf)
+    deltas = np.zeros((len(tables), width + 1))
+    for t, table in enumerate(tables):
+        thresholds[t, :len(table.thresholds)] = table.thresholds
+        deltas[t, :len(table.deltas)] = table.deltas
+
+    column_dims = np.empty(len(_BATCH_COLUMNS), dtype=np.int64)
+    for d, (_, columns) in enumerate(_BATCH_DIMENSION_SLICES):
+        column_dims[columns] = d
+
+    table_index = iter(range(len(tables)))
+    column_tables = np.array(
+        [-1 if name is None else next(table_index) for name in _COLUMN_TABLES], dtype=np.int64
+    )
+
+    return (
+        column_dims,
+        column_tables,
+        thresholds,
+        np.array([len(table.thresholds) for table in tables], dtype=np.int64),
+        np.array([table.side == 'right' for table in tables]),
+        deltas,
+    )
+
+
+def _is_valid_cell(value: Any) -> bool:
+    """單筆、批量與 DataFrame 評分共用的指標校驗：只接受數值類型（NaN 照常參與評分），數字字符串與 None 均無效"""
+    return isinstance(value, Real)
+
+
+def _batch_cell(group: Dict[str, Any], key: str, default: float) -> Optional[float]:
+    """提取批量矩陣的單個單元格，無效的值返回 None"""
+    value = group.get(key, default)
+    return float(value) if _is_valid_cell(value) else None
+
+
+def _score_dimensions(matrix: np.ndarray, has_valuation: np.ndarray,
+                      tables: ScoreTables = DEFAULT_TABLES,
+                      invalid: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    向量化計算各維度得分
+
+    與單筆分析共用同一組閾值表，以 np.searchsorted 對整列同時查詢區間。
+
+    Args:
+        matrix: (N, K) 指標矩陣，列順序見 _BATCH_COLUMNS
+        has_valuation: (N,) 布爾數組，標記是否提供估值數據
+        tables: 評分閾值表
+        invalid: (N, K) 布爾數組，標記無法轉換為數值的單元格，所在維度記 50 分
+
+    Returns:
+        (N, 5) 維度得分矩陣，列順序見 _BATCH_DIMENSION_SLICES
+    """
+    if NUMBA_AVAILABLE:
+        scores = fundamental_dimension_scores(matrix, has_valuation, *_pack_kernel_tables(tables))
+    else:
+        scores = _score_dimensions_vectorized(matrix, has_valuation, tables)
+
+    # 含無效指標的維度與單筆分析失敗時一致，記為 50 分
+    if invalid is not None:
+        for column, (_, columns) in enumerate(_BATCH_DIMENSION_SLICES):
+            scores[invalid[:, columns].any(axis=1), column] = 50.0
+
+    return scores
+
+
+def _score_dimensions_vectorized(matrix: np.ndarray, has_valuation: np.ndarray,
+                                 tables: ScoreTables) -> np.ndarray:
+    """_score_dimensions 的 NumPy 路徑（未安裝 numba 時使用）"""
+
+    (roe, gross_margin, net_margin, debt_ratio, current_ratio, quick_ratio,
+     inventory_turnover, receivable_turnover, asset_turnover,
+     revenue_growth, profit_growth, pe_ratio, pb_ratio, peg_ratio) = matrix.T
+
+    profitability = (
+        tables.roe.lookup(roe)
+        + tables.gross_margin.lookup(gross_margin)
+        + tables.net_margin.lookup(net_margin)
+    )
+    solvency = (
+        tables.debt_ratio.lookup(debt_ratio)
+        + tables.current_ratio.lookup(current_ratio)
+        + tables.quick_ratio.lookup(quick_ratio)
+    )
+    operation = (
+        tables.inventory_turnover.lookup(inventory_turnover)
+        + tables.receivable_turnover.lookup(receivable_turnover)
+        + tables.asset_turnover.lookup(asset_turnover)
+    )
+    growth = (
+        tables.revenue_growth.lookup(revenue_growth)
+        + np.select([profit_growth > revenue_growth + 10, profit_growth > revenue_growth, profit_growth > 0],
+                    [15, 10, 5], default=-5)
+    )
+    valuation = (
+        tables.pe_ratio.lookup(pe_ratio)
+        + tables.pb_ratio.lookup(pb_ratio)
+        + tables.peg_ratio.lookup(peg_ratio)
+    )
+    valuation = np.where(has_valuation, valuation, 0)
+
+    scores = 50.0 + np.column_stack([profitability, solvency, operation, growth, valuation])
+    np.minimum(np.maximum(scores, 0, out=scores), 100, out=scores)
+    return scores
+
+
 class FundamentalAnalyzer:
     """基本面分析器"""
     
-    def __init__(self, config: Optional[Config] = None):
+    __slots__ = ('config', 'logger', 'indicator_weights', '_dims', '_weights', '_default_scores', '_tables')
+    
+    def __init__(self, config: Optional['Config'] = None):
         """
         初始化基本面分析器
         
         Args:
             config: 配置管理器實例
         """
-        self.config = config or Config()
+        if config is None:
+            # 延遲導入：只有未傳入配置時才需要載入配置模組
+            from ..core.config import ConfigManager as Config
+            config = Config()
+        self.config = config
         self.logger = logger
         
         # 財務指標權重配置
@@ -33,6 +271,32 @@ class FundamentalAnalyzer:
             'valuation': 0.1         # 估值水平
         }
         
+        # 固定維度順序與權重向量，加權得分直接做點積
+        self._dims = tuple(self.indicator_weights)
+        self._weights = np.fromiter(self.indicator_weights.values(), dtype=np.float64, count=len(self._dims))
+        
+        # 無數據時的默認維度得分（只讀模板，返回前複製）
+        self._default_scores = MappingProxyType(dict.fromkeys(self._dims, 50.0))
+        
+        # 評分閾值表：配置了離線擬合結果時載入，否則使用默認表
+        self._tables = self._load_tables()
+        
+        # 預先調用一次編譯內核，避免首個批量請求承擔編譯開銷
+        if NUMBA_AVAILABLE:
+            _score_dimensions(np.zeros((1, len(_BATCH_COLUMNS))), np.zeros(1, dtype=bool), self._tables)
+        
+    def _load_tables(self) -> ScoreTables:
+        """載入評分閾值表，未配置或載入失敗時使用默認表"""
+        thresholds_file = self.config.get('analysis_params.fundamental_thresholds_file')
+        if not thresholds_file:
+            return DEFAULT_TABLES
+            
+        try:
+            return load_tables(thresholds_file)
+        except (OSError, KeyError, ValueError) as e:
+            self.logger.error(f"評分閾值表載入失敗，使用默認閾值: {str(e)}")
+            return DEFAULT_TABLES
+        
     def analyze(self, fundamental_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         執行完整的基本面分析
@@ -48,10 +312,12 @@ class FundamentalAnalyzer:
                 return self._get_default_result()
                 
             # 分析財務指標
-            analysis = self._analyze_financial_indicators(fundamental_data)
+            analysis, dimension_scores = self._analyze_financial_indicators(fundamental_data)
             
-            # 計算各維度得分
-            scores = self._calculate_dimension_scores(analysis)
+            # 單次遍歷計算各維度得分與綜合評價
+            scores, summary, _ = self._reduce(dimension_scores)
+            if analysis:
+                analysis['summary'] = summary
             
             # 計算綜合得分
             total_score = self.calculate_score(fundamental_data, scores)
@@ -63,10 +329,129 @@ class FundamentalAnalyzer:
                 'status': 'success'
             }
             
-        except Exception as e:
+        except _ANALYSIS_ERRORS as e:
             self.logger.error(f"基本面分析失敗: {str(e)}")
             return self._get_default_result()
     
+    def analyze_batch(self, fundamental_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量計算多隻股票的基本面得分
+        
+        將所有股票的指標收集為 (N, K) 矩陣後向量化評分，
+        適用於掃描大量股票時只需要得分的場景。
+        
+        Args:
+            fundamental_data_list: 財務數據字典列表
+            
+        Returns:
+            與輸入順序一致的結果列表，每項包含維度得分和綜合得分
+        """
+        try:
+            if not fundamental_data_list:
+                return []
+                
+            count = len(fundamental_data_list)
+            cells = [
+                _batch_cell((data or {}).get(group) or {}, key, default)
+                for data in fundamental_data_list
+                for group, key, default in _BATCH_COLUMNS
+            ]
+            shape = (count, len(_BATCH_COLUMNS))
+            invalid = np.fromiter((cell is None for cell in cells), dtype=bool, count=len(cells)).reshape(shape)
+            matrix = np.fromiter(
+                (0.0 if cell is None else cell for cell in cells), dtype=np.float64, count=len(cells)
+            ).reshape(shape)
+            has_valuation = np.fromiter(
+                (bool((data or {}).get('valuation')) for data in fundamental_data_list),
+                dtype=bool,
+                count=count
+            )
+            has_data = np.fromiter(
+                (bool(data) for data in fundamental_data_list),
+                dtype=bool,
+                count=count
+            )
+            
+            dimension_matrix = _score_dimensions(matrix, has_valuation, self._tables, invalid)
+            dimension_matrix[~has_data] = 50.0
+            total_scores = dimension_matrix @ self._weights
+            np.round(total_scores, 2, out=total_scores)
+            
+            return [
+                {
+                    'dimension_scores': {
+                        dim: float(score)
+                        for (dim, _), score in zip(_BATCH_DIMENSION_SLICES, row)
+                    },
+                    'score': float(total),
+                    'status': 'success' if data else 'no_data'
+                }
+                for data, row, total in zip(fundamental_data_list, dimension_matrix, total_scores)
+            ]
+            
+        except _ANALYSIS_ERRORS as e:
+            self.logger.error(f"批量基本面分析失敗: {str(e)}")
+            return [self._get_default_result() for _ in fundamental_data_list]
+    
+    def analyze_frame(self, frame: 'pd.DataFrame') -> 'pd.DataFrame':
+        """
+        以 DataFrame 批量計算基本面得分
+        
+        每行為一隻股票，列名為指標名稱（如 '淨資產收益率'、'市盈率'），
+        缺失的列或單元格按缺省值處理，非數值的單元格（含數字字符串）令所在維度記 50 分。
+        所有指標均缺失的行視為無數據，各維度記 50 分。
+        
+        Args:
+            frame: 指標數據表
+            
+        Returns:
+            與輸入同索引的 DataFrame，包含各維度得分與綜合得分 score
+        """
+        import pandas as pd
+        
+        count = len(frame)
+        matrix = np.empty((count, len(_BATCH_COLUMNS)))
+        invalid = np.zeros((count, len(_BATCH_COLUMNS)), dtype=bool)
+        has_valuation = np.zeros(count, dtype=bool)
+        has_data = np.zeros(count, dtype=bool)
+        
+        for column, (group, key, default) in enumerate(_BATCH_COLUMNS):
+            if key not in frame.columns:
+                matrix[:, column] = default
+                continue
+                
+            series = frame[key]
+            missing = series.isna().to_numpy()
+            if pd.api.types.is_numeric_dtype(series.dtype):
+                values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                # 與單筆分析同一校驗規則，數字字符串不做轉換，所在維度記 50 分
+                valid = np.fromiter(map(_is_valid_cell, series), dtype=bool, count=count)
+                values = np.fromiter(
+                    (float(value) if ok else np.nan for value, ok in zip(series, valid)),
+                    dtype=np.float64,
+                    count=count
+                )
+                invalid[:, column] = ~missing & ~valid
+            matrix[:, column] = np.where(missing, default, values)
+            
+            has_data |= ~missing
+            if group == 'valuation':
+                has_valuation |= ~missing
+                
+        dimension_matrix = _score_dimensions(matrix, has_valuation, self._tables, invalid)
+        dimension_matrix[~has_data] = 50.0
+        
+        result = pd.DataFrame(
+            dimension_matrix,
+            index=frame.index,
+            columns=[dim for dim, _ in _BATCH_DIMENSION_SLICES]
+        )
+        total_scores = dimension_matrix @ self._weights
+        result['score'] = np.round(total_scores, 2, out=total_scores)
+        
+        return result
+    
     def calculate_score(self, fundamental_data: Dict[str, Any], 
                        dimension_scores: Optional[Dict[str, float]] = None) -> float:
         """
@@ -84,11 +469,12 @@ class FundamentalAnalyzer:
             
             # 如果提供了維度得分，使用加權計算
             if dimension_scores:
-                weighted_score = sum(
-                    dimension_scores.get(dim, 50) * weight 
-                    for dim, weight in self.indicator_weights.items()
+                scores_vec = np.fromiter(
+                    (dimension_scores.get(dim, 50.0) for dim in self._dims),
+                    dtype=np.float64,
+                    count=len(self._dims)
                 )
-                return round(weighted_score, 2)
+                return round(float(self._weights @ scores_vec), 2)
             
             # 否則使用簡單評分邏輯
             financial_indicators = fundamental_data.get('financial_indicators', {})
@@ -133,454 +519,300 @@ class FundamentalAnalyzer:
                 base_score += 10
                 
             # 確保分數在0-100範圍內
-            return round(max(0, min(100, base_score)), 2)
+            return _clip2(base_score)
             
-        except Exception as e:
+        except _ANALYSIS_ERRORS as e:
             self.logger.error(f"基本面評分計算失敗: {str(e)}")
             return 50.0
     
-    def _analyze_financial_indicators(self, fundamental_data: Dict[str, Any]) -> Dict[str, Any]:
-        """分析財務指標"""
+    def _analyze_financial_indicators(self, fundamental_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[float]]:
+        """
+        分析財務指標
+        
+        統一在此處校驗輸入：評分指標含非數值的維度直接記為分析失敗，
+        各維度分析函數因此無需各自捕獲異常。
+        
+        Returns:
+            (各維度分析明細, 按 _DIMENSIONS 順序排列的維度得分列表)
+        """
         try:
-            financial_indicators = fundamental_data.get('financial_indicators', {})
-            
-            analysis = {
-                'profitability': self._analyze_profitability(financial_indicators),
-                'solvency': self._analyze_solvency(financial_indicators),
-                'operation': self._analyze_operation(financial_indicators),
-                'growth': self._analyze_growth(financial_indicators),
-                'valuation': self._analyze_valuation(fundamental_data.get('valuation', {})),
-                'summary': {}
+            groups = {
+                'financial_indicators': _intern_keys(fundamental_data.get('financial_indicators') or {}),
+                'valuation': _intern_keys(fundamental_data.get('valuation') or {})
+            }
+            analyzers = {
+                'profitability': self._analyze_profitability,
+                'solvency': self._analyze_solvency,
+                'operation': self._analyze_operation,
+                'growth': self._analyze_growth,
+                'valuation': self._analyze_valuation
             }
             
-            # 生成綜合評價
-            analysis['summary'] = self._generate_summary(analysis)
+            analysis = {}
+            scores = []
+            for dim in _DIMENSIONS:
+                inputs = _DIMENSION_INPUTS[dim]
+                group = groups[inputs[0][0]]
+                
+                if all(_is_valid_cell(group.get(key, default)) for _, key, default in inputs):
+                    score, detail = analyzers[dim](group)
+                else:
+                    self.logger.error(f"{self._get_dimension_name(dim)}分析失敗: 指標數據非數值")
+                    score, detail = 50.0, {'indicators': {}, 'evaluation': '分析失敗', 'score': 50.0}
+                    
+                scores.append(score)
+                analysis[dim] = detail
             
-            return analysis
+            return analysis, scores
             
-        except Exception as e:
+        except _ANALYSIS_ERRORS as e:
             self.logger.error(f"財務指標分析失敗: {str(e)}")
-            return {}
+            return {}, [50.0] * len(_DIMENSIONS)
     
-    def _analyze_profitability(self, indicators: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_profitability(self, indicators: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
         """分析盈利能力"""
-        try:
-            result = {
-                'indicators': {},
-                'evaluation': '',
-                'score': 50.0
-            }
-            
-            # 提取盈利指標
-            roe = indicators.get('淨資產收益率', 0)
-            roa = indicators.get('總資產收益率', 0)
-            gross_margin = indicators.get('毛利率', 0)
-            net_margin = indicators.get('淨利率', 0)
-            operating_margin = indicators.get('營業利潤率', 0)
-            
-            result['indicators'] = {
-                'ROE': roe,
-                'ROA': roa,
-                '毛利率': gross_margin,
-                '淨利率': net_margin,
-                '營業利潤率': operating_margin
-            }
-            
-            # 評分邏輯
-            score = 50.0
-            
-            # ROE評分（權重最高）
-            if roe > 20:
-                score += 20
-                roe_eval = '優秀'
-            elif roe > 15:
-                score += 15
-                roe_eval = '良好'
-            elif roe > 10:
-                score += 10
-                roe_eval = '正常'
-            elif roe > 5:
-                score += 5
-                roe_eval = '偏低'
-            else:
-                score -= 10
-                roe_eval = '較差'
-                
-            # 毛利率評分
-            if gross_margin > 40:
-                score += 10
-                margin_eval = '高毛利'
-            elif gross_margin > 25:
-                score += 5
-                margin_eval = '中等毛利'
-            else:
-                margin_eval = '低毛利'
-                
-            # 淨利率評分
-            if net_margin > 15:
-                score += 10
-            elif net_margin > 10:
-                score += 5
-            elif net_margin < 5:
-                score -= 5
-                
-            # 生成評價
-            result['evaluation'] = f"ROE {roe_eval}（{roe:.1f}%），{margin_eval}（{gross_margin:.1f}%）"
-            result['score'] = max(0, min(100, score))
-            
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"盈利能力分析失敗: {str(e)}")
-            return {'indicators': {}, 'evaluation': '分析失敗', 'score': 50.0}
+        tables = self._tables
+        result = {
+            'indicators': {},
+            'evaluation': '',
+            'score': 50.0
+        }
+        
+        # 提取盈利指標
+        values = _PROFIT_GET(ChainMap(indicators, _PROFIT_DEFAULTS))
+        roe, roa, gross_margin, net_margin, operating_margin = values
+        
+        result['indicators'] = dict(zip(_PROFIT_DISPLAY_KEYS, values))
+        
+        # 評分邏輯
+        score = 50.0
+        
+        # ROE評分（權重最高）
+        i = tables.roe.bucket(roe)
+        score += tables.roe.deltas[i]
+        roe_eval = tables.roe.labels[i]
+            
+        # 毛利率評分
+        i = tables.gross_margin.bucket(gross_margin)
+        score += tables.gross_margin.deltas[i]
+        margin_eval = tables.gross_margin.labels[i]
+            
+        # 淨利率評分
+        score += tables.net_margin.deltas[tables.net_margin.bucket(net_margin)]
+            
+        # 生成評價
+        result['evaluation'] = _PROFIT_FMT(roe_eval, roe, margin_eval, gross_margin)
+        result['score'] = score = _clip2(score)
+        
+        return score, result
     
-    def _analyze_solvency(self, indicators: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_solvency(self, indicators: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
         """分析償債能力"""
-        try:
-            result = {
-                'indicators': {},
-                'evaluation': '',
-                'score': 50.0
-            }
-            
-            # 提取償債指標
-            debt_ratio = indicators.get('資產負債率', 50)
-            current_ratio = indicators.get('流動比率', 1)
-            quick_ratio = indicators.get('速動比率', 0.8)
-            interest_coverage = indicators.get('利息保障倍數', 2)
-            cash_ratio = indicators.get('現金比率', 0.2)
-            
-            result['indicators'] = {
-                '資產負債率': debt_ratio,
-                '流動比率': current_ratio,
-                '速動比率': quick_ratio,
-                '利息保障倍數': interest_coverage,
-                '現金比率': cash_ratio
-            }
-            
-            # 評分邏輯
-            score = 50.0
-            
-            # 資產負債率評分
-            if debt_ratio < 30:
-                score += 15
-                debt_eval = '低負債'
-            elif debt_ratio < 50:
-                score += 10
-                debt_eval = '適中負債'
-            elif debt_ratio < 70:
-                score += 5
-                debt_eval = '較高負債'
-            else:
-                score -= 10
-                debt_eval = '高負債'
-                
-            # 流動比率評分
-            if current_ratio > 2:
-                score += 10
-                liquidity_eval = '流動性充足'
-            elif current_ratio > 1.5:
-                score += 5
-                liquidity_eval = '流動性良好'
-            elif current_ratio > 1:
-                liquidity_eval = '流動性一般'
-            else:
-                score -= 10
-                liquidity_eval = '流動性不足'
-                
-            # 速動比率評分
-            if quick_ratio > 1:
-                score += 10
-            elif quick_ratio > 0.7:
-                score += 5
-            else:
-                score -= 5
-                
-            # 生成評價
-            result['evaluation'] = f"{debt_eval}（{debt_ratio:.1f}%），{liquidity_eval}（{current_ratio:.2f}）"
-            result['score'] = max(0, min(100, score))
-            
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"償債能力分析失敗: {str(e)}")
-            return {'indicators': {}, 'evaluation': '分析失敗', 'score': 50.0}
+        tables = self._tables
+        result = {
+            'indicators': {},
+            'evaluation': '',
+            'score': 50.0
+        }
+        
+        # 提取償債指標
+        values = _SOLVENCY_GET(ChainMap(indicators, _SOLVENCY_DEFAULTS))
+        debt_ratio, current_ratio, quick_ratio, interest_coverage, cash_ratio = values
+        
+        result['indicators'] = dict(zip(_SOLVENCY_DISPLAY_KEYS, values))
+        
+        # 評分邏輯
+        score = 50.0
+        
+        # 資產負債率評分
+        i = tables.debt_ratio.bucket(debt_ratio)
+        score += tables.debt_ratio.deltas[i]
+        debt_eval = tables.debt_ratio.labels[i]
+            
+        # 流動比率評分
+        i = tables.current_ratio.bucket(current_ratio)
+        score += tables.current_ratio.deltas[i]
+        liquidity_eval = tables.current_ratio.labels[i]
+            
+        # 速動比率評分
+        score += tables.quick_ratio.deltas[tables.quick_ratio.bucket(quick_ratio)]
+            
+        # 生成評價
+        result['evaluation'] = _SOLVENCY_FMT(debt_eval, debt_ratio, liquidity_eval, current_ratio)
+        result['score'] = score = _clip2(score)
+        
+        return score, result
     
-    def _analyze_operation(self, indicators: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_operation(self, indicators: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
         """分析營運能力"""
-        try:
-            result = {
-                'indicators': {},
-                'evaluation': '',
-                'score': 50.0
-            }
-            
-            # 提取營運指標
-            inventory_turnover = indicators.get('存貨週轉率', 0)
-            receivable_turnover = indicators.get('應收帳款週轉率', 0)
-            asset_turnover = indicators.get('總資產週轉率', 0)
-            fixed_asset_turnover = indicators.get('固定資產週轉率', 0)
-            working_capital_turnover = indicators.get('營運資金週轉率', 0)
-            
-            result['indicators'] = {
-                '存貨週轉率': inventory_turnover,
-                '應收帳款週轉率': receivable_turnover,
-                '總資產週轉率': asset_turnover,
-                '固定資產週轉率': fixed_asset_turnover,
-                '營運資金週轉率': working_capital_turnover
-            }
-            
-            # 評分邏輯
-            score = 50.0
-            
-            # 存貨週轉率評分
-            if inventory_turnover > 6:
-                score += 10
-                inventory_eval = '快速'
-            elif inventory_turnover > 4:
-                score += 5
-                inventory_eval = '正常'
-            elif inventory_turnover > 2:
-                inventory_eval = '偏慢'
-            else:
-                score -= 5
-                inventory_eval = '緩慢'
-                
-            # 應收帳款週轉率評分
-            if receivable_turnover > 12:
-                score += 10
-                receivable_eval = '回款快'
-            elif receivable_turnover > 6:
-                score += 5
-                receivable_eval = '回款正常'
-            else:
-                receivable_eval = '回款慢'
-                
-            # 總資產週轉率評分
-            if asset_turnover > 1:
-                score += 10
-            elif asset_turnover > 0.5:
-                score += 5
-            else:
-                score -= 5
-                
-            # 生成評價
-            result['evaluation'] = f"存貨週轉{inventory_eval}（{inventory_turnover:.1f}次/年），{receivable_eval}（{receivable_turnover:.1f}次/年）"
-            result['score'] = max(0, min(100, score))
-            
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"營運能力分析失敗: {str(e)}")
-            return {'indicators': {}, 'evaluation': '分析失敗', 'score': 50.0}
+        tables = self._tables
+        result = {
+            'indicators': {},
+            'evaluation': '',
+            'score': 50.0
+        }
+        
+        # 提取營運指標
+        values = _OPERATION_GET(ChainMap(indicators, _OPERATION_DEFAULTS))
+        (inventory_turnover, receivable_turnover, asset_turnover,
+         fixed_asset_turnover, working_capital_turnover) = values
+        
+        result['indicators'] = dict(zip(_OPERATION_DISPLAY_KEYS, values))
+        
+        # 評分邏輯
+        score = 50.0
+        
+        # 存貨週轉率評分
+        i = tables.inventory_turnover.bucket(inventory_turnover)
+        score += tables.inventory_turnover.deltas[i]
+        inventory_eval = tables.inventory_turnover.labels[i]
+            
+        # 應收帳款週轉率評分
+        i = tables.receivable_turnover.bucket(receivable_turnover)
+        score += tables.receivable_turnover.deltas[i]
+        receivable_eval = tables.receivable_turnover.labels[i]
+            
+        # 總資產週轉率評分
+        score += tables.asset_turnover.deltas[tables.asset_turnover.bucket(asset_turnover)]
+            
+        # 生成評價
+        result['evaluation'] = _OPERATION_FMT(inventory_eval, inventory_turnover, receivable_eval, receivable_turnover)
+        result['score'] = score = _clip2(score)
+        
+        return score, result
     
-    def _analyze_growth(self, indicators: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_growth(self, indicators: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
         """分析成長能力"""
-        try:
-            result = {
-                'indicators': {},
-                'evaluation': '',
-                'score': 50.0
-            }
-            
-            # 提取成長指標
-            revenue_growth = indicators.get('營收同比增長率', 0)
-            profit_growth = indicators.get('淨利潤同比增長率', 0)
-            asset_growth = indicators.get('總資產增長率', 0)
-            equity_growth = indicators.get('淨資產增長率', 0)
-            eps_growth = indicators.get('每股收益增長率', 0)
-            
-            result['indicators'] = {
-                '營收增長率': revenue_growth,
-                '淨利潤增長率': profit_growth,
-                '總資產增長率': asset_growth,
-                '淨資產增長率': equity_growth,
-                '每股收益增長率': eps_growth
-            }
-            
-            # 評分邏輯
-            score = 50.0
-            
-            # 營收增長評分
-            if revenue_growth > 30:
-                score += 20
-                revenue_eval = '高速增長'
-            elif revenue_growth > 20:
-                score += 15
-                revenue_eval = '快速增長'
-            elif revenue_growth > 10:
-                score += 10
-                revenue_eval = '穩定增長'
-            elif revenue_growth > 0:
-                score += 5
-                revenue_eval = '緩慢增長'
-            else:
-                score -= 10
-                revenue_eval = '負增長'
-                
-            # 利潤增長評分
-            if profit_growth > revenue_growth + 10:
-                score += 15
-                profit_eval = '利潤增速超營收'
-            elif profit_growth > revenue_growth:
-                score += 10
-                profit_eval = '利潤同步增長'
-            elif profit_growth > 0:
-                score += 5
-                profit_eval = '利潤正增長'
-            else:
-                score -= 5
-                profit_eval = '利潤下滑'
-                
-            # 生成評價
-            result['evaluation'] = f"營收{revenue_eval}（{revenue_growth:.1f}%），{profit_eval}（{profit_growth:.1f}%）"
-            result['score'] = max(0, min(100, score))
-            
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"成長能力分析失敗: {str(e)}")
-            return {'indicators': {}, 'evaluation': '分析失敗', 'score': 50.0}
+        tables = self._tables
+        result = {
+            'indicators': {},
+            'evaluation': '',
+            'score': 50.0
+        }
+        
+        # 提取成長指標
+        values = _GROWTH_GET(ChainMap(indicators, _GROWTH_DEFAULTS))
+        revenue_growth, profit_growth, asset_growth, equity_growth, eps_growth = values
+        
+        result['indicators'] = dict(zip(_GROWTH_DISPLAY_KEYS, values))
+        
+        # 評分邏輯
+        score = 50.0
+        
+        # 營收增長評分
+        i = tables.revenue_growth.bucket(revenue_growth)
+        score += tables.revenue_growth.deltas[i]
+        revenue_eval = tables.revenue_growth.labels[i]
+            
+        # 利潤增長評分
+        if profit_growth > revenue_growth + 10:
+            score += 15
+            profit_eval = '利潤增速超營收'
+        elif profit_growth > revenue_growth:
+            score += 10
+            profit_eval = '利潤同步增長'
+        elif profit_growth > 0:
+            score += 5
+            profit_eval = '利潤正增長'
+        else:
+            score -= 5
+            profit_eval = '利潤下滑'
+            
+        # 生成評價
+        result['evaluation'] = _GROWTH_FMT(revenue_eval, revenue_growth, profit_eval, profit_growth)
+        result['score'] = score = _clip2(score)
+        
+        return score, result
     
-    def _analyze_valuation(self, valuation_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_valuation(self, valuation_data: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
         """分析估值水平"""
-        try:
-            result = {
-                'indicators': {},
-                'evaluation': '',
-                'score': 50.0
-            }
-            
-            if not valuation_data:
-                return result
-                
-            # 提取估值指標
-            pe_ratio = valuation_data.get('市盈率', 0)
-            pb_ratio = valuation_data.get('市淨率', 0)
-            ps_ratio = valuation_data.get('市銷率', 0)
-            peg_ratio = valuation_data.get('PEG', 0)
-            
-            result['indicators'] = {
-                '市盈率(PE)': pe_ratio,
-                '市淨率(PB)': pb_ratio,
-                '市銷率(PS)': ps_ratio,
-                'PEG': peg_ratio
-            }
-            
-            # 評分邏輯
-            score = 50.0
-            
-            # PE評分
-            if 0 < pe_ratio < 15:
-                score += 15
-                pe_eval = '低估'
-            elif 15 <= pe_ratio < 25:
-                score += 10
-                pe_eval = '合理'
-            elif 25 <= pe_ratio < 40:
-                score += 5
-                pe_eval = '偏高'
-            else:
-                score -= 5
-                pe_eval = '高估'
-                
-            # PB評分
-            if 0 < pb_ratio < 1:
-                score += 10
-                pb_eval = '破淨'
-            elif 1 <= pb_ratio < 3:
-                score += 5
-                pb_eval = '正常'
-            else:
-                pb_eval = '偏高'
-                
-            # PEG評分
-            if 0 < peg_ratio < 1:
-                score += 10
-            elif 1 <= peg_ratio < 2:
-                score += 5
-                
-            # 生成評價
-            result['evaluation'] = f"PE{pe_eval}（{pe_ratio:.1f}），PB{pb_eval}（{pb_ratio:.2f}）"
-            result['score'] = max(0, min(100, score))
-            
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"估值分析失敗: {str(e)}")
-            return {'indicators': {}, 'evaluation': '分析失敗', 'score': 50.0}
-    
-    def _calculate_dimension_scores(self, analysis: Dict[str, Any]) -> Dict[str, float]:
-        """計算各維度得分"""
-        try:
-            scores = {}
-            
-            for dimension in ['profitability', 'solvency', 'operation', 'growth', 'valuation']:
-                if dimension in analysis and 'score' in analysis[dimension]:
-                    scores[dimension] = analysis[dimension]['score']
-                else:
-                    scores[dimension] = 50.0
-                    
-            return scores
+        tables = self._tables
+        result = {
+            'indicators': {},
+            'evaluation': '',
+            'score': 50.0
+        }
+        
+        if not valuation_data:
+            return result['score'], result
             
-        except Exception as e:
-            self.logger.error(f"維度得分計算失敗: {str(e)}")
-            return {dim: 50.0 for dim in self.indicator_weights.keys()}
+        # 提取估值指標
+        values = _VALUATION_GET(ChainMap(valuation_data, _VALUATION_DEFAULTS))
+        pe_ratio, pb_ratio, ps_ratio, peg_ratio = values
+        
+        result['indicators'] = dict(zip(_VALUATION_DISPLAY_KEYS, values))
+        
+        # 評分邏輯
+        score = 50.0
+        
+        # PE評分
+        i = tables.pe_ratio.bucket(pe_ratio)
+        score += tables.pe_ratio.deltas[i]
+        pe_eval = tables.pe_ratio.labels[i]
+            
+        # PB評分
+        i = tables.pb_ratio.bucket(pb_ratio)
+        score += tables.pb_ratio.deltas[i]
+        pb_eval = tables.pb_ratio.labels[i]
+            
+        # PEG評分
+        score += tables.peg_ratio.deltas[tables.peg_ratio.bucket(peg_ratio)]
+            
+        # 生成評價
+        result['evaluation'] = _VALUATION_FMT(pe_eval, pe_ratio, pb_eval, pb_ratio)
+        result['score'] = score = _clip2(score)
+        
+        return score, result
     
-    def _generate_summary(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """生成綜合評價摘要"""
-        try:
-            summary = {
-                'strengths': [],
-                'weaknesses': [],
-                'overall': ''
-            }
-            
-            # 分析優勢和劣勢
-            for dimension, data in analysis.items():
-                if isinstance(data, dict) and 'score' in data:
-                    if data['score'] >= 70:
-                        summary['strengths'].append(self._get_dimension_name(dimension))
-                    elif data['score'] <= 30:
-                        summary['weaknesses'].append(self._get_dimension_name(dimension))
-                        
-            # 生成總體評價
-            avg_score = sum(
-                analysis.get(dim, {}).get('score', 50) 
-                for dim in ['profitability', 'solvency', 'operation', 'growth', 'valuation']
-            ) / 5
-            
-            if avg_score >= 70:
-                summary['overall'] = '基本面優秀，財務狀況健康'
-            elif avg_score >= 60:
-                summary['overall'] = '基本面良好，具有投資價值'
-            elif avg_score >= 50:
-                summary['overall'] = '基本面一般，需關注風險'
-            else:
-                summary['overall'] = '基本面較差，謹慎投資'
+    def _reduce(self, dimension_scores: List[float]) -> Tuple[Dict[str, float], Dict[str, Any], float]:
+        """
+        單次遍歷各維度得分，同時得出維度得分字典、綜合評價摘要與平均分
+        
+        Args:
+            dimension_scores: 按 _DIMENSIONS 順序排列的維度得分列表
+        """
+        scores = {}
+        strengths = []
+        weaknesses = []
+        total = 0.0
+        
+        for dim, score in zip(_DIMENSIONS, dimension_scores):
+            scores[dim] = score
+            total += score
+            
+            if score >= 70:
+                strengths.append(_DIM_NAMES[dim])
+            elif score <= 30:
+                weaknesses.append(_DIM_NAMES[dim])
                 
-            return summary
-            
-        except Exception as e:
-            self.logger.error(f"生成綜合評價失敗: {str(e)}")
-            return {'strengths': [], 'weaknesses': [], 'overall': '評價失敗'}
+        avg_score = total / len(_DIMENSIONS)
+        
+        if avg_score >= 70:
+            overall = '基本面優秀，財務狀況健康'
+        elif avg_score >= 60:
+            overall = '基本面良好，具有投資價值'
+        elif avg_score >= 50:
+            overall = '基本面一般，需關注風險'
+        else:
+            overall = '基本面較差，謹慎投資'
+            
+        summary = {
+            'strengths': strengths,
+            'weaknesses': weaknesses,
+            'overall': overall
+        }
+        
+        return scores, summary, avg_score
     
     def _get_dimension_name(self, dimension: str) -> str:
         """獲取維度中文名稱"""
-        names = {
-            'profitability': '盈利能力',
-            'solvency': '償債能力',
-            'operation': '營運能力',
-            'growth': '成長能力',
-            'valuation': '估值水平'
-        }
-        return names.get(dimension, dimension)
+        return _DIM_NAMES.get(dimension, dimension)
     
     def _get_default_result(self) -> Dict[str, Any]:
         """獲取默認分析結果"""
         return {
             'analysis': {},
-            'dimension_scores': {dim: 50.0 for dim in self.indicator_weights.keys()},
+            'dimension_scores': self._default_scores.copy(),
             'score': 50.0,
             'status': 'no_data'
         }
\ No newline at end of file
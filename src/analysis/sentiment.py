@@ -7,12 +7,291 @@
 from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from itertools import chain
+from multiprocessing import get_context
+from types import MappingProxyType
+import heapq
 import re
+import numpy as np
 from ..utils.logger import get_logger
-from ..core.config import Config
+from ..core.config import ConfigManager as Config
+from ..core.constants import CONCURRENCY_SETTINGS
+from ._kernels import NUMBA_AVAILABLE, sentiment_aggregate
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - 取決於運行環境
+    ahocorasick = None
 
 logger = get_logger(__name__)
 
+# 單條新聞情緒結果的緩存上限（按文本去重，超出時淘汰最早寫入的條目）
+_SENTIMENT_CACHE_SIZE = 4096
+
+# 單條新聞保留的關鍵詞數量
+_MAX_KEYWORDS = 5
+
+# 正面詞彙（擴展版）
+_POSITIVE_WORDS = frozenset({
+    # 業績相關
+    '增長', '上漲', '提升', '改善', '優化', '創新高', '突破', '超預期',
+    '盈利', '獲利', '賺錢', '營收增長', '利潤增長', '業績增長',
+    # 技術突破
+    '突破', '創新', '領先', '第一', '首創', '獨家', '革命性', '顛覆性',
+    '技術優勢', '競爭優勢', '核心技術', '專利', '研發成功',
+    # 市場地位
+    '龍頭', '領導者', '市占率提升', '擴張', '佈局', '戰略合作', '強強聯合',
+    '訂單增長', '中標', '簽約', '合作', '併購',
+    # 財務健康
+    '現金流充裕', '財務穩健', '低負債', '高股息', '分紅', '回購',
+    '資產優質', '毛利率提升', '費用下降', '效率提升',
+    # 市場情緒
+    '看好', '推薦', '買入', '增持', '目標價上調', '評級上調',
+    '機構看好', '資金流入', '主力買入', '北向資金'
+})
+
+# 負面詞彙（擴展版）
+_NEGATIVE_WORDS = frozenset({
+    # 業績相關
+    '下降', '下跌', '減少', '虧損', '下滑', '衰退', '低於預期', '不及預期',
+    '業績下滑', '利潤下降', '營收下降', '毛利率下降',
+    # 經營問題
+    '裁員', '關閉', '停產', '違約', '逾期', '訴訟', '處罰', '調查',
+    '質量問題', '安全事故', '環保問題', '監管處罰',
+    # 市場風險
+    '競爭加劇', '市場萎縮', '需求下降', '訂單減少', '客戶流失',
+    '市占率下降', '被超越', '技術落後', '產品滯銷',
+    # 財務風險
+    '資金緊張', '流動性風險', '高負債', '償債壓力', '現金流惡化',
+    '壞賬', '減值', '計提', '財務造假', '審計問題',
+    # 市場情緒
+    '看跌', '賣出', '減持', '目標價下調', '評級下調', '不看好',
+    '資金流出', '主力賣出', '拋售', '恐慌'
+})
+
+# 中性詞彙
+_NEUTRAL_WORDS = frozenset({
+    '維持', '持平', '穩定', '正常', '一般', '預計', '可能',
+    '觀望', '震盪', '盤整', '橫盤', '調整'
+})
+
+# 情緒強度修飾詞
+_INTENSITY_MODIFIERS = MappingProxyType({
+    '大幅': 1.5, '顯著': 1.3, '明顯': 1.2, '較大': 1.1,
+    '略微': 0.8, '小幅': 0.7, '輕微': 0.6, '稍微': 0.5
+})
+
+# 全部詞典的 (類別, 詞, 強度係數)，供多模式匹配使用
+_LEXICON_ENTRIES = (
+    [('pos', word, 1.0) for word in sorted(_POSITIVE_WORDS)]
+    + [('neg', word, 1.0) for word in sorted(_NEGATIVE_WORDS)]
+    + [('neu', word, 1.0) for word in sorted(_NEUTRAL_WORDS)]
+    + [('mod', modifier, factor) for modifier, factor in _INTENSITY_MODIFIERS.items()]
+)
+
+
+def _build_automaton(entries: List[Tuple[str, str, float]]):
+    """構建情緒詞典的 Aho-Corasick 自動機，值為 (類別, 詞, 強度係數)"""
+    automaton = ahocorasick.Automaton()
+
+    for entry in entries:
+        automaton.add_word(entry[1], entry)
+
+    automaton.make_automaton()
+    return automaton
+
+
+def _build_pattern(entries: List[Tuple[str, str, float]]):
+    """
+    構建情緒詞典的預編譯正則
+
+    以零寬先行斷言在每個位置捕獲最長的詞，再展開為該詞在詞典中的所有前綴詞，
+    從而與逐詞統計一樣計入嵌套詞（如 '創新高' 中的 '創新'、'營收增長' 中的 '增長'）。
+    斷言前先以詞典首字符組成的字符類預篩，首字符不在詞典中的位置不嘗試整個交替分支。
+
+    Returns:
+        (正則, {最長詞: 該位置命中的所有 (類別, 詞, 強度係數)})
+    """
+    by_word = {entry[1]: entry for entry in entries}
+    words = sorted(by_word, key=len, reverse=True)
+    first_chars = ''.join(sorted({word[0] for word in words}))
+    pattern = re.compile(
+        '(?=[' + re.escape(first_chars) + '])(?=(' + '|'.join(map(re.escape, words)) + '))'
+    )
+    hits = {
+        word: tuple(by_word[word[:size]] for size in range(1, len(word) + 1) if word[:size] in by_word)
+        for word in words
+    }
+    return pattern, hits
+
+
+# 匹配器在導入時構建一次，所有分析器實例共用
+# 詞典僅數百詞，內存構建自動機約需數十微秒，比從磁盤反序列化預構建文件更快，故不做持久化
+# 安裝 pyahocorasick 時把全部詞典建成一個自動機，單次掃描即可找出所有詞的出現位置
+_AUTOMATON = _build_automaton(_LEXICON_ENTRIES) if ahocorasick is not None else None
+# 正則備用路徑：同樣單次掃描，不引入額外依賴
+_PATTERN, _PATTERN_HITS = _build_pattern(_LEXICON_ENTRIES)
+
+# 默認結果模板：只讀，鍵順序即輸出順序；列表/字典成員為佔位，返回時替換為新建的可變容器
+_DEFAULT_DISTRIBUTION = MappingProxyType({'positive': 0, 'neutral': 0, 'negative': 0})
+_DEFAULT_SENTIMENT_ANALYSIS = MappingProxyType({
+    'overall_sentiment': 0.0,
+    'confidence_score': 0.0,
+    'sentiment_distribution': _DEFAULT_DISTRIBUTION,
+    'category_sentiments': None,
+    'sentiment_trend': None,
+    'keyword_sentiments': None,
+    'total_analyzed': 0,
+    'analysis_details': None
+})
+_DEFAULT_REPORT = MappingProxyType({
+    'summary': '無新聞數據',
+    'highlights': None,
+    'risks': None,
+    'trend_analysis': '無趨勢數據'
+})
+
+# 規範的 YYYY-MM-DD 日期前綴，可直接作為分組鍵
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+@lru_cache(maxsize=1024)
+def _date_key(prefix: str) -> Optional[str]:
+    """
+    把日期前綴轉為 YYYY-MM-DD 分組鍵
+
+    同一日期的新聞只解析一次；規範格式直接返回前綴，無效日期返回 None。
+    """
+    try:
+        date = datetime.strptime(prefix, '%Y-%m-%d')
+    except ValueError:
+        return None
+    return prefix if _DATE_RE.fullmatch(prefix) else date.strftime('%Y-%m-%d')
+
+
+def _scan_text(text: str, automaton=None) -> Tuple[int, int, int, List[Tuple[str, str]], float]:
+    """
+    單次掃描文本，返回正面/負面/中性詞次數、關鍵詞與強度係數
+
+    Args:
+        text: 新聞文本
+        automaton: Aho-Corasick 自動機，為 None 時使用預編譯正則
+    """
+    if automaton is not None:
+        matches = (entry for _, entry in automaton.iter(text))
+    else:
+        matches = chain.from_iterable(_PATTERN_HITS[m.group(1)] for m in _PATTERN.finditer(text))
+
+    counts = {'pos': 0, 'neg': 0, 'neu': 0, 'mod': 0}
+    positive_keywords = {}
+    negative_keywords = {}
+    intensity = 1.0
+
+    # 輸出的關鍵詞為正面詞在前、負面詞在後的前 _MAX_KEYWORDS 個，
+    # 兩類各保留首次出現的前 _MAX_KEYWORDS 個即可，不必收集全部命中
+    for category, word, factor in matches:
+        counts[category] += 1
+        if category == 'pos':
+            if len(positive_keywords) < _MAX_KEYWORDS:
+                positive_keywords[word] = None
+        elif category == 'neg':
+            if len(negative_keywords) < _MAX_KEYWORDS:
+                negative_keywords[word] = None
+        elif category == 'mod':
+            intensity = max(intensity, factor)
+
+    keywords = [('正面', word) for word in positive_keywords]
+    keywords.extend(('負面', word) for word in negative_keywords)
+    del keywords[_MAX_KEYWORDS:]
+
+    return counts['pos'], counts['neg'], counts['neu'], keywords, intensity
+
+
+def _score_text(text: str, automaton=None) -> Dict[str, Any]:
+    """計算新聞文本的情緒分數與詞頻統計"""
+    # 統計情緒詞（各詞典互不重疊，計數與逐詞統計一致）
+    positive_count, negative_count, neutral_count, keywords, intensity = _scan_text(text, automaton)
+
+    # 計算情緒分數
+    total_words = positive_count + negative_count + neutral_count
+    if total_words > 0:
+        # 基礎分數
+        base_score = (positive_count - negative_count) / total_words
+        # 應用強度修飾
+        sentiment_score = base_score * intensity
+        # 限制在[-1, 1]範圍
+        sentiment_score = max(-1, min(1, sentiment_score))
+    else:
+        sentiment_score = 0
+
+    return {
+        'score': sentiment_score,
+        'positive_count': positive_count,
+        'negative_count': negative_count,
+        'neutral_count': neutral_count,
+        'keywords': keywords,  # 只保留前5個關鍵詞
+        'intensity': intensity
+    }
+
+
+def _aggregate_scores(scores: np.ndarray, type_ids: np.ndarray,
+                      n_types: int) -> Tuple[int, int, np.ndarray, np.ndarray, float]:
+    """
+    匯總新聞情緒得分
+
+    安裝 numba 時走編譯內核單次遍歷，否則以 NumPy 向量化計算。
+
+    Args:
+        scores: (N,) 各條新聞的情緒得分
+        type_ids: (N,) 各條新聞的類型下標
+        n_types: 類型數量
+
+    Returns:
+        (正面條數, 負面條數, (T,) 各類型得分合計, (T,) 各類型條數, 得分離差平方和)
+    """
+    if NUMBA_AVAILABLE:
+        positive, negative, type_sums, type_counts, m2 = sentiment_aggregate(scores, type_ids, n_types)
+        return int(positive), int(negative), type_sums, type_counts, float(m2)
+
+    positive = int(np.count_nonzero(scores > 0.3))
+    negative = int(np.count_nonzero(scores < -0.3))
+    # bincount 按輸入順序累加，類型得分合計與逐條相加一致
+    type_sums = np.bincount(type_ids, weights=scores, minlength=n_types)
+    type_counts = np.bincount(type_ids, minlength=n_types)
+    m2 = float(np.square(scores - scores.mean()).sum())
+    return positive, negative, type_sums, type_counts, m2
+
+
+def _analyze_text_worker(text: str) -> Dict[str, Any]:
+    """進程池工作函數：以子進程中導入時構建的匹配器分析新聞文本"""
+    return _score_text(text, _AUTOMATON)
+
+
+# 未緩存的新聞文本超過此數量時以進程池並行分析（小批量時進程間傳輸開銷高於收益）
+_PARALLEL_THRESHOLD = 50
+_PARALLEL_CHUNKSIZE = 32
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """
+    延遲創建模組共用的進程池
+
+    以 spawn 方式啟動子進程：宿主多為多線程的 Web 服務，fork 時其他線程持有的鎖
+    （日誌、緩存等）會原樣複製到子進程而永不釋放，可能導致子進程死鎖。
+    子進程導入本模組時自行構建匹配器，無需繼承父進程狀態。
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=CONCURRENCY_SETTINGS['max_workers'],
+            mp_context=get_context('spawn')
+        )
+    return _executor
+
 
 class SentimentAnalyzer:
     """情緒分析器"""
@@ -30,6 +309,9 @@ class SentimentAnalyzer:
         # 初始化情緒詞典
         self._init_sentiment_dictionary()
         
+        # 單條新聞情緒緩存：{新聞文本: 分析結果}，趨勢分析與重複新聞不再重複掃描
+        self._sentiment_cache: Dict[str, Dict[str, Any]] = {}
+        
         # 新聞類型權重
         self.news_type_weights = {
             '公司新聞': 1.0,
@@ -83,84 +365,103 @@ class SentimentAnalyzer:
         Returns:
             情緒分析結果
         """
-        try:
-            # 初始化結果
-            result = {
-                'overall_sentiment': 0.0,
-                'confidence_score': 0.0,
-                'sentiment_distribution': {'positive': 0, 'neutral': 0, 'negative': 0},
-                'category_sentiments': {},
-                'sentiment_trend': [],
-                'keyword_sentiments': {},
-                'total_analyzed': 0,
-                'analysis_details': []
-            }
+        # 初始化結果
+        result = self._get_default_sentiment_analysis()
+        
+        if not news_data:
+            return result
             
-            if not news_data:
-                return result
-                
-            # 按類型分組新聞
-            news_by_type = self._group_news_by_type(news_data)
+        # 正則路徑下的大批量新聞先以進程池並行掃描，結果寫入緩存供主循環讀取
+        # （自動機單條掃描只需數微秒，進程間傳輸開銷高於收益，保持串行）
+        if self._ac is None and len(news_data) > _PARALLEL_THRESHOLD:
+            self._prefetch_sentiments(news_data)
+            
+        # 逐條分析新聞；趨勢與關鍵詞統計在循環內累計，分佈、類型與置信度統計交給 _aggregate_scores
+        # {新聞類型: 類型下標}，按首次出現的順序編號
+        type_index = {}
+        # 按類型下標收集的詳細分析列表，輸出時按類型首次出現的順序拼接
+        details_by_type = []
+        scores = []
+        type_ids = []
+        # (日期字符串, 情緒得分)，供趨勢分析直接使用，不再重新掃描新聞
+        dated_scores = []
+        # {關鍵詞: [出現次數, 情緒得分合計, 類型]}
+        keyword_stats = {}
+        get_stats = keyword_stats.get
+        
+        for news in news_data:
+            # 分析單條新聞（格式錯誤的單條新聞跳過，不影響整批分析）
+            try:
+                sentiment = self._analyze_single_news(news)
+                news_type = news.get('type', '其他')
+            except (AttributeError, TypeError) as e:
+                self.logger.warning(f"單條新聞分析失敗，已跳過: {str(e)}")
+                continue
+            score = sentiment['score']
             
-            # 分析每個類型的情緒
-            category_scores = {}
-            all_sentiments = []
+            type_id = type_index.get(news_type)
+            if type_id is None:
+                type_id = type_index[news_type] = len(type_index)
+                details_by_type.append([])
+            scores.append(score)
+            type_ids.append(type_id)
+            dated_scores.append((news.get('date', ''), score))
             
-            for news_type, news_list in news_by_type.items():
-                type_sentiments = []
+            # 關鍵詞情緒（各詞典互不重疊，同一關鍵詞的類型固定）
+            for sentiment_type, keyword in sentiment['keywords']:
+                keyword_entry = get_stats(keyword)
+                if keyword_entry is None:
+                    keyword_entry = keyword_stats[keyword] = [0, 0.0, sentiment_type]
+                keyword_entry[0] += 1
+                keyword_entry[1] += score
                 
-                for news in news_list:
-                    # 分析單條新聞
-                    sentiment = self._analyze_single_news(news)
-                    type_sentiments.append(sentiment)
-                    all_sentiments.append(sentiment)
-                    
-                    # 記錄詳細分析
-                    result['analysis_details'].append({
-                        'title': news.get('title', ''),
-                        'type': news_type,
-                        'sentiment': sentiment['score'],
-                        'keywords': sentiment['keywords']
-                    })
-                    
-                # 計算該類型的平均情緒
-                if type_sentiments:
-                    avg_sentiment = sum(s['score'] for s in type_sentiments) / len(type_sentiments)
-                    category_scores[news_type] = avg_sentiment
-                    
+            # 記錄詳細分析
+            details_by_type[type_id].append({
+                'title': news.get('title', ''),
+                'type': news_type,
+                'sentiment': score,
+                'keywords': list(sentiment['keywords'])  # 複製，避免調用方修改結果時污染緩存
+            })
+            
+        count = len(scores)
+        result['analysis_details'] = list(chain.from_iterable(details_by_type))
+        result['total_analyzed'] = count
+        
+        if count:
+            positive, negative, type_sums, type_counts, m2 = _aggregate_scores(
+                np.array(scores, dtype=np.float64), np.array(type_ids, dtype=np.int64), len(type_index)
+            )
+            
+            # 計算情緒分佈
+            result['sentiment_distribution'] = {
+                'positive': positive,
+                'neutral': count - positive - negative,
+                'negative': negative
+            }
+            
+            # 計算各類型的平均情緒
+            category_scores = {
+                news_type: float(type_sums[type_id] / type_counts[type_id])
+                for news_type, type_id in type_index.items()
+            }
             result['category_sentiments'] = category_scores
-            result['total_analyzed'] = len(all_sentiments)
             
             # 計算整體情緒（加權平均）
-            if all_sentiments:
-                result['overall_sentiment'] = self._calculate_weighted_sentiment(
-                    news_by_type, category_scores
-                )
-                
-                # 計算情緒分佈
-                for sentiment in all_sentiments:
-                    score = sentiment['score']
-                    if score > 0.3:
-                        result['sentiment_distribution']['positive'] += 1
-                    elif score < -0.3:
-                        result['sentiment_distribution']['negative'] += 1
-                    else:
-                        result['sentiment_distribution']['neutral'] += 1
-                        
-                # 計算置信度
-                result['confidence_score'] = self._calculate_confidence(all_sentiments)
-                
-                # 分析情緒趨勢
-                result['sentiment_trend'] = self._analyze_sentiment_trend(news_data)
-                
-                # 提取關鍵詞情緒
-                result['keyword_sentiments'] = self._extract_keyword_sentiments(all_sentiments)
-                
-            return result
+            result['overall_sentiment'] = self._calculate_weighted_sentiment(
+                {news_type: int(type_counts[type_id]) for news_type, type_id in type_index.items()},
+                category_scores
+            )
             
-        except Exception as e:
-            self.logger.error(f"高級情緒分析失敗: {str(e)}")
-            return self._get_default_sentiment_analysis()
+            # 計算置信度
+            result['confidence_score'] = self._calculate_confidence(count, m2)
+            
+            # 分析情緒趨勢
+            result['sentiment_trend'] = self._analyze_sentiment_trend(dated_scores)
+            
+            # 提取關鍵詞情緒
+            result['keyword_sentiments'] = self._extract_keyword_sentiments(keyword_stats)
+            
+        return result
     
     def calculate_score(self, sentiment_analysis: Dict[str, Any]) -> float:
         """
@@ -172,354 +473,263 @@ class SentimentAnalyzer:
         Returns:
             情緒得分（0-100）
         """
-        try:
-            overall_sentiment = sentiment_analysis.get('overall_sentiment', 0.0)
-            confidence_score = sentiment_analysis.get('confidence_score', 0.0)
-            total_analyzed = sentiment_analysis.get('total_analyzed', 0)
-            
-            # 基礎得分：將情緒得分從[-1,1]映射到[0,100]
-            base_score = (overall_sentiment + 1) * 50
-            
-            # 置信度調整（最多±10分）
-            confidence_adjustment = confidence_score * 10
-            
-            # 新聞數量調整（最多+10分）
-            news_adjustment = min(total_analyzed / 100, 1.0) * 10
-            
-            # 情緒分佈調整
-            distribution = sentiment_analysis.get('sentiment_distribution', {})
-            total_news = sum(distribution.values())
-            if total_news > 0:
-                positive_ratio = distribution.get('positive', 0) / total_news
-                negative_ratio = distribution.get('negative', 0) / total_news
-                
-                # 正面新聞比例高加分，負面新聞比例高減分
-                distribution_adjustment = (positive_ratio - negative_ratio) * 10
-            else:
-                distribution_adjustment = 0
-                
-            # 計算最終得分
-            final_score = base_score + confidence_adjustment + news_adjustment + distribution_adjustment
-            final_score = max(0, min(100, final_score))
+        overall_sentiment = sentiment_analysis.get('overall_sentiment', 0.0)
+        confidence_score = sentiment_analysis.get('confidence_score', 0.0)
+        total_analyzed = sentiment_analysis.get('total_analyzed', 0)
+        
+        # 基礎得分：將情緒得分從[-1,1]映射到[0,100]
+        base_score = (overall_sentiment + 1) * 50
+        
+        # 置信度調整（最多±10分）
+        confidence_adjustment = confidence_score * 10
+        
+        # 新聞數量調整（最多+10分）
+        news_adjustment = min(total_analyzed / 100, 1.0) * 10
+        
+        # 情緒分佈調整
+        distribution = sentiment_analysis.get('sentiment_distribution', {})
+        total_news = sum(distribution.values())
+        if total_news > 0:
+            positive_ratio = distribution.get('positive', 0) / total_news
+            negative_ratio = distribution.get('negative', 0) / total_news
             
-            return round(final_score, 2)
+            # 正面新聞比例高加分，負面新聞比例高減分
+            distribution_adjustment = (positive_ratio - negative_ratio) * 10
+        else:
+            distribution_adjustment = 0
             
-        except Exception as e:
-            self.logger.error(f"情緒得分計算失敗: {str(e)}")
-            return 50.0
+        # 計算最終得分
+        final_score = base_score + confidence_adjustment + news_adjustment + distribution_adjustment
+        final_score = max(0, min(100, final_score))
+        
+        return round(final_score, 2)
     
     def _init_sentiment_dictionary(self):
-        """初始化情緒詞典"""
-        # 正面詞彙（擴展版）
-        self.positive_words = {
-            # 業績相關
-            '增長', '上漲', '提升', '改善', '優化', '創新高', '突破', '超預期',
-            '盈利', '獲利', '賺錢', '營收增長', '利潤增長', '業績增長',
-            # 技術突破
-            '突破', '創新', '領先', '第一', '首創', '獨家', '革命性', '顛覆性',
-            '技術優勢', '競爭優勢', '核心技術', '專利', '研發成功',
-            # 市場地位
-            '龍頭', '領導者', '市占率提升', '擴張', '佈局', '戰略合作', '強強聯合',
-            '訂單增長', '中標', '簽約', '合作', '併購',
-            # 財務健康
-            '現金流充裕', '財務穩健', '低負債', '高股息', '分紅', '回購',
-            '資產優質', '毛利率提升', '費用下降', '效率提升',
-            # 市場情緒
-            '看好', '推薦', '買入', '增持', '目標價上調', '評級上調',
-            '機構看好', '資金流入', '主力買入', '北向資金'
-        }
-        
-        # 負面詞彙（擴展版）
-        self.negative_words = {
-            # 業績相關
-            '下降', '下跌', '減少', '虧損', '下滑', '衰退', '低於預期', '不及預期',
-            '業績下滑', '利潤下降', '營收下降', '毛利率下降',
-            # 經營問題
-            '裁員', '關閉', '停產', '違約', '逾期', '訴訟', '處罰', '調查',
-            '質量問題', '安全事故', '環保問題', '監管處罰',
-            # 市場風險
-            '競爭加劇', '市場萎縮', '需求下降', '訂單減少', '客戶流失',
-            '市占率下降', '被超越', '技術落後', '產品滯銷',
-            # 財務風險
-            '資金緊張', '流動性風險', '高負債', '償債壓力', '現金流惡化',
-            '壞賬', '減值', '計提', '財務造假', '審計問題',
-            # 市場情緒
-            '看跌', '賣出', '減持', '目標價下調', '評級下調', '不看好',
-            '資金流出', '主力賣出', '拋售', '恐慌'
-        }
+        """初始化情緒詞典（引用模組級的不可變詞典與匹配器）"""
+        self.positive_words = _POSITIVE_WORDS
+        self.negative_words = _NEGATIVE_WORDS
+        self.neutral_words = _NEUTRAL_WORDS
+        self.intensity_modifiers = _INTENSITY_MODIFIERS
         
-        # 中性詞彙
-        self.neutral_words = {
-            '維持', '持平', '穩定', '正常', '一般', '預計', '可能',
-            '觀望', '震盪', '盤整', '橫盤', '調整'
-        }
-        
-        # 情緒強度修飾詞
-        self.intensity_modifiers = {
-            '大幅': 1.5, '顯著': 1.3, '明顯': 1.2, '較大': 1.1,
-            '略微': 0.8, '小幅': 0.7, '輕微': 0.6, '稍微': 0.5
-        }
+        self._ac = _AUTOMATON
         
     def _analyze_single_news(self, news: Dict[str, Any]) -> Dict[str, Any]:
-        """分析單條新聞的情緒"""
-        try:
-            title = news.get('title', '')
-            content = news.get('content', '')
-            text = f"{title} {content}"
-            
-            # 統計情緒詞
-            positive_count = 0
-            negative_count = 0
-            neutral_count = 0
-            keywords = []
-            
-            # 查找情緒詞
-            for word in self.positive_words:
-                if word in text:
-                    positive_count += text.count(word)
-                    keywords.append(('正面', word))
-                    
-            for word in self.negative_words:
-                if word in text:
-                    negative_count += text.count(word)
-                    keywords.append(('負面', word))
-                    
-            for word in self.neutral_words:
-                if word in text:
-                    neutral_count += text.count(word)
-                    
-            # 檢查強度修飾詞
-            intensity = 1.0
-            for modifier, factor in self.intensity_modifiers.items():
-                if modifier in text:
-                    intensity = max(intensity, factor)
-                    
-            # 計算情緒分數
-            total_words = positive_count + negative_count + neutral_count
-            if total_words > 0:
-                # 基礎分數
-                base_score = (positive_count - negative_count) / total_words
-                # 應用強度修飾
-                sentiment_score = base_score * intensity
-                # 限制在[-1, 1]範圍
-                sentiment_score = max(-1, min(1, sentiment_score))
-            else:
-                sentiment_score = 0
-                
-            return {
-                'score': sentiment_score,
-                'positive_count': positive_count,
-                'negative_count': negative_count,
-                'neutral_count': neutral_count,
-                'keywords': keywords[:5],  # 只保留前5個關鍵詞
-                'intensity': intensity
-            }
+        """分析單條新聞的情緒（結果按新聞文本緩存，調用方不應修改返回值）"""
+        title = news.get('title', '')
+        content = news.get('content', '')
+        text = f"{title} {content}"
+        
+        cache = self._sentiment_cache
+        sentiment = cache.get(text)
+        if sentiment is None:
+            sentiment = self._analyze_text(text)
+            if len(cache) >= _SENTIMENT_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            cache[text] = sentiment
             
-        except Exception as e:
-            self.logger.error(f"單條新聞分析失敗: {str(e)}")
-            return {'score': 0, 'keywords': []}
-    
-    def _group_news_by_type(self, news_data: List[Dict[str, Any]]) -> Dict[str, List]:
-        """按類型分組新聞"""
-        grouped = defaultdict(list)
+        return sentiment
         
-        for news in news_data:
-            news_type = news.get('type', '其他')
-            grouped[news_type].append(news)
+    def _analyze_text(self, text: str) -> Dict[str, Any]:
+        """分析新聞文本的情緒"""
+        return _score_text(text, self._ac)
+        
+    def _prefetch_sentiments(self, news_data: List[Dict[str, Any]]):
+        """以進程池並行分析未緩存的新聞文本並寫入緩存；進程池不可用時留給主循環串行分析"""
+        cache = self._sentiment_cache
+        unique_texts = dict.fromkeys(
+            f"{news.get('title', '')} {news.get('content', '')}"
+            for news in news_data if isinstance(news, dict)
+        )
+        texts = [text for text in unique_texts if text not in cache][:_SENTIMENT_CACHE_SIZE]
+        if len(texts) <= _PARALLEL_THRESHOLD:
+            return
             
-        return dict(grouped)
+        try:
+            sentiments = list(_get_executor().map(_analyze_text_worker, texts, chunksize=_PARALLEL_CHUNKSIZE))
+        except (OSError, BrokenProcessPool) as e:
+            self.logger.warning(f"並行情緒分析不可用，改為串行: {str(e)}")
+            return
+            
+        for text, sentiment in zip(texts, sentiments):
+            if len(cache) >= _SENTIMENT_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            cache[text] = sentiment
     
-    def _calculate_weighted_sentiment(self, news_by_type: Dict[str, List], 
+    def _calculate_weighted_sentiment(self, type_counts: Dict[str, int], 
                                     category_scores: Dict[str, float]) -> float:
-        """計算加權平均情緒"""
-        weighted_sum = 0
-        weight_sum = 0
+        """
+        計算加權平均情緒
         
-        for news_type, score in category_scores.items():
-            weight = self.news_type_weights.get(news_type, 0.5)
-            count = len(news_by_type.get(news_type, []))
-            
-            weighted_sum += score * weight * count
-            weight_sum += weight * count
-            
+        Args:
+            type_counts: {新聞類型: 新聞條數}
+            category_scores: {新聞類型: 平均情緒}
+        """
+        weights = self.news_type_weights
+        scores = np.fromiter(category_scores.values(), dtype=np.float64, count=len(category_scores))
+        weighted_counts = np.fromiter(
+            (weights.get(news_type, 0.5) * type_counts.get(news_type, 0) for news_type in category_scores),
+            dtype=np.float64, count=len(category_scores)
+        )
+        
+        weight_sum = weighted_counts.sum()
         if weight_sum > 0:
-            return weighted_sum / weight_sum
+            return float(np.dot(scores, weighted_counts) / weight_sum)
         return 0
     
-    def _calculate_confidence(self, sentiments: List[Dict[str, Any]]) -> float:
-        """計算置信度分數"""
-        if not sentiments:
+    def _calculate_confidence(self, count: int, m2: float) -> float:
+        """
+        計算置信度分數
+        
+        Args:
+            count: 新聞條數
+            m2: 情緒得分的離差平方和（Welford 在線累計）
+        """
+        if count == 0:
             return 0
             
-        # 基於情緒一致性計算置信度
-        scores = [s['score'] for s in sentiments]
-        
-        # 計算標準差
-        avg_score = sum(scores) / len(scores)
-        variance = sum((s - avg_score) ** 2 for s in scores) / len(scores)
-        std_dev = variance ** 0.5
+        # 基於情緒一致性計算置信度（總體標準差）
+        std_dev = (m2 / count) ** 0.5
         
         # 低標準差表示高一致性，高置信度
         # 將標準差映射到置信度（0-1）
         confidence = max(0, 1 - std_dev)
         
         # 考慮樣本數量
-        sample_factor = min(len(sentiments) / 50, 1.0)  # 50條新聞達到最大置信度
+        sample_factor = min(count / 50, 1.0)  # 50條新聞達到最大置信度
         
         return confidence * sample_factor
     
-    def _analyze_sentiment_trend(self, news_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """分析情緒趨勢"""
-        try:
-            # 按日期分組新聞
-            news_by_date = defaultdict(list)
-            
-            for news in news_data:
-                # 提取日期
-                date_str = news.get('date', '')
-                if date_str:
-                    try:
-                        date = datetime.strptime(date_str[:10], '%Y-%m-%d')
-                        news_by_date[date.strftime('%Y-%m-%d')].append(news)
-                    except:
-                        continue
-                        
-            # 計算每日情緒
-            trend = []
-            for date in sorted(news_by_date.keys())[-7:]:  # 最近7天
-                daily_news = news_by_date[date]
-                daily_sentiments = [self._analyze_single_news(n)['score'] for n in daily_news]
-                
-                if daily_sentiments:
-                    avg_sentiment = sum(daily_sentiments) / len(daily_sentiments)
-                    trend.append({
-                        'date': date,
-                        'sentiment': round(avg_sentiment, 3),
-                        'count': len(daily_sentiments)
-                    })
+    def _analyze_sentiment_trend(self, dated_scores: List[Tuple[str, float]]) -> List[Dict[str, Any]]:
+        """
+        分析情緒趨勢
+        
+        Args:
+            dated_scores: (日期字符串, 情緒得分) 列表
+        """
+        # 按日期分組情緒得分
+        scores_by_date = defaultdict(list)
+        
+        for date_str, score in dated_scores:
+            # 提取日期（非字符串與無法解析的日期跳過）
+            if date_str and isinstance(date_str, str):
+                date = _date_key(date_str[:10])
+                if date is not None:
+                    scores_by_date[date].append(score)
                     
-            return trend
+        # 計算每日情緒
+        trend = []
+        for date in sorted(scores_by_date.keys())[-7:]:  # 最近7天
+            daily_sentiments = scores_by_date[date]
             
-        except Exception as e:
-            self.logger.error(f"情緒趨勢分析失敗: {str(e)}")
-            return []
-    
-    def _extract_keyword_sentiments(self, sentiments: List[Dict[str, Any]]) -> Dict[str, Dict]:
-        """提取關鍵詞情緒"""
-        keyword_stats = defaultdict(lambda: {'count': 0, 'sentiment': 0})
-        
-        for sentiment in sentiments:
-            for sentiment_type, keyword in sentiment.get('keywords', []):
-                keyword_stats[keyword]['count'] += 1
-                keyword_stats[keyword]['sentiment'] += sentiment['score']
-                keyword_stats[keyword]['type'] = sentiment_type
-                
-        # 計算平均情緒並排序
-        result = {}
-        for keyword, stats in keyword_stats.items():
-            if stats['count'] > 0:
-                avg_sentiment = stats['sentiment'] / stats['count']
-                result[keyword] = {
-                    'count': stats['count'],
+            if daily_sentiments:
+                avg_sentiment = sum(daily_sentiments) / len(daily_sentiments)
+                trend.append({
+                    'date': date,
                     'sentiment': round(avg_sentiment, 3),
-                    'type': stats['type']
-                }
+                    'count': len(daily_sentiments)
+                })
                 
-        # 返回出現頻率最高的前10個關鍵詞
-        sorted_keywords = sorted(result.items(), key=lambda x: x[1]['count'], reverse=True)
-        return dict(sorted_keywords[:10])
+        return trend
+    
+    def _extract_keyword_sentiments(self, keyword_stats: Dict[str, List]) -> Dict[str, Dict]:
+        """
+        提取關鍵詞情緒
+        
+        Args:
+            keyword_stats: {關鍵詞: [出現次數, 情緒得分合計, 類型]}
+        """
+        # 取出現頻率最高的前10個關鍵詞（與穩定排序後截取等價），僅為這些詞計算平均情緒
+        top_keywords = heapq.nlargest(10, keyword_stats.items(), key=lambda item: item[1][0])
+        return {
+            keyword: {
+                'count': count,
+                'sentiment': round(total / count, 3),
+                'type': sentiment_type
+            }
+            for keyword, (count, total, sentiment_type) in top_keywords
+        }
     
     def _generate_sentiment_report(self, sentiment_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """生成情緒分析報告"""
-        try:
-            report = {
-                'summary': '',
-                'highlights': [],
-                'risks': [],
-                'trend_analysis': ''
-            }
+        report = {
+            'summary': '',
+            'highlights': [],
+            'risks': [],
+            'trend_analysis': ''
+        }
+        
+        overall_sentiment = sentiment_analysis.get('overall_sentiment', 0)
+        confidence = sentiment_analysis.get('confidence_score', 0)
+        distribution = sentiment_analysis.get('sentiment_distribution', {})
+        
+        # 生成摘要
+        if overall_sentiment > 0.5:
+            sentiment_desc = '非常正面'
+        elif overall_sentiment > 0.2:
+            sentiment_desc = '偏正面'
+        elif overall_sentiment > -0.2:
+            sentiment_desc = '中性'
+        elif overall_sentiment > -0.5:
+            sentiment_desc = '偏負面'
+        else:
+            sentiment_desc = '非常負面'
             
-            overall_sentiment = sentiment_analysis.get('overall_sentiment', 0)
-            confidence = sentiment_analysis.get('confidence_score', 0)
-            distribution = sentiment_analysis.get('sentiment_distribution', {})
+        total_news = sum(distribution.values())
+        if total_news > 0:
+            positive_pct = distribution.get('positive', 0) / total_news * 100
+            negative_pct = distribution.get('negative', 0) / total_news * 100
             
-            # 生成摘要
-            if overall_sentiment > 0.5:
-                sentiment_desc = '非常正面'
-            elif overall_sentiment > 0.2:
-                sentiment_desc = '偏正面'
-            elif overall_sentiment > -0.2:
-                sentiment_desc = '中性'
-            elif overall_sentiment > -0.5:
-                sentiment_desc = '偏負面'
-            else:
-                sentiment_desc = '非常負面'
-                
-            total_news = sum(distribution.values())
-            if total_news > 0:
-                positive_pct = distribution.get('positive', 0) / total_news * 100
-                negative_pct = distribution.get('negative', 0) / total_news * 100
-                
-                report['summary'] = (
-                    f"市場情緒{sentiment_desc}（得分：{overall_sentiment:.2f}），"
-                    f"置信度：{confidence:.0%}。"
-                    f"正面新聞佔{positive_pct:.0f}%，負面新聞佔{negative_pct:.0f}%"
-                )
-            else:
-                report['summary'] = '暫無足夠新聞數據進行情緒分析'
-                
-            # 提取亮點和風險
-            keyword_sentiments = sentiment_analysis.get('keyword_sentiments', {})
-            for keyword, stats in keyword_sentiments.items():
-                if stats['type'] == '正面' and stats['sentiment'] > 0.3:
-                    report['highlights'].append(f"{keyword}（出現{stats['count']}次）")
-                elif stats['type'] == '負面' and stats['sentiment'] < -0.3:
-                    report['risks'].append(f"{keyword}（出現{stats['count']}次）")
-                    
-            # 趨勢分析
-            trend = sentiment_analysis.get('sentiment_trend', [])
-            if len(trend) >= 2:
-                recent_sentiment = trend[-1]['sentiment']
-                earlier_sentiment = trend[0]['sentiment']
+            report['summary'] = (
+                f"市場情緒{sentiment_desc}（得分：{overall_sentiment:.2f}），"
+                f"置信度：{confidence:.0%}。"
+                f"正面新聞佔{positive_pct:.0f}%，負面新聞佔{negative_pct:.0f}%"
+            )
+        else:
+            report['summary'] = '暫無足夠新聞數據進行情緒分析'
+            
+        # 提取亮點和風險
+        keyword_sentiments = sentiment_analysis.get('keyword_sentiments', {})
+        for keyword, stats in keyword_sentiments.items():
+            if stats['type'] == '正面' and stats['sentiment'] > 0.3:
+                report['highlights'].append(f"{keyword}（出現{stats['count']}次）")
+            elif stats['type'] == '負面' and stats['sentiment'] < -0.3:
+                report['risks'].append(f"{keyword}（出現{stats['count']}次）")
                 
-                if recent_sentiment > earlier_sentiment + 0.1:
-                    report['trend_analysis'] = '情緒趨勢向好，市場信心增強'
-                elif recent_sentiment < earlier_sentiment - 0.1:
-                    report['trend_analysis'] = '情緒趨勢轉弱，需關注風險'
-                else:
-                    report['trend_analysis'] = '情緒趨勢平穩'
+        # 趨勢分析
+        trend = sentiment_analysis.get('sentiment_trend', [])
+        if len(trend) >= 2:
+            recent_sentiment = trend[-1]['sentiment']
+            earlier_sentiment = trend[0]['sentiment']
+            
+            if recent_sentiment > earlier_sentiment + 0.1:
+                report['trend_analysis'] = '情緒趨勢向好，市場信心增強'
+            elif recent_sentiment < earlier_sentiment - 0.1:
+                report['trend_analysis'] = '情緒趨勢轉弱，需關注風險'
             else:
-                report['trend_analysis'] = '趨勢數據不足'
-                
-            return report
+                report['trend_analysis'] = '情緒趨勢平穩'
+        else:
+            report['trend_analysis'] = '趨勢數據不足'
             
-        except Exception as e:
-            self.logger.error(f"生成情緒報告失敗: {str(e)}")
-            return {'summary': '報告生成失敗', 'highlights': [], 'risks': []}
+        return report
     
     def _get_default_sentiment_analysis(self) -> Dict[str, Any]:
-        """獲取默認情緒分析結果"""
-        return {
-            'overall_sentiment': 0.0,
-            'confidence_score': 0.0,
-            'sentiment_distribution': {'positive': 0, 'neutral': 0, 'negative': 0},
-            'category_sentiments': {},
-            'sentiment_trend': [],
-            'keyword_sentiments': {},
-            'total_analyzed': 0,
-            'analysis_details': []
-        }
+        """獲取默認情緒分析結果（按模組級模板複製，可變成員每次新建）"""
+        analysis = dict(_DEFAULT_SENTIMENT_ANALYSIS)
+        analysis['sentiment_distribution'] = dict(_DEFAULT_DISTRIBUTION)
+        analysis['category_sentiments'] = {}
+        analysis['sentiment_trend'] = []
+        analysis['keyword_sentiments'] = {}
+        analysis['analysis_details'] = []
+        return analysis
     
     def _get_default_result(self) -> Dict[str, Any]:
         """獲取默認分析結果"""
+        report = dict(_DEFAULT_REPORT)
+        report['highlights'] = []
+        report['risks'] = []
         return {
             'analysis': self._get_default_sentiment_analysis(),
             'score': 50.0,
-            'report': {
-                'summary': '無新聞數據',
-                'highlights': [],
-                'risks': [],
-                'trend_analysis': '無趨勢數據'
-            },
+            'report': report,
             'status': 'no_data'
-        }
\ No newline at end of file
+        }
@@ -4,15 +4,182 @@
 提供股票技術指標計算和技術面評分功能
 """
 
+import copy
+import hashlib
 import math
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from types import MappingProxyType
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
 from ..utils.logger import get_logger
-from ..core.config import Config
+from ..core.config import ConfigManager as Config
+from ._kernels import (
+    NUMBA_AVAILABLE, ema, rolling_min_max, technical_indicators, technical_indicators_batch
+)
+
+try:
+    import bottleneck as bn
+except ImportError:  # pragma: no cover - 取決於運行環境
+    bn = None
 
 logger = get_logger(__name__)
 
+# 技術指標結果的緩存上限（按價格數據指紋去重，超出時淘汰最早寫入的條目）
+_INDICATOR_CACHE_SIZE = 128
+
+# 技術評分中各指標信號的加減分，未列出的信號不計分
+_MA_TREND_SCORES = MappingProxyType({'多頭排列': 20, '空頭排列': -20})
+_RSI_SIGNAL_SCORES = MappingProxyType({'超賣': 10, '超買': -5})
+_MACD_SIGNAL_SCORES = MappingProxyType({'金叉向上': 15, '死叉向下': -15})
+_BOLLINGER_SIGNAL_SCORES = MappingProxyType({'超賣區': 10, '超買區': -5})
+_VOLUME_STATUS_SCORES = MappingProxyType({'放量上漲': 10, '放量下跌': -10, '縮量調整': 5})
+_KDJ_SIGNAL_SCORES = MappingProxyType({'金叉': 5, '死叉': -5})
+
+# 指標數值的分檔：(下側斷點, 上側斷點, 各檔標籤)，下側斷點處歸入上一檔（x < t 的規則），
+# 上側斷點處歸入下一檔（x > t 的規則），標籤按數值從小到大排列
+_RSI_SIGNAL_LEVELS = ((30,), (70,), ('超賣', '中性', '超買'))
+_BOLLINGER_SIGNAL_LEVELS = ((0.1, 0.3), (0.7, 0.9), ('超賣區', '偏低', '中性', '偏高', '超買區'))
+_VOLUME_STATUS_LEVELS = ((0.5, 0.7), (1.5, 2.0), ('縮量調整', '成交清淡', '正常', '放量', '巨量'))
+_VOLATILITY_LEVELS = ((0.01, 0.02, 0.04, 0.06), (), ('極低', '低', '正常', '高', '極高'))
+
+
+@dataclass(frozen=True)
+class PriceArrays:
+    """參與指標計算的價格列，各列為等長的 float64 數組（列式存儲，計算路徑不經過 DataFrame）"""
+    close: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    volume: np.ndarray
+    # 漲跌幅（%），數據源未提供時由收盤價推算
+    change_pct: Optional[np.ndarray] = None
+    
+    @classmethod
+    def from_dataframe(cls, price_data: pd.DataFrame) -> 'PriceArrays':
+        """從 OHLCV DataFrame 一次性取出各列；已是 float64 的列不複製"""
+        change_pct = None
+        if 'change_pct' in price_data.columns:
+            # 與逐個值 _safe_float 一致：無法解析的漲跌幅視為缺失
+            change_pct = pd.to_numeric(price_data['change_pct'], errors='coerce').to_numpy(np.float64)
+        return cls(
+            close=price_data['close'].to_numpy(np.float64),
+            high=price_data['high'].to_numpy(np.float64),
+            low=price_data['low'].to_numpy(np.float64),
+            volume=price_data['volume'].to_numpy(np.float64),
+            change_pct=change_pct
+        )
+    
+    def __len__(self) -> int:
+        return len(self.close)
+    
+    @property
+    def empty(self) -> bool:
+        """與 DataFrame.empty 對應，便於兩種輸入共用判斷"""
+        return len(self.close) == 0
+
+
+def _price_fingerprint(prices: PriceArrays) -> bytes:
+    """價格數據的指紋：各列數值的 blake2b 摘要"""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in ('close', 'high', 'low', 'volume', 'change_pct'):
+        column = getattr(prices, name)
+        if column is not None:
+            digest.update(name.encode())
+            digest.update(column.tobytes())
+    return digest.digest()
+
+
+def _sma_last(x: np.ndarray, window: int) -> float:
+    """
+    最後 window 個數據的均值，對應 rolling(window, min_periods=1).mean() 的最新值
+
+    數據不足 window 時取已有數據的均值；與 pandas 一樣跳過缺失值，窗口內全為缺失值時為 NaN。
+    平盤時精確返回原值，避免舍入誤差影響均線排列判斷。
+    """
+    tail = x[-window:]
+    tail = tail[~np.isnan(tail)]
+    if not len(tail):
+        return np.nan
+    if tail.min() == tail.max():
+        return tail[-1]
+    return tail.mean()
+
+
+def _tail_mean_std(x: np.ndarray, window: int) -> Tuple[float, float]:
+    """
+    最後 window 個數據的均值與樣本標準差
+
+    與 pandas rolling(window, min_periods=1) 一樣跳過缺失值，自由度按有效數據個數計；
+    有效數據不足兩個時標準差為 NaN；平盤時精確返回原值與 0，避免舍入誤差產生虛假的帶寬。
+    """
+    tail = x[-window:]
+    tail = tail[~np.isnan(tail)]
+    if not len(tail):
+        return np.nan, np.nan
+    if tail.min() == tail.max():
+        return tail[-1], (0.0 if len(tail) > 1 else np.nan)
+
+    # 均值只算一次，離差直接點積得到平方和（np.std 會在內部再求一次均值）
+    mean = tail.mean()
+    deviation = tail - mean
+    return mean, math.sqrt(deviation @ deviation / (len(tail) - 1))
+
+
+def _ema(x: np.ndarray, com: float) -> np.ndarray:
+    """
+    adjust=False 的指數移動平均：有 numba 時走編譯遞推，否則交給 pandas ewm
+
+    以質心 com 指定平滑係數（alpha = 1 / (1 + com)），與 pandas 內部換算一致；
+    直接傳入 alpha 時 pandas 會先反算 com，結果可能有末位差異。
+    """
+    if NUMBA_AVAILABLE:
+        return ema(x, 1 / (1 + com))
+    return pd.Series(x).ewm(com=com, adjust=False).mean().to_numpy()
+
+
+def _rolling_min_max(low: np.ndarray, high: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    滑動最低價與最高價，對應 rolling(window, min_periods=1) 的 min()/max()（跳過缺失值）
+
+    有 numba 時走單調隊列內核，其次 bottleneck，否則交給 pandas。
+    """
+    if len(low) <= window:
+        # 不足一個窗口（新股等短序列）時滑動極值即累計極值
+        return np.fmin.accumulate(low), np.fmax.accumulate(high)
+    if NUMBA_AVAILABLE:
+        return rolling_min_max(low, high, window)
+    if bn is not None:
+        return bn.move_min(low, window, min_count=1), bn.move_max(high, window, min_count=1)
+    return (
+        pd.Series(low).rolling(window=window, min_periods=1).min().to_numpy(),
+        pd.Series(high).rolling(window=window, min_periods=1).max().to_numpy()
+    )
+
+
+def _finite(value: float, default: float = 0.0) -> float:
+    """
+    內部計算所得浮點數（float 或 NumPy 標量）的缺失處理：NaN 與無窮大返回默認值
+
+    輸入類型已確定，省去 _safe_float 的通用轉換；外部數據列仍經 _safe_float。
+    """
+    return float(value) if math.isfinite(value) else default
+
+
+def _level(value: float, lower: Tuple[float, ...], upper: Tuple[float, ...]) -> int:
+    """
+    數值所在的分檔下標：小於等於數值的下側斷點個數加上小於數值的上側斷點個數
+
+    與 if/elif 判斷鏈的邊界一致，兩次二分查找代替逐級比較。
+    """
+    return bisect_right(lower, value) + bisect_left(upper, value)
+
+
+def _rsi_value(avg_gain: float, avg_loss: float) -> float:
+    """由平均漲幅與平均跌幅計算 RSI"""
+    rs = avg_gain / (avg_loss if avg_loss != 0 else 1e-10)  # 避免除零
+    return 100 - (100 / (1 + rs))
+
 
 class TechnicalAnalyzer:
     """技術分析器"""
@@ -27,12 +194,15 @@ class TechnicalAnalyzer:
         self.config = config or Config()
         self.logger = logger
         
-    def analyze(self, price_data: pd.DataFrame) -> Dict[str, Any]:
+        # 技術指標緩存：{價格數據指紋: 指標字典}，同一份數據重複分析時不再重算
+        self._indicator_cache: Dict[bytes, Dict[str, Any]] = {}
+        
+    def analyze(self, price_data: Union[pd.DataFrame, PriceArrays]) -> Dict[str, Any]:
         """
         執行完整的技術分析
         
         Args:
-            price_data: 包含OHLCV數據的DataFrame
+            price_data: 包含OHLCV數據的DataFrame，或已取出的 PriceArrays
             
         Returns:
             包含技術指標和評分的字典
@@ -57,12 +227,12 @@ class TechnicalAnalyzer:
             self.logger.error(f"技術分析失敗: {str(e)}")
             return self._get_default_result()
     
-    def calculate_indicators(self, price_data: pd.DataFrame) -> Dict[str, Any]:
+    def calculate_indicators(self, price_data: Union[pd.DataFrame, PriceArrays]) -> Dict[str, Any]:
         """
         計算技術指標
         
         Args:
-            price_data: 價格數據
+            price_data: 價格數據（DataFrame 或 PriceArrays）
             
         Returns:
             技術指標字典
@@ -71,35 +241,133 @@ class TechnicalAnalyzer:
             if price_data.empty:
                 return self._get_default_indicators()
                 
-            indicators = {}
-            
-            # 移動平均線
-            indicators['ma'] = self._calculate_moving_averages(price_data)
-            
-            # RSI指標
-            indicators['rsi'] = self._calculate_rsi(price_data)
-            
-            # MACD指標
-            indicators['macd'] = self._calculate_macd(price_data)
-            
-            # 布林帶
-            indicators['bollinger'] = self._calculate_bollinger_bands(price_data)
-            
-            # 成交量分析
-            indicators['volume'] = self._analyze_volume(price_data)
-            
-            # KDJ指標
-            indicators['kdj'] = self._calculate_kdj(price_data)
-            
-            # 波動率
-            indicators['volatility'] = self._calculate_volatility(price_data)
-            
+            # DataFrame 只在入口處轉為列數組，後續計算不再經過 pandas
+            if not isinstance(price_data, PriceArrays):
+                price_data = PriceArrays.from_dataframe(price_data)
+                
+            # 相同數據直接返回緩存結果的副本
+            key = _price_fingerprint(price_data)
+            cache = self._indicator_cache
+            if key in cache:
+                return copy.deepcopy(cache[key])
+                
+            if NUMBA_AVAILABLE:
+                indicators = self._calculate_indicators_fused(price_data)
+            else:
+                indicators = {}
+                
+                # 移動平均線
+                indicators['ma'] = self._calculate_moving_averages(price_data)
+                
+                # RSI指標
+                indicators['rsi'] = self._calculate_rsi(price_data)
+                
+                # MACD指標
+                indicators['macd'] = self._calculate_macd(price_data)
+                
+                # 布林帶
+                indicators['bollinger'] = self._calculate_bollinger_bands(price_data)
+                
+                # 成交量分析
+                indicators['volume'] = self._analyze_volume(price_data)
+                
+                # KDJ指標
+                indicators['kdj'] = self._calculate_kdj(price_data)
+                
+                # 波動率
+                indicators['volatility'] = self._calculate_volatility(price_data)
+                
+            if len(cache) >= _INDICATOR_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            cache[key] = copy.deepcopy(indicators)
+                
             return indicators
             
         except Exception as e:
             self.logger.error(f"技術指標計算失敗: {str(e)}")
             return self._get_default_indicators()
     
+    def analyze_batch(self, closes: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+                      volumes: np.ndarray, change_pcts: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        批量技術分析多隻股票
+        
+        有 numba 時以並行內核同時計算所有股票的指標數值，否則逐隻調用 analyze。
+        適用於掃描大量股票、各股 K 線數量相同（如統一取最近 250 個交易日）的場景。
+        
+        Args:
+            closes, highs, lows, volumes: (股票數, K 線數) 的價格與成交量矩陣，每行一隻股票
+            change_pcts: 同形狀的漲跌幅矩陣（%），未提供時由收盤價推算
+            
+        Returns:
+            與輸入行順序一致的分析結果列表，每項與 analyze 的返回格式相同
+        """
+        try:
+            closes, highs, lows, volumes = (
+                np.asarray(matrix, dtype=np.float64) for matrix in (closes, highs, lows, volumes)
+            )
+            if change_pcts is not None:
+                change_pcts = np.asarray(change_pcts, dtype=np.float64)
+                
+            batch = [
+                PriceArrays(
+                    closes[s], highs[s], lows[s], volumes[s],
+                    change_pcts[s] if change_pcts is not None else None
+                )
+                for s in range(closes.shape[0])
+            ]
+            if not NUMBA_AVAILABLE or closes.shape[1] == 0:
+                return [self.analyze(prices) for prices in batch]
+                
+            values = technical_indicators_batch(closes, highs, lows, volumes)
+            results = []
+            for prices, row in zip(batch, values):
+                indicators = self._build_fused_indicators(row, prices)
+                results.append({
+                    'indicators': indicators,
+                    'score': self.calculate_score(indicators),
+                    'status': 'success'
+                })
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"批量技術分析失敗: {str(e)}")
+            return [self._get_default_result() for _ in range(len(closes))]
+    
+    def _calculate_indicators_fused(self, price_data: PriceArrays) -> Dict[str, Any]:
+        """
+        以編譯內核單次遍歷計算全部指標數值
+        
+        數值部分由內核一次返回，信號與趨勢判斷沿用各指標的結果構建方法，
+        與逐項 pandas 計算的結果一致。
+        """
+        values = technical_indicators(price_data.close, price_data.high, price_data.low, price_data.volume)
+        return self._build_fused_indicators(values, price_data)
+    
+    def _build_fused_indicators(self, values: Sequence[float], price_data: PriceArrays) -> Dict[str, Any]:
+        """由 technical_indicators 返回的數值構建各指標結果"""
+        (ma5, ma10, ma20, ma60, rsi, prev_rsi, macd, signal, hist, prev_hist,
+         bb_middle, bb_std, avg_volume, k, d, prev_k, prev_d,
+         current_vol, avg_vol, recent_vol, earlier_vol) = values
+        
+        close = price_data.close
+        volume = price_data.volume
+        n = len(close)
+        has_prev = n >= 2
+        price_change = self._calculate_price_change(price_data) if has_prev else 0
+        
+        return {
+            'ma': self._build_ma_result(close[-1], ma5, ma10, ma20, ma60),
+            'rsi': self._build_rsi_result(rsi, prev_rsi if has_prev else None),
+            'macd': self._build_macd_result(macd, signal, hist, prev_hist if has_prev else None),
+            'bollinger': self._build_bollinger_result(close[-1], bb_middle, bb_std),
+            'volume': self._build_volume_result(volume[-1], avg_volume, price_change),
+            'kdj': self._build_kdj_result(k, d, prev_k if has_prev else None, prev_d if has_prev else None),
+            'volatility': self._build_volatility_result(
+                n - 1, current_vol, avg_vol, recent_vol, earlier_vol
+            )
+        }
+    
     def calculate_score(self, indicators: Dict[str, Any]) -> float:
         """
         計算技術分析得分
@@ -114,55 +382,31 @@ class TechnicalAnalyzer:
             score = 50.0  # 基礎分數
             
             # 移動平均線趨勢評分
-            ma_trend = indicators.get('ma', {}).get('trend', '震盪整理')
-            if ma_trend == '多頭排列':
-                score += 20
-            elif ma_trend == '空頭排列':
-                score -= 20
-                
-            # RSI評分
+            score += _MA_TREND_SCORES.get(indicators.get('ma', {}).get('trend'), 0)
+            
+            # RSI評分：非超買超賣時，RSI 處於 40-60 加分
             rsi_value = indicators.get('rsi', {}).get('value', 50)
-            rsi_signal = indicators.get('rsi', {}).get('signal', '中性')
-            if rsi_signal == '超賣':
-                score += 10
-            elif rsi_signal == '超買':
-                score -= 5
-            elif 40 <= rsi_value <= 60:
-                score += 5
-                
+            rsi_score = _RSI_SIGNAL_SCORES.get(indicators.get('rsi', {}).get('signal'))
+            if rsi_score is None:
+                rsi_score = 5 if 40 <= rsi_value <= 60 else 0
+            score += rsi_score
+            
             # MACD評分
-            macd_signal = indicators.get('macd', {}).get('signal', '橫盤整理')
-            if macd_signal == '金叉向上':
-                score += 15
-            elif macd_signal == '死叉向下':
-                score -= 15
-                
-            # 布林帶評分
+            score += _MACD_SIGNAL_SCORES.get(indicators.get('macd', {}).get('signal'), 0)
+            
+            # 布林帶評分：非超買超賣區時，相對位置處於 0.3-0.7 加分
             bb_position = indicators.get('bollinger', {}).get('position', 0.5)
-            bb_signal = indicators.get('bollinger', {}).get('signal', '中性')
-            if bb_signal == '超賣區':
-                score += 10
-            elif bb_signal == '超買區':
-                score -= 5
-            elif 0.3 <= bb_position <= 0.7:
-                score += 5
-                
+            bb_score = _BOLLINGER_SIGNAL_SCORES.get(indicators.get('bollinger', {}).get('signal'))
+            if bb_score is None:
+                bb_score = 5 if 0.3 <= bb_position <= 0.7 else 0
+            score += bb_score
+            
             # 成交量評分
-            volume_status = indicators.get('volume', {}).get('status', '正常')
-            if volume_status == '放量上漲':
-                score += 10
-            elif volume_status == '放量下跌':
-                score -= 10
-            elif volume_status == '縮量調整':
-                score += 5
-                
+            score += _VOLUME_STATUS_SCORES.get(indicators.get('volume', {}).get('status'), 0)
+            
             # KDJ評分
-            kdj_signal = indicators.get('kdj', {}).get('signal', '中性')
-            if kdj_signal == '金叉':
-                score += 5
-            elif kdj_signal == '死叉':
-                score -= 5
-                
+            score += _KDJ_SIGNAL_SCORES.get(indicators.get('kdj', {}).get('signal'), 0)
+            
             # 波動率評分
             volatility = indicators.get('volatility', {}).get('current', 0.02)
             if volatility < 0.02:  # 低波動
@@ -170,227 +414,220 @@ class TechnicalAnalyzer:
             elif volatility > 0.05:  # 高波動
                 score -= 5
                 
-            # 確保分數在0-100範圍內
-            score = max(0, min(100, score))
-            
-            return round(score, 2)
+            # 確保分數在0-100範圍內；各項加減分均為整數，無需再 round
+            return max(0, min(100, score))
             
         except Exception as e:
             self.logger.error(f"技術評分計算失敗: {str(e)}")
             return 50.0
     
-    def _calculate_moving_averages(self, price_data: pd.DataFrame) -> Dict[str, Any]:
+    def _calculate_moving_averages(self, price_data: PriceArrays) -> Dict[str, Any]:
         """計算移動平均線"""
         try:
-            result = {}
-            
-            # 計算各期移動平均線
-            price_data['ma5'] = price_data['close'].rolling(window=5, min_periods=1).mean()
-            price_data['ma10'] = price_data['close'].rolling(window=10, min_periods=1).mean()
-            price_data['ma20'] = price_data['close'].rolling(window=20, min_periods=1).mean()
-            price_data['ma60'] = price_data['close'].rolling(window=60, min_periods=1).mean()
-            
-            # 獲取最新值
-            latest_price = self._safe_float(price_data['close'].iloc[-1])
-            ma5 = self._safe_float(price_data['ma5'].iloc[-1], latest_price)
-            ma10 = self._safe_float(price_data['ma10'].iloc[-1], latest_price)
-            ma20 = self._safe_float(price_data['ma20'].iloc[-1], latest_price)
-            ma60 = self._safe_float(price_data['ma60'].iloc[-1], latest_price)
-            
-            result['values'] = {
-                'current': latest_price,
-                'ma5': ma5,
-                'ma10': ma10,
-                'ma20': ma20,
-                'ma60': ma60
-            }
+            # 計算各期移動平均線（只需最新值，不寫回 price_data）
+            close = price_data.close
             
-            # 判斷趨勢
-            if latest_price > ma5 > ma10 > ma20:
-                result['trend'] = '多頭排列'
-            elif latest_price < ma5 < ma10 < ma20:
-                result['trend'] = '空頭排列'
-            else:
-                result['trend'] = '震盪整理'
-                
-            # 計算均線支撐/壓力
-            if latest_price > ma20:
-                result['support'] = ma20
-                result['resistance'] = None
-            else:
-                result['support'] = None
-                result['resistance'] = ma20
-                
-            return result
+            return self._build_ma_result(
+                close[-1],
+                _sma_last(close, 5),
+                _sma_last(close, 10),
+                _sma_last(close, 20),
+                _sma_last(close, 60)
+            )
             
         except Exception as e:
             self.logger.error(f"移動平均線計算失敗: {str(e)}")
             return {'trend': '計算失敗', 'values': {}}
     
-    def _calculate_rsi(self, price_data: pd.DataFrame, window: int = 14) -> Dict[str, Any]:
+    def _build_ma_result(self, latest: Any, ma5: Any, ma10: Any, ma20: Any, ma60: Any) -> Dict[str, Any]:
+        """由最新價與各期均線值判斷趨勢與支撐/壓力"""
+        result = {}
+        
+        # 獲取最新值
+        latest_price = _finite(latest)
+        ma5 = _finite(ma5, latest_price)
+        ma10 = _finite(ma10, latest_price)
+        ma20 = _finite(ma20, latest_price)
+        ma60 = _finite(ma60, latest_price)
+        
+        result['values'] = {
+            'current': latest_price,
+            'ma5': ma5,
+            'ma10': ma10,
+            'ma20': ma20,
+            'ma60': ma60
+        }
+        
+        # 判斷趨勢
+        if latest_price > ma5 > ma10 > ma20:
+            result['trend'] = '多頭排列'
+        elif latest_price < ma5 < ma10 < ma20:
+            result['trend'] = '空頭排列'
+        else:
+            result['trend'] = '震盪整理'
+            
+        # 計算均線支撐/壓力
+        if latest_price > ma20:
+            result['support'] = ma20
+            result['resistance'] = None
+        else:
+            result['support'] = None
+            result['resistance'] = ma20
+            
+        return result
+    
+    def _calculate_rsi(self, price_data: PriceArrays, window: int = 14) -> Dict[str, Any]:
         """計算RSI指標"""
         try:
-            result = {}
-            
-            # 計算價格變化
-            delta = price_data['close'].diff()
-            
-            # 計算漲跌幅
-            gain = delta.where(delta > 0, 0).rolling(window=window, min_periods=1).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=window, min_periods=1).mean()
-            
-            # 計算RS和RSI
-            rs = gain / loss.replace(0, 1e-10)  # 避免除零
-            rsi = 100 - (100 / (1 + rs))
-            
-            # 獲取最新RSI值
-            current_rsi = self._safe_float(rsi.iloc[-1], 50.0)
-            result['value'] = round(current_rsi, 2)
-            
-            # 判斷信號
-            if current_rsi > 70:
-                result['signal'] = '超買'
-            elif current_rsi < 30:
-                result['signal'] = '超賣'
-            else:
-                result['signal'] = '中性'
+            close = price_data.close
+            
+            # 最新與前一日的 RSI 只用到最後 window + 1 個價格變化
+            delta = np.diff(close[-(window + 2):])
+            if len(close) < window + 2:
+                delta = np.concatenate(([0.0], delta))  # 首根K線的變化記為 0
+            # 與 diff().where(..., 0) 一致：缺失價格前後的變化記為 0
+            delta[np.isnan(delta)] = 0.0
                 
-            # RSI趨勢
-            if len(rsi) >= 2:
-                prev_rsi = self._safe_float(rsi.iloc[-2], 50.0)
-                result['trend'] = '上升' if current_rsi > prev_rsi else '下降'
+            # 計算漲跌幅：無分支拆分，跌幅由 max(delta, 0) - delta 得到
+            gain = np.maximum(delta, 0.0)
+            loss = gain - delta
+            
+            current_rsi = _rsi_value(gain[-window:].mean(), loss[-window:].mean())
+            if len(close) >= 2:
+                prev_rsi = _rsi_value(gain[-window - 1:-1].mean(), loss[-window - 1:-1].mean())
             else:
-                result['trend'] = '未知'
-                
-            return result
+                prev_rsi = None
+            return self._build_rsi_result(current_rsi, prev_rsi)
             
         except Exception as e:
             self.logger.error(f"RSI計算失敗: {str(e)}")
             return {'value': 50.0, 'signal': '計算失敗'}
     
-    def _calculate_macd(self, price_data: pd.DataFrame) -> Dict[str, Any]:
+    def _build_rsi_result(self, current: Any, prev: Optional[Any]) -> Dict[str, Any]:
+        """由最新與前一日 RSI 判斷信號與趨勢，prev 為 None 表示數據不足"""
+        result = {}
+        
+        # 獲取最新RSI值
+        current_rsi = _finite(current, 50.0)
+        result['value'] = round(current_rsi, 2)
+        
+        # 判斷信號
+        lower, upper, labels = _RSI_SIGNAL_LEVELS
+        result['signal'] = labels[_level(current_rsi, lower, upper)]
+            
+        # RSI趨勢
+        if prev is not None:
+            prev_rsi = _finite(prev, 50.0)
+            result['trend'] = '上升' if current_rsi > prev_rsi else '下降'
+        else:
+            result['trend'] = '未知'
+            
+        return result
+    
+    def _calculate_macd(self, price_data: PriceArrays) -> Dict[str, Any]:
         """計算MACD指標"""
         try:
-            result = {}
+            close = price_data.close
             
-            # 計算指數移動平均線
-            ema12 = price_data['close'].ewm(span=12, min_periods=1, adjust=False).mean()
-            ema26 = price_data['close'].ewm(span=26, min_periods=1, adjust=False).mean()
+            # 計算指數移動平均線（span 換算為 com = (span - 1) / 2）
+            ema12 = _ema(close, (12 - 1) / 2)
+            ema26 = _ema(close, (26 - 1) / 2)
             
             # 計算MACD線和信號線
             macd_line = ema12 - ema26
-            signal_line = macd_line.ewm(span=9, min_periods=1, adjust=False).mean()
+            signal_line = _ema(macd_line, (9 - 1) / 2)
             histogram = macd_line - signal_line
             
-            # 獲取最新值
-            current_macd = self._safe_float(macd_line.iloc[-1])
-            current_signal = self._safe_float(signal_line.iloc[-1])
-            current_hist = self._safe_float(histogram.iloc[-1])
-            
-            result['values'] = {
-                'macd': round(current_macd, 4),
-                'signal': round(current_signal, 4),
-                'histogram': round(current_hist, 4)
-            }
-            
-            # 判斷信號
-            if len(histogram) >= 2:
-                prev_hist = self._safe_float(histogram.iloc[-2])
-                
-                if current_hist > 0 and prev_hist <= 0:
-                    result['signal'] = '金叉向上'
-                elif current_hist < 0 and prev_hist >= 0:
-                    result['signal'] = '死叉向下'
-                elif current_hist > prev_hist:
-                    result['signal'] = '向上發散'
-                elif current_hist < prev_hist:
-                    result['signal'] = '向下收斂'
-                else:
-                    result['signal'] = '橫盤整理'
-            else:
-                result['signal'] = '數據不足'
-                
-            return result
+            prev_hist = histogram[-2] if len(histogram) >= 2 else None
+            return self._build_macd_result(macd_line[-1], signal_line[-1], histogram[-1], prev_hist)
             
         except Exception as e:
             self.logger.error(f"MACD計算失敗: {str(e)}")
             return {'signal': '計算失敗', 'values': {}}
     
-    def _calculate_bollinger_bands(self, price_data: pd.DataFrame, window: int = 20) -> Dict[str, Any]:
+    def _build_macd_result(self, macd: Any, signal: Any, hist: Any, prev_hist: Optional[Any]) -> Dict[str, Any]:
+        """由 MACD 線、信號線與柱狀圖判斷交叉信號，prev_hist 為 None 表示數據不足"""
+        result = {}
+        
+        # 獲取最新值
+        current_macd = _finite(macd)
+        current_signal = _finite(signal)
+        current_hist = _finite(hist)
+        
+        result['values'] = {
+            'macd': round(current_macd, 4),
+            'signal': round(current_signal, 4),
+            'histogram': round(current_hist, 4)
+        }
+        
+        # 判斷信號
+        if prev_hist is not None:
+            prev_hist = _finite(prev_hist)
+            
+            if current_hist > 0 and prev_hist <= 0:
+                result['signal'] = '金叉向上'
+            elif current_hist < 0 and prev_hist >= 0:
+                result['signal'] = '死叉向下'
+            elif current_hist > prev_hist:
+                result['signal'] = '向上發散'
+            elif current_hist < prev_hist:
+                result['signal'] = '向下收斂'
+            else:
+                result['signal'] = '橫盤整理'
+        else:
+            result['signal'] = '數據不足'
+            
+        return result
+    
+    def _calculate_bollinger_bands(self, price_data: PriceArrays, window: int = 20) -> Dict[str, Any]:
         """計算布林帶"""
         try:
-            result = {}
-            
-            # 計算中軌（移動平均線）
-            bb_middle = price_data['close'].rolling(window=window, min_periods=1).mean()
+            close = price_data.close
             
-            # 計算標準差
-            bb_std = price_data['close'].rolling(window=window, min_periods=1).std()
+            # 中軌（移動平均線）與標準差只取最後一個窗口
+            bb_middle, bb_std = _tail_mean_std(close, window)
             
-            # 計算上下軌
-            bb_upper = bb_middle + 2 * bb_std
-            bb_lower = bb_middle - 2 * bb_std
+            return self._build_bollinger_result(close[-1], bb_middle, bb_std)
             
-            # 獲取最新值
-            latest_close = self._safe_float(price_data['close'].iloc[-1])
-            upper_val = self._safe_float(bb_upper.iloc[-1])
-            middle_val = self._safe_float(bb_middle.iloc[-1])
-            lower_val = self._safe_float(bb_lower.iloc[-1])
-            
-            result['values'] = {
+        except Exception as e:
+            self.logger.error(f"布林帶計算失敗: {str(e)}")
+            return {'position': 0.5, 'signal': '計算失敗', 'values': {}}
+    
+    def _build_bollinger_result(self, latest: Any, middle: Any, std: Any) -> Dict[str, Any]:
+        """由最新價與中軌、標準差計算上下軌、相對位置與帶寬"""
+        # 上下軌距中軌各 2 倍標準差，上下軌間距即 4 倍標準差
+        band = 2 * std
+        latest_close = _finite(latest)
+        upper_val = _finite(middle + band)
+        middle_val = _finite(middle)
+        lower_val = _finite(middle - band)
+        
+        # 標準差缺失（只有一個數據）時上下軌為 0，間距按 0 處理
+        width = 4 * _finite(std) if upper_val > lower_val else 0.0
+        
+        # 計算相對位置（0-1）
+        position = round(max(0, min(1, (latest_close - lower_val) / width)), 3) if width > 0 else 0.5
+        lower, upper, labels = _BOLLINGER_SIGNAL_LEVELS
+        
+        return {
+            'values': {
                 'upper': round(upper_val, 2),
                 'middle': round(middle_val, 2),
                 'lower': round(lower_val, 2),
                 'current': latest_close
-            }
-            
-            # 計算相對位置（0-1）
-            if upper_val > lower_val:
-                position = (latest_close - lower_val) / (upper_val - lower_val)
-                result['position'] = round(max(0, min(1, position)), 3)
-            else:
-                result['position'] = 0.5
-                
-            # 判斷信號
-            if result['position'] > 0.9:
-                result['signal'] = '超買區'
-            elif result['position'] < 0.1:
-                result['signal'] = '超賣區'
-            elif result['position'] > 0.7:
-                result['signal'] = '偏高'
-            elif result['position'] < 0.3:
-                result['signal'] = '偏低'
-            else:
-                result['signal'] = '中性'
-                
+            },
+            'position': position,
+            'signal': labels[_level(position, lower, upper)],
             # 帶寬指標
-            bandwidth = (upper_val - lower_val) / middle_val if middle_val > 0 else 0
-            result['bandwidth'] = round(bandwidth, 4)
-            
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"布林帶計算失敗: {str(e)}")
-            return {'position': 0.5, 'signal': '計算失敗', 'values': {}}
+            'bandwidth': round(width / middle_val if middle_val > 0 else 0, 4)
+        }
     
-    def _analyze_volume(self, price_data: pd.DataFrame) -> Dict[str, Any]:
+    def _analyze_volume(self, price_data: PriceArrays) -> Dict[str, Any]:
         """分析成交量"""
         try:
-            result = {}
-            
-            # 計算平均成交量
-            volume_window = min(20, len(price_data))
-            avg_volume = price_data['volume'].rolling(window=volume_window, min_periods=1).mean()
-            
-            # 獲取最新成交量
-            recent_volume = self._safe_float(price_data['volume'].iloc[-1])
-            avg_volume_val = self._safe_float(avg_volume.iloc[-1], recent_volume)
-            
-            result['values'] = {
-                'current': recent_volume,
-                'average': avg_volume_val,
-                'ratio': round(recent_volume / avg_volume_val, 2) if avg_volume_val > 0 else 1.0
-            }
+            # 計算最近 20 日平均成交量
+            volume = price_data.volume
+            avg_volume = _sma_last(volume, 20)
             
             # 計算價格變化
             if len(price_data) >= 2:
@@ -398,160 +635,198 @@ class TechnicalAnalyzer:
             else:
                 price_change = 0
                 
-            # 判斷成交量狀態
-            volume_ratio = result['values']['ratio']
-            
-            if volume_ratio > 2.0:
-                result['status'] = '巨量' + ('上漲' if price_change > 0 else '下跌')
-            elif volume_ratio > 1.5:
-                result['status'] = '放量' + ('上漲' if price_change > 0 else '下跌')
-            elif volume_ratio < 0.5:
-                result['status'] = '縮量調整'
-            elif volume_ratio < 0.7:
-                result['status'] = '成交清淡'
-            else:
-                result['status'] = '正常'
-                
-            # 量價關係
-            if price_change > 1 and volume_ratio > 1.2:
-                result['relationship'] = '量價齊升'
-            elif price_change < -1 and volume_ratio > 1.2:
-                result['relationship'] = '放量下跌'
-            elif abs(price_change) < 0.5 and volume_ratio < 0.7:
-                result['relationship'] = '縮量橫盤'
-            else:
-                result['relationship'] = '正常'
-                
-            return result
+            return self._build_volume_result(volume[-1], avg_volume, price_change)
             
         except Exception as e:
             self.logger.error(f"成交量分析失敗: {str(e)}")
             return {'status': '數據不足', 'values': {}}
     
-    def _calculate_kdj(self, price_data: pd.DataFrame, window: int = 9) -> Dict[str, Any]:
+    def _build_volume_result(self, recent: Any, average: Any, price_change: float) -> Dict[str, Any]:
+        """由最新成交量、均量與價格變化判斷量能狀態與量價關係"""
+        result = {}
+        
+        # 獲取最新成交量
+        recent_volume = _finite(recent)
+        avg_volume_val = _finite(average, recent_volume)
+        
+        result['values'] = {
+            'current': recent_volume,
+            'average': avg_volume_val,
+            'ratio': round(recent_volume / avg_volume_val, 2) if avg_volume_val > 0 else 1.0
+        }
+        
+        # 判斷成交量狀態
+        volume_ratio = result['values']['ratio']
+        
+        lower, upper, labels = _VOLUME_STATUS_LEVELS
+        level = _level(volume_ratio, lower, upper)
+        result['status'] = labels[level]
+        if level > len(lower):
+            # 放量、巨量時標明漲跌方向
+            result['status'] += '上漲' if price_change > 0 else '下跌'
+            
+        # 量價關係
+        if price_change > 1 and volume_ratio > 1.2:
+            result['relationship'] = '量價齊升'
+        elif price_change < -1 and volume_ratio > 1.2:
+            result['relationship'] = '放量下跌'
+        elif abs(price_change) < 0.5 and volume_ratio < 0.7:
+            result['relationship'] = '縮量橫盤'
+        else:
+            result['relationship'] = '正常'
+            
+        return result
+    
+    def _calculate_kdj(self, price_data: PriceArrays, window: int = 9) -> Dict[str, Any]:
         """計算KDJ指標"""
         try:
-            result = {}
-            
             # 計算RSV
-            low_min = price_data['low'].rolling(window=window, min_periods=1).min()
-            high_max = price_data['high'].rolling(window=window, min_periods=1).max()
-            
-            rsv = 100 * (price_data['close'] - low_min) / (high_max - low_min)
-            rsv = rsv.fillna(50)
-            
-            # 計算K、D、J值
-            k = rsv.ewm(com=2, min_periods=1, adjust=False).mean()
-            d = k.ewm(com=2, min_periods=1, adjust=False).mean()
-            j = 3 * k - 2 * d
-            
-            # 獲取最新值
-            k_val = self._safe_float(k.iloc[-1], 50)
-            d_val = self._safe_float(d.iloc[-1], 50)
-            j_val = self._safe_float(j.iloc[-1], 50)
-            
-            result['values'] = {
-                'k': round(k_val, 2),
-                'd': round(d_val, 2),
-                'j': round(j_val, 2)
-            }
+            low_min, high_max = _rolling_min_max(price_data.low, price_data.high, window)
+            close = price_data.close
             
-            # 判斷信號
-            if k_val > d_val and len(k) >= 2:
-                prev_k = self._safe_float(k.iloc[-2], 50)
-                prev_d = self._safe_float(d.iloc[-2], 50)
-                if prev_k <= prev_d:
-                    result['signal'] = '金叉'
-                else:
-                    result['signal'] = '多頭'
-            elif k_val < d_val and len(k) >= 2:
-                prev_k = self._safe_float(k.iloc[-2], 50)
-                prev_d = self._safe_float(d.iloc[-2], 50)
-                if prev_k >= prev_d:
-                    result['signal'] = '死叉'
-                else:
-                    result['signal'] = '空頭'
-            else:
-                result['signal'] = '中性'
-                
-            # 超買超賣判斷
-            if k_val > 80 and d_val > 80:
-                result['condition'] = '超買'
-            elif k_val < 20 and d_val < 20:
-                result['condition'] = '超賣'
-            else:
-                result['condition'] = '正常'
-                
-            return result
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsv = 100 * (close - low_min) / (high_max - low_min)
+            rsv[np.isnan(rsv)] = 50
+            
+            # 計算K、D值
+            k = _ema(rsv, 2)
+            d = _ema(k, 2)
+            
+            if len(k) >= 2:
+                return self._build_kdj_result(k[-1], d[-1], k[-2], d[-2])
+            return self._build_kdj_result(k[-1], d[-1], None, None)
             
         except Exception as e:
             self.logger.error(f"KDJ計算失敗: {str(e)}")
             return {'signal': '計算失敗', 'values': {}}
     
-    def _calculate_volatility(self, price_data: pd.DataFrame, window: int = 20) -> Dict[str, Any]:
+    def _build_kdj_result(self, k: Any, d: Any, prev_k: Optional[Any], prev_d: Optional[Any]) -> Dict[str, Any]:
+        """由最新與前一日 K、D 值判斷交叉信號與超買超賣，前值為 None 表示數據不足"""
+        result = {}
+        
+        # 計算J值並獲取最新值
+        j = 3 * k - 2 * d
+        k_val = _finite(k, 50)
+        d_val = _finite(d, 50)
+        j_val = _finite(j, 50)
+        
+        result['values'] = {
+            'k': round(k_val, 2),
+            'd': round(d_val, 2),
+            'j': round(j_val, 2)
+        }
+        
+        # 判斷信號
+        if k_val > d_val and prev_k is not None:
+            if _finite(prev_k, 50) <= _finite(prev_d, 50):
+                result['signal'] = '金叉'
+            else:
+                result['signal'] = '多頭'
+        elif k_val < d_val and prev_k is not None:
+            if _finite(prev_k, 50) >= _finite(prev_d, 50):
+                result['signal'] = '死叉'
+            else:
+                result['signal'] = '空頭'
+        else:
+            result['signal'] = '中性'
+            
+        # 超買超賣判斷
+        if k_val > 80 and d_val > 80:
+            result['condition'] = '超買'
+        elif k_val < 20 and d_val < 20:
+            result['condition'] = '超賣'
+        else:
+            result['condition'] = '正常'
+            
+        return result
+    
+    def _calculate_volatility(self, price_data: PriceArrays, window: int = 20) -> Dict[str, Any]:
         """計算波動率"""
         try:
-            result = {}
-            
-            # 計算日收益率
-            returns = price_data['close'].pct_change().dropna()
+            # 計算日收益率（與 pct_change().dropna() 逐位相同）
+            close = price_data.close
+            returns = close[1:] / close[:-1] - 1
+            returns = returns[~np.isnan(returns)]
             
             if len(returns) < 2:
-                return {'current': 0.02, 'level': '正常'}
+                return self._build_volatility_result(len(returns), None, None, None, None)
                 
-            # 計算標準差（波動率）
-            volatility = returns.rolling(window=min(window, len(returns)), min_periods=1).std()
-            current_vol = self._safe_float(volatility.iloc[-1], 0.02)
-            
-            # 計算平均波動率
-            avg_vol = self._safe_float(volatility.mean(), current_vol)
-            
-            result['values'] = {
-                'current': round(current_vol, 4),
-                'average': round(avg_vol, 4),
-                'ratio': round(current_vol / avg_vol, 2) if avg_vol > 0 else 1.0
-            }
-            
-            # 判斷波動水平
-            if current_vol < 0.01:
-                result['level'] = '極低'
-            elif current_vol < 0.02:
-                result['level'] = '低'
-            elif current_vol < 0.04:
-                result['level'] = '正常'
-            elif current_vol < 0.06:
-                result['level'] = '高'
-            else:
-                result['level'] = '極高'
-                
-            # 波動趨勢
-            if len(volatility) >= 5:
-                recent_vol = volatility.iloc[-5:].mean()
-                earlier_vol = volatility.iloc[-10:-5].mean() if len(volatility) >= 10 else avg_vol
-                
-                if recent_vol > earlier_vol * 1.2:
-                    result['trend'] = '上升'
-                elif recent_vol < earlier_vol * 0.8:
-                    result['trend'] = '下降'
-                else:
-                    result['trend'] = '穩定'
+            # 計算標準差（波動率），首個窗口只有一個數據，標準差為 NaN
+            volatility = pd.Series(returns).rolling(
+                window=min(window, len(returns)), min_periods=1
+            ).std().to_numpy()
+            
+            # 均值需要完整序列；近 5 日與此前 5 日的均值合併為一次按行歸約
+            if len(volatility) >= 10:
+                earlier_vol, recent_vol = np.nanmean(volatility[-10:].reshape(2, 5), axis=1)
             else:
-                result['trend'] = '未知'
+                earlier_vol, recent_vol = None, np.nanmean(volatility[-5:])
                 
-            return result
+            return self._build_volatility_result(
+                len(volatility), volatility[-1], np.nanmean(volatility), recent_vol, earlier_vol
+            )
             
         except Exception as e:
             self.logger.error(f"波動率計算失敗: {str(e)}")
             return {'current': 0.02, 'level': '計算失敗'}
     
-    def _calculate_price_change(self, price_data: pd.DataFrame) -> float:
+    def _build_volatility_result(self, count: int, current: Any, average: Any,
+                                 recent: Any, earlier: Any) -> Dict[str, Any]:
+        """
+        由收益率滑動標準差的匯總值判斷波動水平與趨勢
+        
+        Args:
+            count: 收益率個數
+            current: 最新波動率
+            average: 波動率均值
+            recent: 最近 5 個波動率的均值
+            earlier: 此前 5 個波動率的均值（count < 10 時不使用）
+        """
+        if count < 2:
+            return {'current': 0.02, 'level': '正常'}
+            
+        result = {}
+        
+        current_vol = _finite(current, 0.02)
+        
+        # 計算平均波動率
+        avg_vol = _finite(average, current_vol)
+        
+        result['values'] = {
+            'current': round(current_vol, 4),
+            'average': round(avg_vol, 4),
+            'ratio': round(current_vol / avg_vol, 2) if avg_vol > 0 else 1.0
+        }
+        
+        # 判斷波動水平
+        lower, upper, labels = _VOLATILITY_LEVELS
+        result['level'] = labels[_level(current_vol, lower, upper)]
+            
+        # 波動趨勢
+        if count >= 5:
+            recent_vol = recent
+            earlier_vol = earlier if count >= 10 else avg_vol
+            
+            if recent_vol > earlier_vol * 1.2:
+                result['trend'] = '上升'
+            elif recent_vol < earlier_vol * 0.8:
+                result['trend'] = '下降'
+            else:
+                result['trend'] = '穩定'
+        else:
+            result['trend'] = '未知'
+            
+        return result
+    
+    def _calculate_price_change(self, price_data: PriceArrays) -> float:
         """計算價格變化百分比"""
         try:
-            if 'change_pct' in price_data.columns:
-                return self._safe_float(price_data['change_pct'].iloc[-1])
+            if price_data.change_pct is not None:
+                return self._safe_float(price_data.change_pct[-1])
             elif len(price_data) >= 2:
-                current_price = self._safe_float(price_data['close'].iloc[-1])
-                prev_price = self._safe_float(price_data['close'].iloc[-2])
+                close = price_data.close
+                current_price = _finite(close[-1])
+                prev_price = _finite(close[-2])
                 if prev_price > 0:
                     return ((current_price - prev_price) / prev_price) * 100
             return 0
@@ -559,16 +834,13 @@ class TechnicalAnalyzer:
             return 0
     
     def _safe_float(self, value: Any, default: float = 0.0) -> float:
-        """安全的浮點數轉換"""
+        """安全的浮點數轉換，缺失、NaN 與無窮大返回默認值"""
         try:
-            if pd.isna(value):
-                return default
             num_value = float(value)
-            if math.isnan(num_value) or math.isinf(num_value):
-                return default
-            return num_value
-        except (ValueError, TypeError):
+        except (ValueError, TypeError, OverflowError):
             return default
+        # None/pd.NA/NaT 在 float() 處已拋出 TypeError，這裡只需排除 NaN 與無窮大
+        return num_value if math.isfinite(num_value) else default
     
     def _get_default_indicators(self) -> Dict[str, Any]:
         """獲取默認技術指標"""
@@ -8,21 +8,112 @@
 - 批量操作
 """
 
+import functools
 import json
+import math
+import mmap
 import pickle
 import os
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, Tuple, List, Union
+import struct
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple, List, Union
 from abc import ABC, abstractmethod
 import threading
 import hashlib
+from collections import OrderedDict, defaultdict
+from itertools import islice
 from pathlib import Path
 from ..utils.logger import get_logger
 from .config import ConfigManager as Config
 from .constants import CACHE_DURATION, CACHE_TYPE
 
+try:
+    import lz4.frame
+except ImportError:  # pragma: no cover - 取決於運行環境
+    lz4 = None
+
 logger = get_logger(__name__)
 
+# 字典查找未命中的哨兵值（緩存值本身可能是 None）
+_MISSING = object()
+
+# 內存緩存的默認分片數（2 的冪，按鍵的哈希取低位選擇分片）
+_MEMORY_CACHE_SHARDS = 16
+
+# 內存緩存的默認條目上限，超出時按最久未使用淘汰
+_MEMORY_CACHE_MAX_ENTRIES = 10000
+
+# 每個分片的最小容量：上限較小時減少分片數，避免鍵分佈不均的分片遠未達總上限就開始淘汰
+_MEMORY_SHARD_MIN_ENTRIES = 64
+
+# 內存分片的計數器存放在列表中，按下標自增（比按字串鍵更新字典快約一倍），查詢統計時再組裝為字典
+_STAT_NAMES = ('hits', 'misses', 'sets', 'deletes', 'evictions')
+_HITS, _MISSES, _SETS, _DELETES, _EVICTIONS = range(len(_STAT_NAMES))
+
+# 分片每寫入這麼多次，抽查最久未使用端的若干條目並刪除已過期的（攤銷的主動過期）
+_EXPIRE_CHECK_INTERVAL = 64
+_EXPIRE_CHECK_SIZE = 20
+
+
+# 緩存文件不小於此大小時以內存映射讀取（小文件的映射開銷高於直接讀取）
+_MMAP_THRESHOLD = 10 * 1024 * 1024
+
+# 文件後端前置內存緩存（L1）的默認條目上限
+_L1_CACHE_MAX_ENTRIES = 1024
+
+# 單個緩存類型登記的鍵超過此數時，剔除後端中已不存在（過期或被淘汰）的鍵，之後門檻隨存活數翻倍
+_TRACKED_KEYS_CHECK_SIZE = 1024
+
+
+# 緩存文件頭：格式標記、壓縮編碼與到期時刻（Unix 時間戳，math.inf 表示永不過期），其後是值的 pickle；
+# 只讀文件頭即可判斷是否過期，無需反序列化整個值
+_FILE_HEADER = struct.Struct('<3sBd')
+_FILE_MAGIC = b'SSC'
+
+# 壓縮編碼名稱與寫入文件頭的編號；值的 pickle 小於 _COMPRESS_MIN_SIZE 時不壓縮（收益抵不過開銷）
+_CODEC_IDS = {'none': 0, 'zlib': 1, 'lz4': 2}
+_COMPRESS_MIN_SIZE = 4096
+
+# 編號 -> (壓縮, 解壓)；lz4 可選，未安裝時讀不了 lz4 壓縮的文件，按未命中處理
+_CODECS: Dict[int, Tuple[Callable[[bytes], bytes], Callable[[Any], bytes]]] = {
+    _CODEC_IDS['zlib']: (functools.partial(zlib.compress, level=1), zlib.decompress)
+}
+if lz4 is not None:
+    _CODECS[_CODEC_IDS['lz4']] = (lz4.frame.compress, lz4.frame.decompress)
+
+
+def _read_header(header: bytes) -> Tuple[int, float]:
+    """解析緩存文件頭，返回壓縮編碼與到期時刻；格式或編碼無法識別（舊版或損壞的文件）時拋出 ValueError"""
+    if len(header) != _FILE_HEADER.size:
+        raise ValueError("緩存文件頭不完整")
+    magic, codec, expire_at = _FILE_HEADER.unpack(header)
+    if magic != _FILE_MAGIC:
+        raise ValueError("緩存文件格式不符")
+    if codec and codec not in _CODECS:
+        raise ValueError(f"不支持的壓縮編碼: {codec}")
+    return codec, expire_at
+
+
+def _load_cache_value(f, size: int, codec: int) -> Any:
+    """反序列化文件頭之後的緩存值，大文件經內存映射直接交給解壓或 pickle，省去讀入緩衝區的複製"""
+    decompress = _CODECS[codec][1] if codec else None
+    if size < _MMAP_THRESHOLD:
+        return pickle.loads(decompress(f.read())) if decompress else pickle.load(f)
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            memoryview(mm) as view, view[_FILE_HEADER.size:] as payload:
+        return pickle.loads(decompress(payload) if decompress else payload)
+
+
+@functools.lru_cache(maxsize=4096)
+def _key_digest(key: str) -> str:
+    """
+    緩存鍵的十六進制摘要，用作緩存文件名
+
+    只需安全的定長文件名而非密碼學強度，blake2b 比 md5 快；熱點鍵的摘要直接取自 LRU 記憶。
+    """
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
 
 class CacheBackend(ABC):
     """緩存後端抽象基類"""
@@ -56,110 +147,279 @@ class CacheBackend(ABC):
     def get_stats(self) -> Dict:
         """獲取緩存統計信息"""
         pass
+        
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """批量獲取緩存值，返回與 keys 等長的列表，未命中為 None（默認逐個 get，後端可覆蓋）"""
+        return [self.get(key) for key in keys]
+        
+    def mset(self, items: Dict[str, Any], ttl: Optional[int] = None):
+        """批量設置緩存值（默認逐個 set，後端可覆蓋）"""
+        for key, value in items.items():
+            self.set(key, value, ttl)
+            
+    def delete_many(self, keys: List[str]) -> int:
+        """批量刪除緩存值，返回實際刪除的數量（默認逐個 delete，後端可覆蓋）"""
+        return sum(self.delete(key) for key in keys)
+        
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        """
+        獲取緩存值及其剩餘存活秒數
+        
+        剩餘秒數為 math.inf 表示永不過期，為 None 表示後端無法提供（默認實現）。
+        """
+        return self.get(key), None
+
+
+class _MemoryShard:
+    """內存緩存的一個分片：各自的數據、鎖、計數器與容量"""
+    
+    __slots__ = ('cache', 'lock', 'counts', 'capacity', 'writes')
+    
+    def __init__(self, capacity: int):
+        # 值與到期時刻（time.monotonic() 時間軸，math.inf 表示永不過期），不受系統時鐘調整影響；
+        # 按使用先後排列，末端為最近使用
+        self.cache: 'OrderedDict[str, Tuple[Any, float]]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.counts = [0] * len(_STAT_NAMES)
+        self.capacity = capacity
+        self.writes = 0
+        
+    def put(self, key: str, entry: Tuple[Any, float], now: float):
+        """寫入條目並標記為最近使用，超出容量時淘汰最久未使用的條目（調用方須持有鎖）"""
+        cache = self.cache
+        if key in cache:
+            cache.move_to_end(key)
+        elif len(cache) >= self.capacity:
+            cache.popitem(last=False)
+            self.counts[_EVICTIONS] += 1
+        cache[key] = entry
+        
+        self.writes += 1
+        if self.writes % _EXPIRE_CHECK_INTERVAL == 0:
+            self.expire_oldest(now)
+            
+    def expire_oldest(self, now: float):
+        """抽查最久未使用端的若干條目，刪除其中已過期的，避免過期條目一直佔用內存（調用方須持有鎖）"""
+        expired_keys = [
+            key for key, (_, expire_at) in islice(self.cache.items(), _EXPIRE_CHECK_SIZE)
+            if now >= expire_at
+        ]
+        for key in expired_keys:
+            del self.cache[key]
 
 
 class MemoryCacheBackend(CacheBackend):
-    """內存緩存後端"""
+    """
+    內存緩存後端，按鍵的哈希分片加鎖，不同分片上的操作互不阻塞
     
-    def __init__(self):
-        self._cache: Dict[str, Tuple[Any, Optional[datetime]]] = {}
-        self._lock = threading.RLock()
-        self._stats = {
-            'hits': 0,
-            'misses': 0,
-            'sets': 0,
-            'deletes': 0
-        }
+    條目數有上限，各分片平分容量並各自按最久未使用（LRU）淘汰。
+    上限較小時自動減少分片數，使每個分片至少容納 _MEMORY_SHARD_MIN_ENTRIES 條
+    （上限不足此數時只用一個分片），淘汰行為接近按總上限的單個 LRU。
+    """
+    
+    def __init__(self, shards: int = _MEMORY_CACHE_SHARDS, max_entries: int = _MEMORY_CACHE_MAX_ENTRIES):
+        """
+        初始化內存緩存
+        
+        Args:
+            shards: 分片數上限，須為 2 的冪；條目上限較小時實際分片數會減半直至每片容量足夠
+            max_entries: 條目上限，按實際分片數向上取整平分
+        """
+        if shards <= 0 or shards & (shards - 1):
+            raise ValueError(f"分片數必須是 2 的冪: {shards}")
+        if max_entries <= 0:
+            raise ValueError(f"條目上限必須為正數: {max_entries}")
+        while shards > 1 and max_entries < shards * _MEMORY_SHARD_MIN_ENTRIES:
+            shards //= 2
+        self._mask = shards - 1
+        capacity = -(-max_entries // shards)
+        self._shards = [_MemoryShard(capacity) for _ in range(shards)]
+        
+    def _shard(self, key: str) -> _MemoryShard:
+        """鍵所在的分片"""
+        return self._shards[hash(key) & self._mask]
         
     def get(self, key: str) -> Optional[Any]:
         """獲取緩存值"""
-        with self._lock:
-            if key in self._cache:
-                value, expire_time = self._cache[key]
+        shard = self._shard(key)
+        now = time.monotonic()
+        with shard.lock:
+            entry = shard.cache.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expire_at = entry
                 
                 # 檢查是否過期
-                if expire_time is None or datetime.now() < expire_time:
-                    self._stats['hits'] += 1
+                if now < expire_at:
+                    shard.cache.move_to_end(key)
+                    shard.counts[_HITS] += 1
                     return value
                 else:
                     # 過期則刪除
-                    del self._cache[key]
+                    del shard.cache[key]
                     
-            self._stats['misses'] += 1
+            shard.counts[_MISSES] += 1
             return None
             
     def set(self, key: str, value: Any, ttl: Optional[int] = None):
         """設置緩存值"""
-        with self._lock:
-            expire_time = None
-            if ttl is not None:
-                expire_time = datetime.now() + timedelta(seconds=ttl)
-                
-            self._cache[key] = (value, expire_time)
-            self._stats['sets'] += 1
+        shard = self._shard(key)
+        now = time.monotonic()
+        expire_at = now + ttl if ttl is not None else math.inf
+        with shard.lock:
+            shard.put(key, (value, expire_at), now)
+            shard.counts[_SETS] += 1
             
     def delete(self, key: str) -> bool:
         """刪除緩存值"""
-        with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-                self._stats['deletes'] += 1
+        shard = self._shard(key)
+        with shard.lock:
+            if shard.cache.pop(key, _MISSING) is not _MISSING:
+                shard.counts[_DELETES] += 1
                 return True
             return False
             
     def exists(self, key: str) -> bool:
         """檢查緩存是否存在"""
-        with self._lock:
-            if key in self._cache:
-                _, expire_time = self._cache[key]
-                if expire_time is None or datetime.now() < expire_time:
+        shard = self._shard(key)
+        now = time.monotonic()
+        with shard.lock:
+            entry = shard.cache.get(key, _MISSING)
+            if entry is not _MISSING:
+                if now < entry[1]:
                     return True
                 else:
                     # 過期則刪除
-                    del self._cache[key]
+                    del shard.cache[key]
             return False
             
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """批量獲取緩存值：按分片分組，每個分片只加一次鎖"""
+        now = time.monotonic()
+        results: List[Optional[Any]] = [None] * len(keys)
+        for index, positions in self._group_by_shard(keys).items():
+            shard = self._shards[index]
+            hits = 0
+            with shard.lock:
+                cache = shard.cache
+                for pos in positions:
+                    key = keys[pos]
+                    entry = cache.get(key, _MISSING)
+                    if entry is _MISSING:
+                        continue
+                    if now < entry[1]:
+                        cache.move_to_end(key)
+                        results[pos] = entry[0]
+                        hits += 1
+                    else:
+                        # 過期則刪除
+                        del cache[key]
+                shard.counts[_HITS] += hits
+                shard.counts[_MISSES] += len(positions) - hits
+        return results
+        
+    def mset(self, items: Dict[str, Any], ttl: Optional[int] = None):
+        """批量設置緩存值：按分片分組，每個分片只加一次鎖"""
+        now = time.monotonic()
+        expire_at = now + ttl if ttl is not None else math.inf
+        keys = list(items)
+        for index, positions in self._group_by_shard(keys).items():
+            shard = self._shards[index]
+            with shard.lock:
+                for pos in positions:
+                    key = keys[pos]
+                    shard.put(key, (items[key], expire_at), now)
+                shard.counts[_SETS] += len(positions)
+                
+    def delete_many(self, keys: List[str]) -> int:
+        """批量刪除緩存值：按分片分組，每個分片只加一次鎖"""
+        keys = list(keys)
+        deleted = 0
+        for index, positions in self._group_by_shard(keys).items():
+            shard = self._shards[index]
+            with shard.lock:
+                cache = shard.cache
+                count = sum(cache.pop(keys[pos], _MISSING) is not _MISSING for pos in positions)
+                shard.counts[_DELETES] += count
+            deleted += count
+        return deleted
+        
+    def _group_by_shard(self, keys: List[str]) -> Dict[int, List[int]]:
+        """按所在分片對鍵的下標分組"""
+        groups: Dict[int, List[int]] = {}
+        mask = self._mask
+        for pos, key in enumerate(keys):
+            groups.setdefault(hash(key) & mask, []).append(pos)
+        return groups
+        
     def clear(self):
-        """清空所有緩存"""
-        with self._lock:
-            self._cache.clear()
-            
+        """清空所有緩存（逐個分片加鎖）"""
+        for shard in self._shards:
+            with shard.lock:
+                shard.cache.clear()
+                
     def get_stats(self) -> Dict:
-        """獲取緩存統計信息"""
-        with self._lock:
-            total_requests = self._stats['hits'] + self._stats['misses']
-            hit_rate = self._stats['hits'] / total_requests if total_requests > 0 else 0
-            
-            return {
-                **self._stats,
-                'total_keys': len(self._cache),
-                'hit_rate': hit_rate
-            }
-            
+        """獲取緩存統計信息（各分片計數之和）"""
+        totals = [0] * len(_STAT_NAMES)
+        total_keys = 0
+        for shard in self._shards:
+            with shard.lock:
+                for index, count in enumerate(shard.counts):
+                    totals[index] += count
+                total_keys += len(shard.cache)
+        stats = dict(zip(_STAT_NAMES, totals))
+        
+        total_requests = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / total_requests if total_requests > 0 else 0
+        
+        return {
+            **stats,
+            'total_keys': total_keys,
+            'hit_rate': hit_rate
+        }
+        
     def clean_expired(self):
-        """清理過期的緩存項"""
-        with self._lock:
-            expired_keys = []
-            now = datetime.now()
-            
-            for key, (_, expire_time) in self._cache.items():
-                if expire_time is not None and now >= expire_time:
-                    expired_keys.append(key)
-                    
-            for key in expired_keys:
-                del self._cache[key]
+        """清理過期的緩存項（逐個分片加鎖）"""
+        now = time.monotonic()
+        expired_count = 0
+        for shard in self._shards:
+            with shard.lock:
+                expired_keys = [key for key, (_, expire_at) in shard.cache.items() if now >= expire_at]
                 
-            if expired_keys:
-                logger.debug(f"清理了 {len(expired_keys)} 個過期緩存項")
+                for key in expired_keys:
+                    del shard.cache[key]
+            expired_count += len(expired_keys)
+            
+        if expired_count:
+            logger.debug("清理了 %d 個過期緩存項", expired_count)
 
 
 class FileCacheBackend(CacheBackend):
-    """文件緩存後端"""
+    """
+    文件緩存後端
+    
+    緩存文件按摘要前綴分兩級子目錄存放（aa/bb/<摘要>.cache），避免單個目錄下文件過多。
+    可選壓縮較大的值（新聞、分析結果等文本字典通常能壓縮數倍），讀取時按文件頭記錄的編碼解壓。
+    """
     
-    def __init__(self, cache_dir: str = ".cache"):
+    def __init__(self, cache_dir: str = ".cache", compression: str = 'none'):
+        """
+        初始化文件緩存
+        
+        Args:
+            cache_dir: 緩存目錄
+            compression: 壓縮編碼，'none'、'zlib' 或 'lz4'（未安裝 lz4 時改用 zlib）
+        """
+        if compression not in _CODEC_IDS:
+            raise ValueError(f"不支持的壓縮編碼: {compression}")
+        if compression == 'lz4' and lz4 is None:
+            logger.warning("未安裝 lz4，緩存壓縮改用 zlib")
+            compression = 'zlib'
+        self._codec = _CODEC_IDS[compression]
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self._lock = threading.RLock()
+        self._lock = threading.Lock()
+        # 已確認存在的子目錄，寫入時只在首次用到時創建
+        self._created_dirs: Set[Path] = set()
         self._stats = {
             'hits': 0,
             'misses': 0,
@@ -169,55 +429,83 @@ class FileCacheBackend(CacheBackend):
         
     def _get_cache_path(self, key: str) -> Path:
         """獲取緩存文件路徑"""
-        # 使用 MD5 避免文件名過長或包含特殊字符
-        key_hash = hashlib.md5(key.encode()).hexdigest()
-        return self.cache_dir / f"{key_hash}.cache"
+        # 使用鍵的摘要避免文件名過長或包含特殊字符，前兩級按摘要前綴分目錄
+        digest = _key_digest(key)
+        return self.cache_dir / digest[:2] / digest[2:4] / f"{digest}.cache"
         
     def get(self, key: str) -> Optional[Any]:
         """獲取緩存值"""
+        return self.get_with_ttl(key)[0]
+        
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        """獲取緩存值及其剩餘存活秒數"""
         with self._lock:
             cache_path = self._get_cache_path(key)
             
-            if cache_path.exists():
+            try:
+                size = cache_path.stat().st_size
+            except FileNotFoundError:
+                size = None
+                
+            if size is not None:
                 try:
                     with open(cache_path, 'rb') as f:
-                        data = pickle.load(f)
-                        
-                    expire_time = data.get('expire_time')
-                    if expire_time is None or datetime.now() < expire_time:
-                        self._stats['hits'] += 1
-                        return data['value']
-                    else:
-                        # 過期則刪除
-                        cache_path.unlink()
-                        
+                        codec, expire_at = _read_header(f.read(_FILE_HEADER.size))
+                        remaining = expire_at - time.time()
+                        if remaining > 0:
+                            value = _load_cache_value(f, size, codec)
+                            self._stats['hits'] += 1
+                            return value, remaining
+                            
+                    # 過期則刪除（不反序列化值）
+                    cache_path.unlink()
+                    
                 except Exception as e:
                     logger.error(f"讀取緩存文件失敗 {key}: {e}")
                     
             self._stats['misses'] += 1
-            return None
+            return None, None
             
     def set(self, key: str, value: Any, ttl: Optional[int] = None):
         """設置緩存值"""
-        with self._lock:
-            cache_path = self._get_cache_path(key)
-            
-            expire_time = None
-            if ttl is not None:
-                expire_time = datetime.now() + timedelta(seconds=ttl)
-                
-            data = {
-                'value': value,
-                'expire_time': expire_time,
-                'created_time': datetime.now()
-            }
+        cache_path = self._get_cache_path(key)
+        
+        expire_at = time.time() + ttl if ttl is not None else math.inf
+        
+        # 序列化與壓縮在鎖外完成，鎖內只寫文件；使用最高協議（5），大數組等帶外緩衝數據寫得更快、更小
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            codec = 0
+            if self._codec and len(payload) >= _COMPRESS_MIN_SIZE:
+                compressed = _CODECS[self._codec][0](payload)
+                # 壓縮後沒變小（如已壓縮過的數據）則存原文
+                if len(compressed) < len(payload):
+                    payload, codec = compressed, self._codec
+        except Exception as e:
+            logger.error(f"寫入緩存文件失敗 {key}: {e}")
+            return
+        header = _FILE_HEADER.pack(_FILE_MAGIC, codec, expire_at)
             
+        # 先寫同目錄下的臨時文件再原子替換，中途崩潰不會留下寫了一半的緩存文件；
+        # 緩存可重新生成，不做 fsync
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with self._lock:
             try:
-                with open(cache_path, 'wb') as f:
-                    pickle.dump(data, f)
+                directory = cache_path.parent
+                if directory not in self._created_dirs:
+                    directory.mkdir(parents=True, exist_ok=True)
+                    self._created_dirs.add(directory)
+                with open(tmp_path, 'wb') as f:
+                    f.write(header)
+                    f.write(payload)
+                os.replace(tmp_path, cache_path)
                 self._stats['sets'] += 1
             except Exception as e:
                 logger.error(f"寫入緩存文件失敗 {key}: {e}")
+                try:
+                    tmp_path.unlink()
+                except FileNotFoundError:
+                    pass
                 
     def delete(self, key: str) -> bool:
         """刪除緩存值"""
@@ -235,13 +523,21 @@ class FileCacheBackend(CacheBackend):
             return False
             
     def exists(self, key: str) -> bool:
-        """檢查緩存是否存在"""
-        return self.get(key) is not None
+        """檢查緩存是否存在：只讀文件頭的到期時刻，不反序列化值，也不計入命中統計"""
+        cache_path = self._get_cache_path(key)
+        try:
+            with open(cache_path, 'rb') as f:
+                return time.time() < _read_header(f.read(_FILE_HEADER.size))[1]
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.error(f"讀取緩存文件失敗 {key}: {e}")
+            return False
         
     def clear(self):
         """清空所有緩存"""
         with self._lock:
-            for cache_file in self.cache_dir.glob("*.cache"):
+            for cache_file in self.cache_dir.rglob("*.cache"):
                 try:
                     cache_file.unlink()
                 except Exception as e:
@@ -250,19 +546,95 @@ class FileCacheBackend(CacheBackend):
     def get_stats(self) -> Dict:
         """獲取緩存統計信息"""
         with self._lock:
-            total_requests = self._stats['hits'] + self._stats['misses']
-            hit_rate = self._stats['hits'] / total_requests if total_requests > 0 else 0
+            stats = dict(self._stats)
             
-            # 統計緩存文件數量和大小
-            cache_files = list(self.cache_dir.glob("*.cache"))
-            total_size = sum(f.stat().st_size for f in cache_files)
+        total_requests = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / total_requests if total_requests > 0 else 0
+        
+        # 統計緩存文件數量和大小（純文件系統操作，不持有鎖；統計期間被刪除的文件跳過）
+        cache_files = 0
+        total_size = 0
+        for cache_file in self.cache_dir.rglob("*.cache"):
+            try:
+                total_size += cache_file.stat().st_size
+            except FileNotFoundError:
+                continue
+            cache_files += 1
             
-            return {
-                **self._stats,
-                'total_keys': len(cache_files),
-                'hit_rate': hit_rate,
-                'total_size_mb': total_size / (1024 * 1024)
-            }
+        return {
+            **stats,
+            'total_keys': cache_files,
+            'hit_rate': hit_rate,
+            'total_size_mb': total_size / (1024 * 1024)
+        }
+
+
+class TieredCacheBackend(CacheBackend):
+    """
+    分層緩存後端：小容量內存緩存（L1）在前，持久後端（L2）在後
+    
+    讀取先查 L1，未命中再查 L2 並以 L2 條目的剩餘存活時間回填 L1；寫入與刪除同時作用於兩層。
+    L1 只在本進程內保持一致，其他進程對 L2 的修改要等 L1 條目過期或被淘汰後才可見。
+    """
+    
+    def __init__(self, l1: MemoryCacheBackend, l2: CacheBackend):
+        self.l1 = l1
+        self.l2 = l2
+        
+    def get(self, key: str) -> Optional[Any]:
+        """獲取緩存值"""
+        value = self.l1.get(key)
+        if value is not None:
+            return value
+            
+        value, remaining = self.l2.get_with_ttl(key)
+        if value is not None and remaining is not None and remaining > 0:
+            self.l1.set(key, value, None if remaining == math.inf else remaining)
+        return value
+        
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """設置緩存值（先寫 L2 再寫 L1）"""
+        self.l2.set(key, value, ttl)
+        self.l1.set(key, value, ttl)
+        
+    def delete(self, key: str) -> bool:
+        """刪除緩存值"""
+        in_l1 = self.l1.delete(key)
+        return self.l2.delete(key) or in_l1
+        
+    def exists(self, key: str) -> bool:
+        """檢查緩存是否存在"""
+        return self.l1.exists(key) or self.l2.exists(key)
+        
+    def mset(self, items: Dict[str, Any], ttl: Optional[int] = None):
+        """批量設置緩存值"""
+        self.l2.mset(items, ttl)
+        self.l1.mset(items, ttl)
+        
+    def delete_many(self, keys: List[str]) -> int:
+        """批量刪除緩存值，返回 L2 中實際刪除的數量"""
+        keys = list(keys)
+        self.l1.delete_many(keys)
+        return self.l2.delete_many(keys)
+        
+    def clear(self):
+        """清空所有緩存"""
+        self.l1.clear()
+        self.l2.clear()
+        
+    def get_stats(self) -> Dict:
+        """
+        獲取緩存統計信息
+        
+        以 L2 的統計為基礎；L1 命中的請求不會到達 L2，計入總命中數，L1 自身的統計放在 'l1' 下。
+        """
+        l1_stats = self.l1.get_stats()
+        stats = self.l2.get_stats()
+        stats['hits'] += l1_stats['hits']
+        total_requests = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / total_requests if total_requests > 0 else 0
+        stats['l1'] = l1_stats
+        return stats
 
 
 class CacheManager:
@@ -279,15 +651,18 @@ class CacheManager:
         self.config = config or Config()
         self.backend = backend or self._create_backend()
         
-        # 從配置獲取默認 TTL
-        cache_config = self.config.get('cache', {})
-        self.default_ttl = {
-            CACHE_TYPE.PRICE: cache_config.get('price_hours', 1) * 3600,
-            CACHE_TYPE.FUNDAMENTAL: cache_config.get('fundamental_hours', 6) * 3600,
-            CACHE_TYPE.NEWS: cache_config.get('news_hours', 2) * 3600,
-            CACHE_TYPE.INDUSTRY: cache_config.get('industry_hours', 12) * 3600,
-            CACHE_TYPE.ANALYSIS: cache_config.get('analysis_minutes', 30) * 60
-        }
+        # 默認 TTL 表由配置管理器計算並緩存
+        self.default_ttl = self.config.cache_ttl_table
+        
+        # 各緩存類型的鍵前綴，生成鍵時只需一次拼接
+        self._key_prefixes = {cache_type: f"{cache_type}:" for cache_type in CACHE_TYPE}
+        
+        # 按類型登記寫入過的完整鍵，clear_type 只刪除該類型的條目
+        self._keys_by_type: Dict[str, Set[str]] = defaultdict(set)
+        self._keys_check_size: Dict[str, int] = {}
+        self._keys_lock = threading.Lock()
+        # 正在剔除的類型 -> 剔除期間新寫入的鍵（這些鍵即使在快照中被判為不存在也須保留）
+        self._keys_pruning: Dict[str, Set[str]] = {}
         
         logger.info(f"緩存管理器初始化完成，使用後端: {type(self.backend).__name__}")
         
@@ -297,18 +672,58 @@ class CacheManager:
         backend_type = cache_config.get('backend', 'memory')
         
         if backend_type == 'memory':
-            return MemoryCacheBackend()
+            return MemoryCacheBackend(max_entries=cache_config.get('max_entries', _MEMORY_CACHE_MAX_ENTRIES))
         elif backend_type == 'file':
             cache_dir = cache_config.get('file_cache_dir', '.cache')
-            return FileCacheBackend(cache_dir)
+            file_backend = FileCacheBackend(cache_dir, compression=cache_config.get('compression', 'none'))
+            l1_max_entries = cache_config.get('l1_max_entries', _L1_CACHE_MAX_ENTRIES)
+            if not l1_max_entries:
+                return file_backend
+            return TieredCacheBackend(MemoryCacheBackend(max_entries=l1_max_entries), file_backend)
         else:
             logger.warning(f"未知的緩存後端類型: {backend_type}，使用內存緩存")
-            return MemoryCacheBackend()
+            return MemoryCacheBackend(max_entries=cache_config.get('max_entries', _MEMORY_CACHE_MAX_ENTRIES))
             
+    def _key_prefix(self, cache_type: str) -> str:
+        """獲取緩存類型的鍵前綴，未預先登記的類型首次使用時補上"""
+        prefix = self._key_prefixes.get(cache_type)
+        if prefix is None:
+            prefix = self._key_prefixes[cache_type] = f"{cache_type}:"
+        return prefix
+        
     def _make_key(self, cache_type: str, key: str) -> str:
         """生成緩存鍵"""
-        return f"{cache_type}:{key}"
+        return self._key_prefix(cache_type) + key
         
+    def _track_keys(self, cache_type: str, full_keys: Iterable[str]):
+        """
+        登記寫入的鍵；登記數超過門檻時剔除後端中已不存在的鍵，避免無限增長
+        
+        逐鍵查詢後端（文件後端需打開文件）在鎖外進行，不阻塞其他寫入；
+        同一類型同時只有一個線程剔除，期間寫入的鍵另行記下，不會被誤刪。
+        """
+        with self._keys_lock:
+            tracked = self._keys_by_type[cache_type]
+            tracked.update(full_keys)
+            rewritten = self._keys_pruning.get(cache_type)
+            if rewritten is not None:
+                rewritten.update(full_keys)
+                return
+            if len(tracked) <= self._keys_check_size.get(cache_type, _TRACKED_KEYS_CHECK_SIZE):
+                return
+            snapshot = list(tracked)
+            self._keys_pruning[cache_type] = set()
+            
+        gone: List[str] = []
+        try:
+            gone = [key for key in snapshot if not self.backend.exists(key)]
+        finally:
+            with self._keys_lock:
+                rewritten = self._keys_pruning.pop(cache_type)
+                tracked = self._keys_by_type[cache_type]
+                tracked.difference_update(key for key in gone if key not in rewritten)
+                self._keys_check_size[cache_type] = max(_TRACKED_KEYS_CHECK_SIZE, 2 * len(tracked))
+                
     def get(self, cache_type: str, key: str) -> Optional[Any]:
         """
         獲取緩存值
@@ -324,9 +739,9 @@ class CacheManager:
         value = self.backend.get(full_key)
         
         if value is not None:
-            logger.debug(f"緩存命中: {full_key}")
+            logger.debug("緩存命中: %s", full_key)
         else:
-            logger.debug(f"緩存未命中: {full_key}")
+            logger.debug("緩存未命中: %s", full_key)
             
         return value
         
@@ -345,7 +760,8 @@ class CacheManager:
             
         full_key = self._make_key(cache_type, key)
         self.backend.set(full_key, value, ttl)
-        logger.debug(f"緩存設置: {full_key}, TTL: {ttl}秒")
+        self._track_keys(cache_type, (full_key,))
+        logger.debug("緩存設置: %s, TTL: %s秒", full_key, ttl)
         
     def delete(self, cache_type: str, key: str) -> bool:
         """
@@ -360,9 +776,11 @@ class CacheManager:
         """
         full_key = self._make_key(cache_type, key)
         result = self.backend.delete(full_key)
+        with self._keys_lock:
+            self._keys_by_type[cache_type].discard(full_key)
         
         if result:
-            logger.debug(f"緩存刪除: {full_key}")
+            logger.debug("緩存刪除: %s", full_key)
             
         return result
         
@@ -384,17 +802,23 @@ class CacheManager:
         """
         清空指定類型的所有緩存
         
+        只刪除本管理器寫入過的該類型條目，其他類型不受影響；文件後端中由其他進程寫入的條目不在登記範圍內。
+        
         Args:
             cache_type: 緩存類型
         """
-        # 這裡簡化處理，實際使用時可能需要更精確的實現
-        logger.warning(f"清空緩存類型: {cache_type}")
-        # 注意：這會清空所有緩存，不只是指定類型
-        self.backend.clear()
+        with self._keys_lock:
+            keys = self._keys_by_type.pop(cache_type, set())
+            self._keys_check_size.pop(cache_type, None)
+        deleted = self.backend.delete_many(list(keys))
+        logger.info(f"已清空緩存類型: {cache_type}，刪除 {deleted} 項")
         
     def clear_all(self):
         """清空所有緩存"""
         self.backend.clear()
+        with self._keys_lock:
+            self._keys_by_type.clear()
+            self._keys_check_size.clear()
         logger.info("已清空所有緩存")
         
     def get_stats(self) -> Dict:
@@ -412,11 +836,12 @@ class CacheManager:
         Returns:
             鍵值對字典
         """
-        result = {}
-        for key in keys:
-            value = self.get(cache_type, key)
-            if value is not None:
-                result[key] = value
+        # 一次交給後端批量查詢，後端可在一次加鎖內完成
+        prefix = self._key_prefix(cache_type)
+        values = self.backend.mget([prefix + key for key in keys])
+        result = {key: value for key, value in zip(keys, values) if value is not None}
+        
+        logger.debug("批量緩存查詢: %s, 命中 %d/%d", cache_type, len(result), len(keys))
         return result
         
     def batch_set(self, cache_type: str, items: Dict[str, Any], ttl: Optional[int] = None):
@@ -428,8 +853,14 @@ class CacheManager:
             items: 鍵值對字典
             ttl: 過期時間（秒）
         """
-        for key, value in items.items():
-            self.set(cache_type, key, value, ttl)
+        if ttl is None:
+            ttl = self.default_ttl.get(cache_type, 3600)
+            
+        prefix = self._key_prefix(cache_type)
+        full_items = {prefix + key: value for key, value in items.items()}
+        self.backend.mset(full_items, ttl)
+        self._track_keys(cache_type, full_items)
+        logger.debug("批量緩存設置: %s, %d 項, TTL: %s秒", cache_type, len(items), ttl)
             
     def get_or_set(self, cache_type: str, key: str, factory_func, ttl: Optional[int] = None) -> Any:
         """
@@ -447,7 +878,7 @@ class CacheManager:
         value = self.get(cache_type, key)
         
         if value is None:
-            logger.debug(f"緩存未命中，調用工廠函數: {cache_type}:{key}")
+            logger.debug("緩存未命中，調用工廠函數: %s:%s", cache_type, key)
             value = factory_func()
             if value is not None:
                 self.set(cache_type, key, value, ttl)
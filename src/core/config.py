@@ -3,36 +3,87 @@
 負責加載、驗證和管理系統配置
 """
 
+import functools
 import json
 import os
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
 from pathlib import Path
 import logging
+import threading
+
+from .constants import CACHE_TYPE
 
 logger = logging.getLogger(__name__)
 
+# 各緩存類型默認 TTL 的配置項：(類型, cache 下的鍵, 缺省值, 換算為秒的倍數)
+_CACHE_TTL_SETTINGS = (
+    (CACHE_TYPE.PRICE, 'price_hours', 1, 3600),
+    (CACHE_TYPE.FUNDAMENTAL, 'fundamental_hours', 6, 3600),
+    (CACHE_TYPE.NEWS, 'news_hours', 2, 3600),
+    (CACHE_TYPE.INDUSTRY, 'industry_hours', 12, 3600),
+    (CACHE_TYPE.ANALYSIS, 'analysis_minutes', 30, 60)
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_key(key: str) -> Tuple[str, ...]:
+    """將點分隔的配置鍵解析為路徑元組（結果緩存，避免重複 split）"""
+    return tuple(key.split('.'))
+
+
+def _flatten(tree: Dict[str, Any], prefix: Optional[str],
+             flat: Optional[Dict[str, Any]]) -> Mapping[str, Any]:
+    """
+    將嵌套配置展開為「點分隔路徑 -> 值」索引，返回該層的只讀視圖
+
+    中間層字典以只讀副本收錄，調用方無法就地修改而令索引過期，修改須經 set()。
+    """
+    frozen: Dict[str, Any] = {}
+    for k, value in tree.items():
+        # 含點的鍵無法經點分隔路徑訪問，不收錄其路徑以免與嵌套路徑衝突
+        path = None
+        if flat is not None and isinstance(k, str) and '.' not in k:
+            path = k if prefix is None else f"{prefix}.{k}"
+        if isinstance(value, dict):
+            value = _flatten(value, path, flat if path is not None else None)
+        if path is not None:
+            flat[path] = value
+        frozen[k] = value
+    return MappingProxyType(frozen)
+
 
 class ConfigManager:
     """配置管理器"""
     
     _instance: Optional['ConfigManager'] = None
+    _instance_lock = threading.Lock()
     _config: Dict[str, Any] = {}
     
     def __new__(cls, config_file: str = 'config.json'):
-        """單例模式實現"""
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
+        """單例模式實現（雙重檢查鎖，首個實例初始化完成後才對外可見）"""
+        instance = cls._instance
+        if instance is None:
+            with cls._instance_lock:
+                instance = cls._instance
+                if instance is None:
+                    instance = super().__new__(cls)
+                    instance._initialize(config_file)
+                    cls._instance = instance
+        return instance
     
     def __init__(self, config_file: str = 'config.json'):
+        """初始化已在 __new__ 中完成，重複構造不會重新加載配置"""
+    
+    def _initialize(self, config_file: str) -> None:
         """初始化配置管理器"""
-        if self._initialized:
-            return
-            
         self.config_file = config_file
         self._config = self._load_config()
-        self._initialized = True
+        # 扁平路徑索引，首次取值時構建；_config 被替換或修改時失效
+        self._flat: Optional[Dict[str, Any]] = None
+        self._flat_root: Optional[Dict[str, Any]] = None
+        # 緩存 TTL 表，隨扁平索引一起失效
+        self._ttl_table: Optional[Mapping[str, int]] = None
         
     def _load_config(self) -> Dict[str, Any]:
         """加載配置文件"""
@@ -102,30 +153,32 @@ class ConfigManager:
             }
         }
     
+    def _path_index(self) -> Dict[str, Any]:
+        """返回當前配置的扁平路徑索引"""
+        config = self._config
+        if self._flat is None or config is not self._flat_root:
+            flat: Dict[str, Any] = {}
+            _flatten(config, None, flat)
+            self._flat, self._flat_root = flat, config
+            self._ttl_table = None
+        return self._flat
+    
     def get(self, key: str, default: Any = None) -> Any:
-        """獲取配置值"""
-        keys = key.split('.')
-        value = self._config
-        
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-                
-        return value
+        """獲取配置值（中間層字典返回只讀視圖）"""
+        return self._path_index().get(key, default)
     
     def set(self, key: str, value: Any) -> None:
         """設置配置值"""
-        keys = key.split('.')
+        *parents, last = _parse_key(key)
         config = self._config
         
-        for k in keys[:-1]:
+        for k in parents:
             if k not in config:
                 config[k] = {}
             config = config[k]
             
-        config[keys[-1]] = value
+        config[last] = value
+        self._flat = None
     
     def save(self) -> bool:
         """保存配置到文件"""
@@ -141,39 +194,51 @@ class ConfigManager:
     def reload(self) -> None:
         """重新加載配置"""
         self._config = self._load_config()
+        self._flat = None
     
     @property
-    def api_keys(self) -> Dict[str, str]:
+    def api_keys(self) -> Mapping[str, str]:
         """獲取 API 密鑰配置"""
         return self.get('api_keys', {})
     
     @property
-    def ai_config(self) -> Dict[str, Any]:
+    def ai_config(self) -> Mapping[str, Any]:
         """獲取 AI 配置"""
         return self.get('ai', {})
     
     @property
-    def cache_config(self) -> Dict[str, Any]:
+    def cache_config(self) -> Mapping[str, Any]:
         """獲取緩存配置"""
         return self.get('cache', {})
     
     @property
-    def analysis_weights(self) -> Dict[str, float]:
+    def cache_ttl_table(self) -> Mapping[str, int]:
+        """獲取各緩存類型的默認 TTL（秒），計算一次後緩存，配置修改或重新加載後重算"""
+        index = self._path_index()
+        if self._ttl_table is None:
+            self._ttl_table = MappingProxyType({
+                cache_type: index.get(f'cache.{name}', default) * unit
+                for cache_type, name, default, unit in _CACHE_TTL_SETTINGS
+            })
+        return self._ttl_table
+    
+    @property
+    def analysis_weights(self) -> Mapping[str, float]:
         """獲取分析權重配置"""
         return self.get('analysis_weights', {})
     
     @property
-    def analysis_params(self) -> Dict[str, Any]:
+    def analysis_params(self) -> Mapping[str, Any]:
         """獲取分析參數配置"""
         return self.get('analysis_params', {})
     
     @property
-    def streaming_config(self) -> Dict[str, Any]:
+    def streaming_config(self) -> Mapping[str, Any]:
         """獲取串流配置"""
         return self.get('streaming', {})
     
     @property
-    def web_auth_config(self) -> Dict[str, Any]:
+    def web_auth_config(self) -> Mapping[str, Any]:
         """獲取 Web 認證配置"""
         return self.get('web_auth', {})
 
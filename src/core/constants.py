@@ -121,13 +121,21 @@ CACHE_DURATION = {
 
 
 # 緩存類型
-class CACHE_TYPE:
-    """緩存類型常量"""
+class CACHE_TYPE(str, Enum):
+    """
+    緩存類型常量
+    
+    成員本身就是字串：與原始字串相等且哈希相同，可直接與字串互換作字典鍵；
+    str()/格式化輸出取值本身（如 "price"），拼接緩存鍵時與字串一致。
+    """
     PRICE = "price"
     FUNDAMENTAL = "fundamental"
     NEWS = "news"
     INDUSTRY = "industry"
     ANALYSIS = "analysis"
+    
+    __str__ = str.__str__
+    __format__ = str.__format__
 
 
 # API 限制
@@ -9,22 +9,96 @@
 - 市場情緒分析
 """
 
+import asyncio
+import re
+import threading
+import time
 import akshare as ak
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, ClassVar, Dict, List, Optional, Tuple, Any
 import hashlib
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, defaultdict
+from operator import itemgetter
 from ..utils.logger import get_logger
 from ..core.config import ConfigManager as Config
+from ..core.cache import CacheBackend, FileCacheBackend, MemoryCacheBackend, TieredCacheBackend
 from ..core.constants import CACHE_TYPE
 
 logger = get_logger(__name__)
 
+# 新聞標題情緒關鍵詞（按標題是否包含計數）
+_POSITIVE_TITLE_KEYWORDS = ('漲', '增長', '突破', '新高', '利好', '超預期', '創新', '領先')
+_NEGATIVE_TITLE_KEYWORDS = ('跌', '下降', '虧損', '風險', '利空', '低於預期', '處罰', '調查')
+
+# 公告重要性關鍵詞，各編譯為一個交替正則，每個標題只需各掃描一遍
+_HIGH_IMPORTANCE_KEYWORDS = (
+    '重大', '收購', '重組', '合併', '分拆', '退市',
+    '停牌', '復牌', '業績預告', '利潤分配', '股權激勵'
+)
+_LOW_IMPORTANCE_KEYWORDS = ('會議通知', '簡式', '摘要', '更正')
+_HIGH_IMPORTANCE_RE = re.compile('|'.join(map(re.escape, _HIGH_IMPORTANCE_KEYWORDS)))
+_LOW_IMPORTANCE_RE = re.compile('|'.join(map(re.escape, _LOW_IMPORTANCE_KEYWORDS)))
+_IMPORTANCE_LEVELS = ('high', 'normal', 'low')
+
+# 跨實例共用的接口數據緩存：全市場快訊表短時共用，批量掃描多隻股票時只請求一次；
+# 股票名稱基本不變，只緩存解析出的名稱字串（而非整張個股信息表），存活一天
+_ALERTS_CACHE_TTL = 120
+_STOCK_INFO_CACHE_TTL = 24 * 3600
+_SHARED_CACHE_MAX_ENTRIES = 4096
+
+# 綜合新聞結果緩存的默認條目上限，超出時按最久未使用淘汰
+_NEWS_CACHE_MAX_ENTRIES = 1024
+
+# 取最新 N 條時，行數超過此值才用 nlargest 部分選擇；行數少時完整穩定排序更快
+# （實測分界約在 8000 行左右）
+_NLARGEST_MIN_ROWS = 8000
+
+
+def _latest_rows(df: pd.DataFrame, limit: int, column: str = '發布時間') -> pd.DataFrame:
+    """
+    按時間列取最新的若干行，時間倒序，同一時刻保持原有順序
+    
+    Args:
+        df: 數據表，時間列須為 datetime64
+        limit: 返回的最大行數
+        column: 時間列名
+        
+    Returns:
+        最新的若干行
+    """
+    if len(df) > _NLARGEST_MIN_ROWS:
+        return df.nlargest(limit, column)
+    return df.sort_values(column, ascending=False, kind='stable').head(limit)
+
+
+def _recent_mask(times: pd.Series, days: int) -> np.ndarray:
+    """
+    判斷各時間是否落在最近 N 天內
+    
+    截止時刻只轉換一次為 np.datetime64，直接與底層 datetime64 數組比較，
+    不經 Series 比較時對標量的逐次裝箱與索引對齊
+    
+    Args:
+        times: datetime64 時間序列（NaT 視為不在範圍內）
+        days: 天數
+        
+    Returns:
+        布爾掩碼
+    """
+    cutoff = np.datetime64(datetime.now() - timedelta(days=days))
+    return times.to_numpy() >= cutoff
+
 
 class NewsDataFetcher:
     """新聞數據獲取器"""
     
+    # 鍵 -> (獲取時刻, 數據)，時刻取自 time.monotonic()；數據由各實例共用，只讀不改
+    _shared_cache: ClassVar[Dict[str, Tuple[float, Any]]] = {}
+    _shared_cache_lock: ClassVar[threading.Lock] = threading.Lock()
+    
     def __init__(self, config: Optional[Config] = None):
         """
         初始化新聞數據獲取器
@@ -40,8 +114,17 @@ class NewsDataFetcher:
         # 從配置中獲取緩存設置
         cache_config = self.config.get('cache', {})
         
-        # 新聞數據緩存
-        self.news_cache: Dict[str, Tuple[datetime, Dict]] = {}
+        # 新聞數據緩存：條目數有上限，過期與淘汰由緩存後端處理，長時間運行不會無限增長；
+        # 配置了 news_cache_dir 時再以文件緩存為第二級，進程重啟後仍可沿用未過期的結果
+        self.news_cache: CacheBackend = MemoryCacheBackend(
+            max_entries=cache_config.get('news_max_entries', _NEWS_CACHE_MAX_ENTRIES)
+        )
+        news_cache_dir = cache_config.get('news_cache_dir')
+        if news_cache_dir:
+            self.news_cache = TieredCacheBackend(
+                self.news_cache,
+                FileCacheBackend(news_cache_dir, compression=cache_config.get('compression', 'none'))
+            )
         self.news_cache_duration = timedelta(
             hours=cache_config.get('news_hours', 2)
         )
@@ -58,13 +141,10 @@ class NewsDataFetcher:
         Returns:
             緩存的數據，如果不存在或已過期則返回 None
         """
-        if key in self.news_cache:
-            cache_time, data = self.news_cache[key]
-            if datetime.now() - cache_time < self.news_cache_duration:
-                logger.debug(f"從緩存獲取新聞數據: {key}")
-                return data
-                
-        return None
+        data = self.news_cache.get(key)
+        if data is not None:
+            logger.debug(f"從緩存獲取新聞數據: {key}")
+        return data
         
     def _save_to_cache(self, key: str, data: Dict):
         """
@@ -74,13 +154,78 @@ class NewsDataFetcher:
             key: 緩存鍵
             data: 要緩存的數據
         """
-        self.news_cache[key] = (datetime.now(), data)
+        self.news_cache.set(key, data, ttl=self.news_cache_duration.total_seconds())
         logger.debug(f"新聞數據已緩存: {key}")
         
+    @classmethod
+    def _get_shared_df(cls, key: str, fetch_fn: Callable[[], Any], ttl_seconds: float) -> Any:
+        """
+        從跨實例共用緩存獲取接口數據，未命中或已過期時調用 fetch_fn 獲取並緩存
+        
+        fetch_fn 返回 None（無數據）或拋出異常時不寫入緩存，下次調用重新獲取
+        
+        Args:
+            key: 緩存鍵
+            fetch_fn: 獲取數據的函數
+            ttl_seconds: 存活秒數
+            
+        Returns:
+            接口返回的數據（共用對象，調用方不得修改）
+        """
+        with cls._shared_cache_lock:
+            entry = cls._shared_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < ttl_seconds:
+            return entry[1]
+            
+        # 網絡請求在鎖外進行
+        data = fetch_fn()
+        if data is None:
+            return None
+        with cls._shared_cache_lock:
+            cache = cls._shared_cache
+            cache.pop(key, None)
+            if len(cache) >= _SHARED_CACHE_MAX_ENTRIES:
+                # 超出上限時淘汰最早寫入的條目
+                del cache[next(iter(cache))]
+            cache[key] = (time.monotonic(), data)
+        return data
+        
+    def _fetch_alerts(self) -> Optional[pd.DataFrame]:
+        """獲取全市場快訊表（短時共用）"""
+        return self._get_shared_df('alerts_cls', lambda: ak.stock_zh_a_alerts_cls(), _ALERTS_CACHE_TTL)
+        
     def fetch_comprehensive_news(self, stock_code: str, days: int = 15) -> Optional[Dict]:
         """
         獲取綜合新聞數據
         
+        同步入口，內部以 asyncio.run 執行 fetch_comprehensive_news_async；
+        若當前線程已有運行中的事件循環（asyncio.run 會拋出 RuntimeError），
+        改在獨立線程中運行，各數據源仍同時獲取。此時調用會阻塞該事件循環，
+        已在事件循環中的調用方應直接 await 異步版本。
+        
+        Args:
+            stock_code: 股票代碼
+            days: 獲取最近幾天的新聞
+            
+        Returns:
+            綜合新聞數據字典
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.fetch_comprehensive_news_async(stock_code, days))
+            
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(
+                lambda: asyncio.run(self.fetch_comprehensive_news_async(stock_code, days))
+            ).result()
+        
+    async def fetch_comprehensive_news_async(self, stock_code: str, days: int = 15) -> Optional[Dict]:
+        """
+        異步獲取綜合新聞數據
+        
+        各數據源互不依賴，阻塞的 akshare 調用分別放到線程中同時等待，總耗時約為最慢的一路而非各路之和。
+        
         Args:
             stock_code: 股票代碼
             days: 獲取最近幾天的新聞
@@ -109,23 +254,19 @@ class NewsDataFetcher:
                 'news_summary': {}
             }
             
-            # 1. 獲取個股新聞
-            company_news = self._fetch_company_news(stock_code, days)
+            # 1-4. 同時獲取個股新聞、公司公告、研究報告與行業新聞
+            company_news, announcements, research_reports, industry_news = await asyncio.gather(
+                asyncio.to_thread(self._fetch_company_news, stock_code, days),
+                self._fetch_announcements_async(stock_code, days),
+                asyncio.to_thread(self._fetch_research_reports, stock_code),
+                asyncio.to_thread(self._fetch_industry_news, stock_code, days)
+            )
             if company_news:
                 news_data['company_news'] = company_news
-                
-            # 2. 獲取公司公告
-            announcements = self._fetch_announcements(stock_code, days)
             if announcements:
                 news_data['announcements'] = announcements
-                
-            # 3. 獲取研究報告
-            research_reports = self._fetch_research_reports(stock_code)
             if research_reports:
                 news_data['research_reports'] = research_reports
-                
-            # 4. 獲取行業新聞
-            industry_news = self._fetch_industry_news(stock_code, days)
             if industry_news:
                 news_data['industry_news'] = industry_news
                 
@@ -166,27 +307,20 @@ class NewsDataFetcher:
                 
             # 過濾最近N天的新聞
             news_df['發布時間'] = pd.to_datetime(news_df['發布時間'])
-            cutoff_date = datetime.now() - timedelta(days=days)
-            recent_news = news_df[news_df['發布時間'] >= cutoff_date]
-            
-            # 轉換為字典列表
-            news_list = []
-            for _, row in recent_news.iterrows():
-                news_item = {
-                    'title': row.get('新聞標題', ''),
-                    'time': row.get('發布時間', '').strftime('%Y-%m-%d %H:%M:%S'),
-                    'source': row.get('新聞來源', ''),
-                    'content': row.get('新聞內容', ''),
-                    'url': row.get('新聞鏈接', ''),
-                    'type': 'company_news'
-                }
-                news_list.append(news_item)
-                
-            # 按時間倒序排序
-            news_list.sort(key=lambda x: x['time'], reverse=True)
+            recent_news = news_df[_recent_mask(news_df['發布時間'], days)]
             
-            # 限制返回數量
-            return news_list[:50]
+            # 按時間倒序取最新的 50 條
+            recent_news = _latest_rows(recent_news, 50)
+            
+            # 整列構建後一次性轉換為字典列表（缺失的列以空字串填充）
+            return pd.DataFrame({
+                'title': recent_news.get('新聞標題', ''),
+                'time': recent_news['發布時間'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+                'source': recent_news.get('新聞來源', ''),
+                'content': recent_news.get('新聞內容', ''),
+                'url': recent_news.get('新聞鏈接', ''),
+                'type': 'company_news'
+            }, index=recent_news.index).to_dict('records')
             
         except Exception as e:
             logger.warning(f"獲取個股新聞失敗: {e}")
@@ -208,48 +342,87 @@ class NewsDataFetcher:
             
             # 獲取公司公告（使用東方財富接口）
             # 注意：這裡使用快訊作為公告的補充
-            alerts_df = ak.stock_zh_a_alerts_cls()
+            alerts_df = self._fetch_alerts()
             
             if alerts_df is None or alerts_df.empty:
                 return []
                 
-            # 過濾包含股票代碼的公告
-            stock_name = self._get_stock_name(stock_code)
-            if not stock_name:
-                return []
-                
-            # 過濾相關公告
-            related_alerts = alerts_df[
-                alerts_df['標題'].str.contains(stock_name, na=False) |
-                alerts_df['內容'].str.contains(stock_code, na=False)
-            ]
+            return self._filter_announcements(alerts_df, stock_code, self._get_stock_name(stock_code), days)
             
-            # 過濾時間
-            related_alerts['發布時間'] = pd.to_datetime(related_alerts['發布時間'])
-            cutoff_date = datetime.now() - timedelta(days=days)
-            recent_alerts = related_alerts[related_alerts['發布時間'] >= cutoff_date]
-            
-            # 轉換為字典列表
-            announcement_list = []
-            for _, row in recent_alerts.iterrows():
-                announcement = {
-                    'title': row.get('標題', ''),
-                    'time': row.get('發布時間', '').strftime('%Y-%m-%d %H:%M:%S'),
-                    'content': row.get('內容', ''),
-                    'type': 'announcement',
-                    'importance': self._judge_announcement_importance(row.get('標題', ''))
-                }
-                announcement_list.append(announcement)
-                
-            # 按時間倒序排序
-            announcement_list.sort(key=lambda x: x['time'], reverse=True)
+        except Exception as e:
+            logger.warning(f"獲取公司公告失敗: {e}")
+            return []
             
-            return announcement_list[:30]
+    async def _fetch_announcements_async(self, stock_code: str, days: int) -> List[Dict]:
+        """
+        異步獲取公司公告：快訊表與股票名稱兩次網絡請求同時進行
+        
+        Args:
+            stock_code: 股票代碼
+            days: 天數
+            
+        Returns:
+            公告列表
+        """
+        try:
+            logger.debug(f"獲取公司公告: {stock_code}")
+            
+            alerts_df, stock_name = await asyncio.gather(
+                asyncio.to_thread(self._fetch_alerts),
+                asyncio.to_thread(self._get_stock_name, stock_code)
+            )
+            
+            if alerts_df is None or alerts_df.empty:
+                return []
+                
+            return self._filter_announcements(alerts_df, stock_code, stock_name, days)
             
         except Exception as e:
             logger.warning(f"獲取公司公告失敗: {e}")
             return []
             
+    def _filter_announcements(self, alerts_df: pd.DataFrame, stock_code: str,
+                              stock_name: Optional[str], days: int) -> List[Dict]:
+        """
+        從快訊表中篩選與股票相關的近期公告
+        
+        Args:
+            alerts_df: 快訊表
+            stock_code: 股票代碼
+            stock_name: 股票名稱
+            days: 天數
+            
+        Returns:
+            公告列表
+        """
+        if not stock_name:
+            return []
+            
+        # 先過濾時間：快訊表是全市場的，按時間向量化比較開銷低，先縮小字串匹配的範圍；
+        # 快訊表為共用數據，不就地修改，只對留下的行寫回解析後的時間
+        times = pd.to_datetime(alerts_df['發布時間'])
+        mask = _recent_mask(times, days)
+        recent = alerts_df[mask].assign(**{'發布時間': times[mask]})
+        
+        # 過濾相關公告：標題含股票名稱或內容含股票代碼；按字面匹配，不經正則引擎
+        # （股票名稱可能含 '*' 等正則元字符，如 *ST 股）
+        recent_alerts = recent[
+            recent['標題'].str.contains(stock_name, regex=False, na=False) |
+            recent['內容'].str.contains(stock_code, regex=False, na=False)
+        ]
+        
+        # 按時間倒序取最新的 30 條
+        recent_alerts = _latest_rows(recent_alerts, 30)
+        
+        # 整列構建後一次性轉換為字典列表
+        return pd.DataFrame({
+            'title': recent_alerts['標題'],
+            'time': recent_alerts['發布時間'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+            'content': recent_alerts['內容'],
+            'type': 'announcement',
+            'importance': self._judge_announcement_importance_batch(recent_alerts['標題'])
+        }, index=recent_alerts.index).to_dict('records')
+        
     def _fetch_research_reports(self, stock_code: str) -> List[Dict]:
         """
         獲取研究報告
@@ -269,21 +442,17 @@ class NewsDataFetcher:
             if reports_df is None or reports_df.empty:
                 return []
                 
-            # 轉換為字典列表
-            report_list = []
-            for _, row in reports_df.head(20).iterrows():
-                report = {
-                    'title': row.get('標題', ''),
-                    'time': row.get('發布時間', ''),
-                    'institution': row.get('機構', ''),
-                    'analyst': row.get('分析師', ''),
-                    'rating': row.get('評級', ''),
-                    'target_price': row.get('目標價', ''),
-                    'type': 'research_report'
-                }
-                report_list.append(report)
-                
-            return report_list
+            # 整列構建後一次性轉換為字典列表（缺失的列以空字串填充）
+            reports_df = reports_df.head(20)
+            return pd.DataFrame({
+                'title': reports_df.get('標題', ''),
+                'time': reports_df.get('發布時間', ''),
+                'institution': reports_df.get('機構', ''),
+                'analyst': reports_df.get('分析師', ''),
+                'rating': reports_df.get('評級', ''),
+                'target_price': reports_df.get('目標價', ''),
+                'type': 'research_report'
+            }, index=reports_df.index).to_dict('records')
             
         except Exception as e:
             logger.warning(f"獲取研究報告失敗: {e}")
@@ -332,31 +501,25 @@ class NewsDataFetcher:
                 'sentiment_score': 50  # 0-100, 50為中性
             }
             
-            # 分析新聞標題關鍵詞
-            positive_keywords = ['漲', '增長', '突破', '新高', '利好', '超預期', '創新', '領先']
-            negative_keywords = ['跌', '下降', '虧損', '風險', '利空', '低於預期', '處罰', '調查']
-            
             positive_count = 0
             negative_count = 0
             
-            # 統計所有新聞標題
-            all_titles = []
-            all_titles.extend([n['title'] for n in news_data.get('company_news', [])])
-            all_titles.extend([n['title'] for n in news_data.get('announcements', [])])
+            # 統計所有新聞標題（公司新聞加公告，至多 80 條）
+            all_titles = [n['title'] for n in news_data.get('company_news', [])]
+            all_titles.extend(n['title'] for n in news_data.get('announcements', []))
             
+            # 分析新聞標題關鍵詞：每個標題對關鍵詞表做一次列表推導，命中的關鍵詞整批計入 Counter
+            keyword_counts = Counter()
             for title in all_titles:
-                for keyword in positive_keywords:
-                    if keyword in title:
-                        positive_count += 1
-                        sentiment_analysis['sentiment_keywords'][keyword] = \
-                            sentiment_analysis['sentiment_keywords'].get(keyword, 0) + 1
-                            
-                for keyword in negative_keywords:
-                    if keyword in title:
-                        negative_count += 1
-                        sentiment_analysis['sentiment_keywords'][keyword] = \
-                            sentiment_analysis['sentiment_keywords'].get(keyword, 0) + 1
-                            
+                positive_hits = [keyword for keyword in _POSITIVE_TITLE_KEYWORDS if keyword in title]
+                negative_hits = [keyword for keyword in _NEGATIVE_TITLE_KEYWORDS if keyword in title]
+                positive_count += len(positive_hits)
+                negative_count += len(negative_hits)
+                keyword_counts.update(positive_hits)
+                keyword_counts.update(negative_hits)
+                
+            sentiment_analysis['sentiment_keywords'] = dict(keyword_counts)
+            
             # 計算情緒分數
             total_sentiment = positive_count + negative_count
             if total_sentiment > 0:
@@ -410,25 +573,21 @@ class NewsDataFetcher:
                 'news_trend': 'neutral'  # positive, negative, neutral
             }
             
-            # 提取最新的重要事件
-            all_news = []
+            # 提取最新的重要事件（按時間倒序取前5條新聞）
+            summary['key_events'] = sorted(
+                ({'time': news['time'], 'title': news['title'], 'type': 'news'}
+                 for news in news_data.get('company_news', [])[:5]),
+                key=itemgetter('time'),
+                reverse=True
+            )
             
-            # 添加新聞
-            for news in news_data.get('company_news', [])[:5]:
-                all_news.append({
-                    'time': news['time'],
-                    'title': news['title'],
-                    'type': 'news'
-                })
-                
             # 添加重要公告
-            for announcement in news_data.get('announcements', []):
-                if announcement.get('importance', 'normal') == 'high':
-                    summary['important_announcements'].append({
-                        'time': announcement['time'],
-                        'title': announcement['title']
-                    })
-                    
+            summary['important_announcements'] = [
+                {'time': announcement['time'], 'title': announcement['title']}
+                for announcement in news_data.get('announcements', [])
+                if announcement.get('importance', 'normal') == 'high'
+            ]
+            
             # 分析師共識
             ratings = news_data.get('market_sentiment', {}).get('research_ratings', {})
             if ratings:
@@ -449,10 +608,6 @@ class NewsDataFetcher:
             else:
                 summary['news_trend'] = 'neutral'
                 
-            # 排序並取前5個關鍵事件
-            all_news.sort(key=lambda x: x['time'], reverse=True)
-            summary['key_events'] = all_news[:5]
-            
             return summary
             
         except Exception as e:
@@ -473,15 +628,18 @@ class NewsDataFetcher:
         Returns:
             股票名稱
         """
-        try:
+        def fetch_name() -> Optional[str]:
             # 使用個股信息接口獲取股票名稱
             info_df = ak.stock_individual_info_em(symbol=stock_code)
-            if info_df is not None and not info_df.empty:
-                # 查找股票名稱
-                name_row = info_df[info_df['item'] == '股票簡稱']
-                if not name_row.empty:
-                    return name_row.iloc[0]['value']
-            return None
+            if info_df is None or info_df.empty:
+                return None
+            # 查找股票名稱
+            name = info_df.loc[info_df['item'] == '股票簡稱', 'value']
+            return None if name.empty else name.iloc[0]
+            
+        try:
+            # 命中時直接返回名稱，不再重複篩選個股信息表；請求失敗或未取得名稱時不緩存
+            return self._get_shared_df(f'stock_name:{stock_code}', fetch_name, _STOCK_INFO_CACHE_TTL)
         except:
             return None
             
@@ -495,23 +653,23 @@ class NewsDataFetcher:
         Returns:
             重要性級別: high, normal, low
         """
-        high_keywords = [
-            '重大', '收購', '重組', '合併', '分拆', '退市',
-            '停牌', '復牌', '業績預告', '利潤分配', '股權激勵'
-        ]
+        if _HIGH_IMPORTANCE_RE.search(title):
+            return 'high'
+        if _LOW_IMPORTANCE_RE.search(title):
+            return 'low'
+        return 'normal'
         
-        low_keywords = [
-            '會議通知', '簡式', '摘要', '更正'
-        ]
+    def _judge_announcement_importance_batch(self, titles: pd.Series) -> pd.Categorical:
+        """
+        批量判斷公告重要性，與逐條調用 _judge_announcement_importance 結果一致
         
-        # 檢查高重要性關鍵詞
-        for keyword in high_keywords:
-            if keyword in title:
-                return 'high'
-                
-        # 檢查低重要性關鍵詞
-        for keyword in low_keywords:
-            if keyword in title:
-                return 'low'
-                
-        return 'normal'
\ No newline at end of file
+        Args:
+            titles: 公告標題序列（缺失值視為普通）
+            
+        Returns:
+            重要性級別，類別為 high, normal, low
+        """
+        is_high = titles.str.contains(_HIGH_IMPORTANCE_RE, na=False).to_numpy(dtype=bool)
+        is_low = titles.str.contains(_LOW_IMPORTANCE_RE, na=False).to_numpy(dtype=bool)
+        levels = np.select([is_high, is_low], ['high', 'low'], default='normal')
+        return pd.Categorical(levels, categories=_IMPORTANCE_LEVELS)
@@ -8,8 +8,9 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import tempfile
 import shutil
+import threading
 from src.core.cache import (
-    CacheManager, MemoryCacheBackend, FileCacheBackend,
+    CacheManager, MemoryCacheBackend, FileCacheBackend, TieredCacheBackend,
     get_cache_manager
 )
 from src.core.constants import CACHE_TYPE
@@ -35,6 +36,15 @@ class TestMemoryCacheBackend:
         assert cache.get("test_key") is None
         assert cache.delete("non_existent") is False
         
+    def test_none_value(self):
+        """測試值為 None 的緩存項"""
+        cache = MemoryCacheBackend()
+        
+        cache.set("none_key", None)
+        assert cache.exists("none_key") is True
+        assert cache.delete("none_key") is True
+        assert cache.exists("none_key") is False
+        
     def test_ttl(self):
         """測試過期時間"""
         cache = MemoryCacheBackend()
@@ -47,6 +57,24 @@ class TestMemoryCacheBackend:
         time.sleep(1.1)
         assert cache.get("ttl_key") is None
         
+    def test_ttl_monotonic(self, monkeypatch):
+        """測試過期判斷使用單調時鐘，不受系統時間調整影響"""
+        import src.core.cache as cache_module
+        
+        cache = MemoryCacheBackend()
+        cache.set("ttl_key", "ttl_value", ttl=60)
+        cache.set("no_ttl_key", "no_ttl_value")
+        
+        # 內存後端不再讀取系統時間（datetime 不可用時照常工作）
+        monkeypatch.setattr(cache_module, 'datetime', None, raising=False)
+        assert cache.get("ttl_key") == "ttl_value"
+        
+        # 單調時鐘前進超過 TTL 後過期
+        now = time.monotonic()
+        monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now + 61)
+        assert cache.exists("ttl_key") is False
+        assert cache.get("no_ttl_key") == "no_ttl_value"
+        
     def test_no_ttl(self):
         """測試無過期時間"""
         cache = MemoryCacheBackend()
@@ -96,6 +124,86 @@ class TestMemoryCacheBackend:
         assert stats['sets'] == 1
         assert stats['deletes'] == 1
         
+    def test_shards(self):
+        """測試分片存儲與跨分片統計"""
+        cache = MemoryCacheBackend(shards=4)
+        
+        for i in range(100):
+            cache.set(f"key_{i}", i)
+        assert sum(1 for shard in cache._shards if shard.cache) > 1
+        assert all(cache.get(f"key_{i}") == i for i in range(100))
+        
+        stats = cache.get_stats()
+        assert stats['total_keys'] == 100
+        assert stats['sets'] == 100
+        assert stats['hits'] == 100
+        
+        cache.clear()
+        assert cache.get_stats()['total_keys'] == 0
+        
+        with pytest.raises(ValueError):
+            MemoryCacheBackend(shards=3)
+            
+    def test_small_capacity_shards(self):
+        """測試條目上限較小時減少分片數，未達上限前不淘汰"""
+        cache = MemoryCacheBackend(max_entries=16)
+        
+        for i in range(16):
+            cache.set(f"key_{i}", i)
+        assert len(cache._shards) == 1
+        assert all(cache.get(f"key_{i}") == i for i in range(16))
+        assert cache.get_stats()['evictions'] == 0
+        
+        assert len(MemoryCacheBackend(max_entries=1024)._shards) == 16
+        assert len(MemoryCacheBackend(shards=4, max_entries=200)._shards) == 2
+        
+    def test_mget_mset(self):
+        """測試批量讀寫與逐個讀寫結果一致"""
+        cache = MemoryCacheBackend(shards=4)
+        
+        cache.mset({f"key_{i}": i for i in range(20)})
+        cache.mset({"ttl_key": "value"}, ttl=0)
+        
+        keys = [f"key_{i}" for i in range(0, 30, 3)] + ["ttl_key"]
+        assert cache.mget(keys) == [cache.get(key) for key in keys]
+        
+        stats = cache.get_stats()
+        assert stats['sets'] == 21
+        assert stats['hits'] == 14
+        assert stats['misses'] == 8
+        
+    def test_lru_eviction(self):
+        """測試超出條目上限時淘汰最久未使用的條目"""
+        cache = MemoryCacheBackend(shards=1, max_entries=3)
+        
+        cache.set("key1", "value1")
+        cache.set("key2", "value2")
+        cache.set("key3", "value3")
+        cache.get("key1")  # key1 成為最近使用
+        cache.set("key4", "value4")
+        
+        assert cache.exists("key2") is False
+        assert cache.get("key1") == "value1"
+        assert cache.get("key4") == "value4"
+        
+        stats = cache.get_stats()
+        assert stats['total_keys'] == 3
+        assert stats['evictions'] == 1
+        
+    def test_expire_on_write(self):
+        """測試寫入時攤銷清理最久未使用端的過期條目"""
+        from src.core.cache import _EXPIRE_CHECK_INTERVAL
+        
+        cache = MemoryCacheBackend(shards=1)
+        for i in range(10):
+            cache.set(f"expired_{i}", i, ttl=0)
+        for i in range(_EXPIRE_CHECK_INTERVAL - 10):
+            cache.set(f"live_{i}", i)
+            
+        stats = cache.get_stats()
+        assert stats['total_keys'] == _EXPIRE_CHECK_INTERVAL - 10
+        assert stats['misses'] == 0
+        
     def test_thread_safety(self):
         """測試線程安全性"""
         import threading
@@ -187,7 +295,7 @@ class TestFileCacheBackend:
         assert cache.get("ttl_key") is None
         
         # 驗證文件已被刪除
-        cache_files = list(Path(self.temp_dir).glob("*.cache"))
+        cache_files = list(Path(self.temp_dir).rglob("*.cache"))
         assert len(cache_files) == 0
         
     def test_clear(self):
@@ -200,16 +308,125 @@ class TestFileCacheBackend:
         cache.set("key3", "value3")
         
         # 驗證文件創建
-        cache_files = list(Path(self.temp_dir).glob("*.cache"))
+        cache_files = list(Path(self.temp_dir).rglob("*.cache"))
         assert len(cache_files) == 3
         
         # 清空
         cache.clear()
         
         # 驗證文件刪除
-        cache_files = list(Path(self.temp_dir).glob("*.cache"))
+        cache_files = list(Path(self.temp_dir).rglob("*.cache"))
         assert len(cache_files) == 0
         
+    def test_sharded_layout(self):
+        """測試緩存文件按摘要前綴分兩級子目錄存放"""
+        cache = FileCacheBackend(self.temp_dir)
+        
+        cache.set("layout_key", "value")
+        
+        cache_file, = Path(self.temp_dir).rglob("*.cache")
+        relative = cache_file.relative_to(self.temp_dir)
+        assert len(relative.parts) == 3
+        assert relative.parts[0] + relative.parts[1] == cache_file.stem[:4]
+        assert cache.get("layout_key") == "value"
+        
+    def test_mmap_read(self, monkeypatch):
+        """測試大文件經內存映射讀取"""
+        import src.core.cache as cache_module
+        
+        cache = FileCacheBackend(self.temp_dir)
+        cache.set("large_key", {"data": "x" * 1000})
+        
+        monkeypatch.setattr(cache_module, '_MMAP_THRESHOLD', 0)
+        assert cache.get("large_key") == {"data": "x" * 1000}
+        
+    def test_exists_reads_header_only(self, monkeypatch):
+        """測試 exists 只讀文件頭，不反序列化值、不計入統計"""
+        import src.core.cache as cache_module
+        
+        cache = FileCacheBackend(self.temp_dir)
+        cache.set("live", "value", ttl=60)
+        cache.set("expired", "value", ttl=-1)
+        
+        def fail_load(*args, **kwargs):
+            raise AssertionError("不應反序列化")
+            
+        monkeypatch.setattr(cache_module.pickle, 'load', fail_load)
+        monkeypatch.setattr(cache_module.pickle, 'loads', fail_load)
+        assert cache.exists("live") is True
+        assert cache.exists("expired") is False
+        assert cache.exists("missing") is False
+        
+        stats = cache.get_stats()
+        assert stats['hits'] == 0 and stats['misses'] == 0
+        
+        # 過期條目讀取時直接刪除，同樣不反序列化
+        assert cache.get("expired") is None
+        assert stats['total_keys'] == 2
+        assert cache.get_stats()['total_keys'] == 1
+        
+    def test_unknown_file_format(self):
+        """測試無法識別的緩存文件（如舊版格式）視為未命中"""
+        import pickle
+        
+        cache = FileCacheBackend(self.temp_dir)
+        cache.set("legacy", "value")
+        cache_file, = Path(self.temp_dir).rglob("*.cache")
+        cache_file.write_bytes(pickle.dumps({'value': 'value', 'expire_time': None}))
+        
+        assert cache.exists("legacy") is False
+        assert cache.get("legacy") is None
+        
+    @pytest.mark.parametrize("use_mmap", [False, True])
+    def test_compression(self, monkeypatch, use_mmap):
+        """測試壓縮寫入的大值可正確讀回，小值不壓縮"""
+        import src.core.cache as cache_module
+        
+        cache = FileCacheBackend(self.temp_dir, compression='zlib')
+        large = {"content": "公司業績大幅增長" * 2000}
+        cache.set("large", large)
+        cache.set("small", "value")
+        
+        sizes = {key: cache._get_cache_path(key).stat().st_size for key in ("large", "small")}
+        assert sizes["large"] < len("公司業績大幅增長".encode()) * 2000 / 4
+        
+        if use_mmap:
+            monkeypatch.setattr(cache_module, '_MMAP_THRESHOLD', 0)
+        assert cache.get("large") == large
+        assert cache.get("small") == "value"
+        assert cache.exists("large") is True
+        
+        # 未壓縮的後端同樣能讀取壓縮過的文件
+        assert FileCacheBackend(self.temp_dir).get("large") == large
+        
+    def test_compression_options(self, monkeypatch):
+        """測試壓縮選項校驗及 lz4 不可用時改用 zlib"""
+        import src.core.cache as cache_module
+        
+        with pytest.raises(ValueError):
+            FileCacheBackend(self.temp_dir, compression='gzip')
+            
+        monkeypatch.setattr(cache_module, 'lz4', None)
+        cache = FileCacheBackend(self.temp_dir, compression='lz4')
+        assert cache._codec == cache_module._CODEC_IDS['zlib']
+        
+    def test_atomic_write(self, monkeypatch):
+        """測試寫入失敗時保留原緩存文件且不殘留臨時文件"""
+        import os
+        
+        cache = FileCacheBackend(self.temp_dir)
+        cache.set("atomic_key", "old")
+        
+        def failing_replace(src, dst):
+            raise OSError("disk full")
+            
+        monkeypatch.setattr(os, 'replace', failing_replace)
+        cache.set("atomic_key", "new")
+        monkeypatch.undo()
+        
+        assert cache.get("atomic_key") == "old"
+        assert list(Path(self.temp_dir).rglob("*.tmp")) == []
+        
     def test_stats(self):
         """測試統計信息"""
         cache = FileCacheBackend(self.temp_dir)
@@ -243,6 +460,64 @@ class TestFileCacheBackend:
         assert retrieved == test_data
 
 
+class TestTieredCacheBackend:
+    """分層緩存後端測試"""
+    
+    def setup_method(self):
+        """測試前準備"""
+        self.temp_dir = tempfile.mkdtemp()
+        
+    def teardown_method(self):
+        """測試後清理"""
+        shutil.rmtree(self.temp_dir)
+        
+    def test_read_through(self):
+        """測試 L1 未命中時從 L2 讀取並回填"""
+        l2 = FileCacheBackend(self.temp_dir)
+        l2.set("key1", {"v": 1}, ttl=60)
+        cache = TieredCacheBackend(MemoryCacheBackend(shards=1, max_entries=16), l2)
+        
+        assert cache.get("key1") == {"v": 1}
+        assert cache.get("key1") == {"v": 1}
+        
+        # 第二次讀取由 L1 命中，不再讀文件
+        assert l2.get_stats()['hits'] == 1
+        stats = cache.get_stats()
+        assert stats['hits'] == 2
+        assert stats['l1']['hits'] == 1
+        
+    def test_backfill_ttl(self):
+        """測試回填 L1 時沿用 L2 條目的剩餘存活時間"""
+        l2 = FileCacheBackend(self.temp_dir)
+        l2.set("short", "value", ttl=1)
+        l2.set("forever", "value")
+        cache = TieredCacheBackend(MemoryCacheBackend(shards=1, max_entries=16), l2)
+        
+        assert cache.get("short") == "value"
+        assert cache.get("forever") == "value"
+        time.sleep(1.1)
+        assert cache.l1.get("short") is None
+        assert cache.l1.get("forever") == "value"
+        
+    def test_write_and_delete_both_tiers(self):
+        """測試寫入與刪除同時作用於兩層"""
+        cache = TieredCacheBackend(MemoryCacheBackend(shards=1, max_entries=16), FileCacheBackend(self.temp_dir))
+        
+        cache.set("key1", "value1")
+        cache.mset({"key2": "value2"})
+        assert cache.l1.get("key1") == "value1"
+        assert cache.l2.get("key2") == "value2"
+        
+        assert cache.delete("key1") is True
+        assert cache.delete_many(["key2"]) == 1
+        assert cache.exists("key1") is False
+        assert cache.exists("key2") is False
+        
+        cache.set("key3", "value3")
+        cache.clear()
+        assert cache.get("key3") is None
+
+
 class TestCacheManager:
     """緩存管理器測試"""
     
@@ -274,6 +549,8 @@ class TestCacheManager:
             test_config._config = config
             
             manager = CacheManager(config=test_config)
+            assert isinstance(manager.backend, TieredCacheBackend)
+            assert isinstance(manager.backend.l2, FileCacheBackend)
             
             # 基本操作
             manager.set(CACHE_TYPE.FUNDAMENTAL, "fund_001", {"pe": 15.5})
@@ -321,6 +598,30 @@ class TestCacheManager:
         assert result["key3"] == "value3"
         assert "key4" not in result
         
+    def test_make_key(self):
+        """測試鍵前綴預先生成，未登記的類型同樣可用"""
+        manager = CacheManager()
+        
+        assert manager._make_key(CACHE_TYPE.PRICE, "000001") == "price:000001"
+        assert manager._make_key("custom", "000001") == "custom:000001"
+        assert "custom" in manager._key_prefixes
+        
+        manager.batch_set("custom", {"a": 1})
+        assert manager.get("custom", "a") == 1
+        assert manager.backend.get("custom:a") == 1
+        
+    def test_cache_type_enum(self):
+        """測試緩存類型枚舉與原始字串互換使用"""
+        manager = CacheManager()
+        
+        assert CACHE_TYPE("news") is CACHE_TYPE.NEWS
+        assert f"{CACHE_TYPE.NEWS}" == str(CACHE_TYPE.NEWS) == "news"
+        assert manager.default_ttl["news"] == manager.default_ttl[CACHE_TYPE.NEWS]
+        
+        manager.set("news", "raw", "value")
+        assert manager.get(CACHE_TYPE.NEWS, "raw") == "value"
+        assert type(manager._make_key(CACHE_TYPE.NEWS, "raw")) is str
+        
     def test_get_or_set(self):
         """測試 get_or_set"""
         manager = CacheManager()
@@ -356,6 +657,70 @@ class TestCacheManager:
         assert manager.get(CACHE_TYPE.PRICE, "price_1") is None
         assert manager.get(CACHE_TYPE.NEWS, "news_1") is None
         
+    def test_clear_type(self):
+        """測試按類型清空只刪除該類型的緩存"""
+        manager = CacheManager()
+        
+        manager.set(CACHE_TYPE.PRICE, "price_1", "value1")
+        manager.batch_set(CACHE_TYPE.NEWS, {"news_1": "value2", "news_2": "value3"})
+        manager.delete(CACHE_TYPE.NEWS, "news_2")
+        
+        manager.clear_type(CACHE_TYPE.NEWS)
+        
+        assert manager.get(CACHE_TYPE.NEWS, "news_1") is None
+        assert manager.get(CACHE_TYPE.PRICE, "price_1") == "value1"
+        assert manager.get_stats()['deletes'] == 2
+        
+    def test_tracked_keys_pruned(self):
+        """測試登記的鍵超過門檻時剔除已被淘汰的鍵"""
+        from src.core import cache
+        
+        manager = CacheManager(backend=MemoryCacheBackend(shards=1, max_entries=10))
+        original = cache._TRACKED_KEYS_CHECK_SIZE
+        cache._TRACKED_KEYS_CHECK_SIZE = 20
+        try:
+            for i in range(50):
+                manager.set(CACHE_TYPE.PRICE, f"key{i}", i)
+        finally:
+            cache._TRACKED_KEYS_CHECK_SIZE = original
+            
+        assert len(manager._keys_by_type[CACHE_TYPE.PRICE]) <= 20
+        manager.clear_type(CACHE_TYPE.PRICE)
+        assert manager.get_stats()['total_keys'] == 0
+        
+    def test_tracked_keys_pruned_outside_lock(self):
+        """測試剔除登記的鍵時不持有鎖，期間重新寫入的鍵不被誤刪"""
+        from src.core import cache
+        
+        manager = CacheManager(backend=MemoryCacheBackend(shards=1, max_entries=10))
+        key0 = manager._make_key(CACHE_TYPE.PRICE, "key0")
+        backend_exists = manager.backend.exists
+        finished = []
+        
+        def exists(key):
+            result = backend_exists(key)
+            if key == key0 and not finished:
+                # 剔除進行中由另一線程寫入：若仍持有鎖，寫入會阻塞至超時
+                writer = threading.Thread(target=manager.set, args=(CACHE_TYPE.PRICE, "key0", "again"))
+                writer.start()
+                writer.join(timeout=2)
+                finished.append(not writer.is_alive())
+            return result
+            
+        manager.backend.exists = exists
+        original = cache._TRACKED_KEYS_CHECK_SIZE
+        cache._TRACKED_KEYS_CHECK_SIZE = 20
+        try:
+            for i in range(21):
+                manager.set(CACHE_TYPE.PRICE, f"key{i}", i)
+        finally:
+            cache._TRACKED_KEYS_CHECK_SIZE = original
+            
+        assert finished == [True]
+        tracked = manager._keys_by_type[CACHE_TYPE.PRICE]
+        assert key0 in tracked
+        assert len(tracked) <= 11
+        
     def test_stats(self):
         """測試統計信息"""
         manager = CacheManager()
@@ -4,6 +4,7 @@
 
 import pytest
 import json
+from collections.abc import Mapping
 from pathlib import Path
 from src.core.config import ConfigManager
 
@@ -17,6 +18,34 @@ class TestConfigManager:
         config2 = ConfigManager()
         assert config1 is config2
     
+    def test_singleton_thread_safe(self, monkeypatch):
+        """測試多線程併發首次構造只加載一次配置"""
+        import threading
+        import time
+        
+        calls = []
+        
+        def slow_load(self):
+            calls.append(threading.get_ident())
+            time.sleep(0.05)
+            return {'key': 'value'}
+        
+        monkeypatch.setattr(ConfigManager, '_load_config', slow_load)
+        
+        instances = []
+        threads = [
+            threading.Thread(target=lambda: instances.append(ConfigManager()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(calls) == 1
+        assert all(instance is instances[0] for instance in instances)
+        assert instances[0].get('key') == 'value'
+    
     def test_load_config_file(self, test_config_file):
         """測試加載配置文件"""
         config = ConfigManager(test_config_file)
@@ -99,6 +128,80 @@ class TestConfigManager:
         config.reload()
         assert config.get('key') == 'updated_value'
     
+    def test_get_cache_invalidation(self):
+        """測試值緩存在設置與替換配置後失效"""
+        config = ConfigManager()
+        config.set('cache.price_hours', 1)
+        assert config.get('cache.price_hours') == 1
+        
+        config.set('cache.price_hours', 3)
+        assert config.get('cache.price_hours') == 3
+        
+        # 直接替換整個配置字典
+        config._config = {'cache': {'price_hours': 5}}
+        assert config.get('cache.price_hours') == 5
+        assert config.get('cache.news_hours', 2) == 2
+        
+        # 缺失的鍵每次都返回調用方給的默認值
+        assert config.get('cache.news_hours') is None
+    
+    def test_path_index(self):
+        """測試扁平路徑索引與逐層查找結果一致"""
+        config = ConfigManager()
+        config._config = {
+            'cache': {'price_hours': 1, 'backend': None},
+            'a.b': 'dotted',
+            'a': {'c': 2}
+        }
+        
+        # 中間層路徑返回內容相同的只讀視圖
+        assert config.get('cache') == config._config['cache']
+        assert config.get('cache.backend', 'file') is None
+        assert config.get('a.c') == 2
+        
+        # 含點的鍵無法經路徑訪問，與原有行為一致
+        assert config.get('a.b') is None
+        assert config.get('cache.price_hours.x', 'x') == 'x'
+    
+    def test_nested_dict_read_only(self):
+        """測試中間層字典無法就地修改，扁平索引與 TTL 表不會過期"""
+        from src.core.constants import CACHE_TYPE
+        
+        config = ConfigManager()
+        config._config = {'cache': {'price_hours': 1, 'files': {'dir': '.cache'}}}
+        table = config.cache_ttl_table
+        
+        with pytest.raises(TypeError):
+            config.get('cache')['price_hours'] = 5
+        with pytest.raises(TypeError):
+            config.get('cache')['files']['dir'] = '/tmp'
+        assert config.get('cache.price_hours') == 1
+        assert config.get('cache')['files']['dir'] == '.cache'
+        assert config.cache_ttl_table is table
+        
+        # 經 set() 修改後各路徑一致
+        config.set('cache.price_hours', 5)
+        assert config.get('cache.price_hours') == 5
+        assert config.get('cache')['price_hours'] == 5
+        assert config.cache_ttl_table[CACHE_TYPE.PRICE] == 5 * 3600
+    
+    def test_cache_ttl_table(self):
+        """測試緩存 TTL 表只計算一次，配置修改後重算"""
+        from src.core.constants import CACHE_TYPE
+        
+        config = ConfigManager()
+        config._config = {'cache': {'price_hours': 2}}
+        
+        table = config.cache_ttl_table
+        assert table[CACHE_TYPE.PRICE] == 7200
+        assert table[CACHE_TYPE.ANALYSIS] == 30 * 60
+        assert config.cache_ttl_table is table
+        
+        config.set('cache.analysis_minutes', 10)
+        assert config.cache_ttl_table[CACHE_TYPE.ANALYSIS] == 600
+        with pytest.raises(TypeError):
+            config.cache_ttl_table[CACHE_TYPE.NEWS] = 0
+    
     def test_property_accessors(self, test_config_file):
         """測試屬性訪問器"""
         config = ConfigManager(test_config_file)
@@ -109,8 +212,8 @@ class TestConfigManager:
         assert config.cache_config['price_hours'] == 1
         
         # 測試默認值
-        assert isinstance(config.analysis_weights, dict)
-        assert isinstance(config.streaming_config, dict)
+        assert isinstance(config.analysis_weights, Mapping)
+        assert isinstance(config.streaming_config, Mapping)
 
 
 class TestConfigValidation:
@@ -0,0 +1,291 @@
+"""
+基本面分析模組的單元測試
+"""
+
+import pytest
+from src.analysis.fundamental import FundamentalAnalyzer
+
+
+class TestFundamentalAnalyzer:
+    """基本面分析器測試"""
+
+    @pytest.fixture
+    def analyzer(self):
+        """創建測試用的分析器"""
+        return FundamentalAnalyzer()
+
+    @pytest.fixture
+    def strong_data(self):
+        """財務狀況優秀的樣本數據"""
+        return {
+            'financial_indicators': {
+                '淨資產收益率': 22.5,
+                '毛利率': 45.0,
+                '淨利率': 18.0,
+                '資產負債率': 25.0,
+                '流動比率': 2.5,
+                '速動比率': 1.2,
+                '存貨週轉率': 8.0,
+                '應收帳款週轉率': 15.0,
+                '總資產週轉率': 1.2,
+                '營收同比增長率': 35.0,
+                '淨利潤同比增長率': 50.0
+            },
+            'valuation': {
+                '市盈率': 12.0,
+                '市淨率': 0.9,
+                'PEG': 0.8
+            }
+        }
+
+    @pytest.fixture
+    def weak_data(self):
+        """財務狀況較差的樣本數據"""
+        return {
+            'financial_indicators': {
+                '淨資產收益率': 2.0,
+                '毛利率': 10.0,
+                '淨利率': 1.0,
+                '資產負債率': 85.0,
+                '流動比率': 0.6,
+                '速動比率': 0.3,
+                '存貨週轉率': 1.0,
+                '應收帳款週轉率': 3.0,
+                '總資產週轉率': 0.2,
+                '營收同比增長率': -15.0,
+                '淨利潤同比增長率': -30.0
+            },
+            'valuation': {
+                '市盈率': 80.0,
+                '市淨率': 6.0,
+                'PEG': 3.5
+            }
+        }
+
+    def test_analyze_strong(self, analyzer, strong_data):
+        """測試優秀樣本的完整分析"""
+        result = analyzer.analyze(strong_data)
+
+        assert result['status'] == 'success'
+        assert result['dimension_scores']['profitability'] == 90
+        assert result['dimension_scores']['valuation'] == 85
+        assert result['score'] > 80
+        assert '盈利能力' in result['analysis']['summary']['strengths']
+
+    def test_analyze_weak(self, analyzer, weak_data):
+        """測試較差樣本的完整分析"""
+        result = analyzer.analyze(weak_data)
+
+        assert result['status'] == 'success'
+        assert result['dimension_scores']['solvency'] == 25
+        assert result['score'] < 50
+        assert '償債能力' in result['analysis']['summary']['weaknesses']
+
+    def test_analyze_empty(self, analyzer):
+        """測試無數據時返回默認結果"""
+        result = analyzer.analyze({})
+
+        assert result['status'] == 'no_data'
+        assert result['score'] == 50.0
+        assert set(result['dimension_scores'].values()) == {50.0}
+
+    def test_analyze_batch_matches_analyze(self, analyzer, strong_data, weak_data):
+        """測試批量評分與單筆分析結果一致"""
+        boundary_data = {
+            'financial_indicators': {
+                '淨資產收益率': 20,
+                '資產負債率': 30,
+                '營收同比增長率': -5,
+                '淨利潤同比增長率': 2
+            },
+            'valuation': {'市盈率': 15, '市淨率': 0, 'PEG': 1}
+        }
+        partial_data = {'financial_indicators': {'淨資產收益率': 12.0}}
+        # NaN 是有效數值（pandas/akshare 數據常見），按區間比較評分，不令維度記 50 分
+        nan_data = {
+            'financial_indicators': {'淨資產收益率': float('nan'), '資產負債率': float('nan'), '營收同比增長率': 12.0},
+            'valuation': {'市盈率': float('nan'), '市淨率': 2.0}
+        }
+        samples = [strong_data, weak_data, boundary_data, partial_data, nan_data, {}]
+
+        batch_results = analyzer.analyze_batch(samples)
+
+        assert len(batch_results) == len(samples)
+        for data, batch_result in zip(samples, batch_results):
+            single_result = analyzer.analyze(data)
+            assert batch_result['dimension_scores'] == single_result['dimension_scores']
+            assert batch_result['score'] == single_result['score']
+
+    def test_analyze_batch_invalid_values(self, analyzer):
+        """測試無效指標只影響所在維度"""
+        data = {
+            'financial_indicators': {'淨資產收益率': 'N/A', '資產負債率': 25.0},
+            'valuation': {'市盈率': 12.0}
+        }
+
+        batch_result = analyzer.analyze_batch([data])[0]
+        single_result = analyzer.analyze(data)
+
+        assert batch_result['dimension_scores']['profitability'] == 50.0
+        assert batch_result['dimension_scores'] == single_result['dimension_scores']
+
+    def test_analyze_batch_string_and_none_cells(self, analyzer):
+        """測試數字字符串與 None 單元格在批量與單筆分析中同樣記為無效"""
+        samples = [
+            {
+                'financial_indicators': {'淨資產收益率': '20', '毛利率': 45, '淨利率': 20},
+                'valuation': {'市盈率': 15, '市淨率': 2}
+            },
+            {
+                'financial_indicators': {'淨資產收益率': 15, '資產負債率': None},
+                'valuation': {'市盈率': '15', '市淨率': 2}
+            }
+        ]
+
+        batch_results = analyzer.analyze_batch(samples)
+
+        assert batch_results[0]['dimension_scores']['profitability'] == 50.0
+        assert batch_results[1]['dimension_scores']['solvency'] == 50.0
+        assert batch_results[1]['dimension_scores']['valuation'] == 50.0
+        for data, batch_result in zip(samples, batch_results):
+            single_result = analyzer.analyze(data)
+            assert batch_result['dimension_scores'] == single_result['dimension_scores']
+            assert batch_result['score'] == single_result['score']
+
+    def test_analyze_batch_empty(self, analyzer):
+        """測試空批量"""
+        assert analyzer.analyze_batch([]) == []
+
+    def test_lazy_package_export(self):
+        """測試從分析包延遲導出分析器"""
+        import src.analysis as analysis
+
+        assert 'FundamentalAnalyzer' in dir(analysis)
+        assert analysis.FundamentalAnalyzer is FundamentalAnalyzer
+        with pytest.raises(AttributeError):
+            analysis.NonExistentAnalyzer
+
+    def test_kernel_matches_vectorized(self):
+        """測試編譯內核與 NumPy 向量化路徑結果一致"""
+        import numpy as np
+        from src.analysis import fundamental
+        from src.analysis._kernels import fundamental_dimension_scores
+
+        rng = np.random.default_rng(0)
+        boundaries = np.array([-5, 0, 0.5, 0.7, 1, 1.5, 2, 5, 10, 15, 20, 25, 30, 40, 50, 70])
+        matrix = np.where(
+            rng.random((300, len(fundamental._BATCH_COLUMNS))) < 0.5,
+            rng.choice(boundaries, (300, len(fundamental._BATCH_COLUMNS))),
+            rng.uniform(-20, 100, (300, len(fundamental._BATCH_COLUMNS)))
+        )
+        matrix[rng.random(matrix.shape) < 0.05] = np.nan
+        has_valuation = rng.random(300) < 0.8
+
+        kernel_scores = fundamental_dimension_scores(
+            matrix, has_valuation, *fundamental._pack_kernel_tables(fundamental.DEFAULT_TABLES)
+        )
+
+        # 強制走 NumPy 路徑作為對照
+        original = fundamental.NUMBA_AVAILABLE
+        fundamental.NUMBA_AVAILABLE = False
+        try:
+            vectorized_scores = fundamental._score_dimensions(matrix, has_valuation)
+        finally:
+            fundamental.NUMBA_AVAILABLE = original
+
+        np.testing.assert_array_equal(kernel_scores, vectorized_scores)
+
+    def test_analyze_frame_matches_analyze(self, analyzer, strong_data, weak_data):
+        """測試 DataFrame 批量評分與單筆分析結果一致"""
+        import pandas as pd
+
+        samples = [strong_data, weak_data]
+        frame = pd.DataFrame(
+            [{**data['financial_indicators'], **data['valuation']} for data in samples],
+            index=['000001', '000002']
+        )
+
+        result = analyzer.analyze_frame(frame)
+
+        assert list(result.index) == ['000001', '000002']
+        for code, data in zip(result.index, samples):
+            single_result = analyzer.analyze(data)
+            assert result.loc[code, 'score'] == single_result['score']
+            for dim, score in single_result['dimension_scores'].items():
+                assert result.loc[code, dim] == score
+
+    def test_analyze_frame_missing_values(self, analyzer):
+        """測試 DataFrame 缺失值與無效值的處理"""
+        import pandas as pd
+
+        frame = pd.DataFrame({
+            '淨資產收益率': [12.0, 'N/A', None],
+            '資產負債率': [None, 25.0, None]
+        })
+
+        result = analyzer.analyze_frame(frame)
+        single_result = analyzer.analyze({'financial_indicators': {'淨資產收益率': 12.0}})
+
+        assert result.iloc[0]['score'] == single_result['score']
+        assert result.iloc[1]['profitability'] == 50.0
+        assert (result.iloc[2] == 50.0).all()
+
+    def test_analyze_frame_numeric_strings(self, analyzer):
+        """測試 DataFrame 中的數字字符串與單筆、批量分析一樣記為無效"""
+        import pandas as pd
+
+        samples = [
+            {
+                'financial_indicators': {'淨資產收益率': '20', '毛利率': 45, '淨利率': 20},
+                'valuation': {'市盈率': 15, '市淨率': 2}
+            },
+            {
+                'financial_indicators': {'淨資產收益率': 18, '毛利率': 45, '淨利率': 20},
+                'valuation': {'市盈率': '15', '市淨率': 2}
+            }
+        ]
+        frame = pd.DataFrame([{**data['financial_indicators'], **data['valuation']} for data in samples])
+
+        result = analyzer.analyze_frame(frame)
+        batch_results = analyzer.analyze_batch(samples)
+
+        assert result.iloc[0]['profitability'] == 50.0
+        assert result.iloc[1]['valuation'] == 50.0
+        for (_, row), data, batch_result in zip(result.iterrows(), samples, batch_results):
+            single_result = analyzer.analyze(data)
+            assert row['score'] == single_result['score'] == batch_result['score']
+            for dim, score in single_result['dimension_scores'].items():
+                assert row[dim] == score
+
+    def test_thresholds_file(self, tmp_path, strong_data):
+        """測試從配置的 .npz 文件載入評分閾值表"""
+        from dataclasses import replace
+        from src.core.config import ConfigManager
+        from src.analysis._thresholds import DEFAULT_TABLES, load_tables, save_tables
+
+        # ROE 的最高檔閾值由 20 調高至 25，優秀樣本的 22.5 降為「良好」
+        fitted = replace(
+            DEFAULT_TABLES,
+            roe=replace(DEFAULT_TABLES.roe, thresholds=(5, 10, 15, 25))
+        )
+        path = tmp_path / 'thresholds.npz'
+        save_tables(fitted, str(path))
+        assert load_tables(str(path)) == fitted
+
+        config = ConfigManager()
+        config.set('analysis_params.fundamental_thresholds_file', str(path))
+        result = FundamentalAnalyzer(config).analyze(strong_data)
+
+        assert result['dimension_scores']['profitability'] == 85
+        assert result['analysis']['profitability']['evaluation'].startswith('ROE 良好')
+
+    def test_thresholds_file_invalid(self, tmp_path):
+        """測試區間數量不一致的閾值文件"""
+        import numpy as np
+        from src.analysis._thresholds import load_tables
+
+        path = tmp_path / 'thresholds.npz'
+        np.savez(path, roe_thresholds=np.array([5.0, 10.0]), roe_deltas=np.array([0.0, 1.0, 2.0]))
+
+        with pytest.raises(ValueError):
+            load_tables(str(path))
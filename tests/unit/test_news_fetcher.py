@@ -16,6 +16,8 @@ class TestNewsDataFetcher:
     @pytest.fixture
     def fetcher(self):
         """創建測試用的 fetcher"""
+        # 清空跨實例共用的接口數據緩存，避免測試間互相影響
+        NewsDataFetcher._shared_cache.clear()
         return NewsDataFetcher()
         
     @pytest.fixture
@@ -57,6 +59,37 @@ class TestNewsDataFetcher:
         # 測試緩存未命中
         assert fetcher._get_from_cache("non_existent") is None
         
+    def test_cache_bounded_and_expiring(self):
+        """測試新聞緩存條目數有上限，且按配置的時長過期"""
+        from src.core.config import ConfigManager
+        
+        config = ConfigManager()
+        config.set('cache.news_max_entries', 16)
+        fetcher = NewsDataFetcher(config)
+        for i in range(100):
+            fetcher._save_to_cache(f"key_{i}", {"n": i})
+            
+        cached = [i for i in range(100) if fetcher._get_from_cache(f"key_{i}") is not None]
+        assert cached == list(range(84, 100))  # 保留最新寫入的 16 條
+        
+        config.set('cache.news_hours', 0)
+        expired = NewsDataFetcher(config)
+        expired._save_to_cache("test_key", {"news": "test data"})
+        assert expired._get_from_cache("test_key") is None
+        
+    def test_cache_persistent(self, tmp_path):
+        """測試配置緩存目錄後，新聞緩存在新實例（模擬進程重啟）中仍可讀取"""
+        from src.core.config import ConfigManager
+        
+        config = ConfigManager()
+        config.set('cache.news_cache_dir', str(tmp_path))
+        config.set('cache.compression', 'zlib')
+        test_data = {"news": "test data" * 1000}
+        NewsDataFetcher(config)._save_to_cache("test_key", test_data)
+        
+        assert len(list(tmp_path.rglob('*.cache'))) == 1
+        assert NewsDataFetcher(config)._get_from_cache("test_key") == test_data
+        
     @patch('akshare.stock_news_em')
     @patch('akshare.stock_zh_a_alerts_cls')
     @patch('akshare.stock_research_report_em')
@@ -107,6 +140,53 @@ class TestNewsDataFetcher:
         assert len(result['company_news']) > 0
         assert len(result['research_reports']) > 0
         
+    def test_fetch_sources_concurrently(self, fetcher):
+        """測試各數據源的阻塞調用同時進行"""
+        import threading
+        
+        # 五路調用須同時到達屏障才能繼續，串行執行會超時
+        barrier = threading.Barrier(5, timeout=5)
+        
+        def wait(result):
+            def call(*args, **kwargs):
+                barrier.wait()
+                return result
+            return call
+            
+        alerts_df = pd.DataFrame({
+            '標題': ['測試股票：重大資產重組公告'],
+            '發布時間': [datetime.now()],
+            '內容': ['重組內容']
+        })
+        with patch.object(fetcher, '_fetch_company_news', wait([{'title': '新聞', 'time': '2024-01-01 10:00:00'}])), \
+                patch.object(fetcher, '_fetch_research_reports', wait([{'title': '報告', 'rating': '買入'}])), \
+                patch.object(fetcher, '_fetch_industry_news', wait([])), \
+                patch.object(fetcher, '_get_stock_name', wait('測試股票')), \
+                patch('akshare.stock_zh_a_alerts_cls', wait(alerts_df), create=True):
+            result = fetcher.fetch_comprehensive_news('000001', days=7)
+            
+        assert result is not None
+        assert len(result['company_news']) == 1
+        assert len(result['announcements']) == 1
+        assert result['research_reports'][0]['rating'] == '買入'
+        
+    def test_fetch_inside_running_loop(self, fetcher):
+        """測試在運行中的事件循環內調用同步入口"""
+        import asyncio
+        
+        async def caller():
+            return fetcher.fetch_comprehensive_news('000001', days=7)
+        
+        with patch.object(fetcher, '_fetch_company_news', return_value=[{'title': '新聞', 'time': '2024-01-01 10:00:00'}]), \
+                patch.object(fetcher, '_fetch_research_reports', return_value=[]), \
+                patch.object(fetcher, '_fetch_industry_news', return_value=[]), \
+                patch.object(fetcher, '_get_stock_name', return_value='測試股票'), \
+                patch('akshare.stock_zh_a_alerts_cls', return_value=pd.DataFrame(), create=True):
+            result = asyncio.run(caller())
+        
+        assert result is not None
+        assert len(result['company_news']) == 1
+        
     def test_fetch_company_news(self, fetcher, mock_news_data):
         """測試獲取個股新聞"""
         with patch('akshare.stock_news_em') as mock_news:
@@ -122,6 +202,46 @@ class TestNewsDataFetcher:
             assert all('time' in item for item in result)
             assert all('type' in item for item in result)
             
+    def test_fetch_company_news_records(self, fetcher, mock_news_data):
+        """測試新聞按時間倒序輸出，缺失的列以空字串填充"""
+        shuffled = mock_news_data.iloc[[3, 0, 4, 1, 2]].drop(columns=['新聞鏈接'])
+        
+        with patch('akshare.stock_news_em', return_value=shuffled):
+            result = fetcher._fetch_company_news('000001', days=7)
+            
+        assert [item['title'] for item in result] == list(mock_news_data['新聞標題'])
+        assert result[0] == {
+            'title': '公司業績增長超預期',
+            'time': mock_news_data['發布時間'][0].strftime('%Y-%m-%d %H:%M:%S'),
+            'source': '財經網',
+            'content': '內容0',
+            'url': '',
+            'type': 'company_news'
+        }
+        
+    def test_latest_rows_partial_sort(self, monkeypatch):
+        """測試 nlargest 部分選擇與完整排序結果一致（含同一時刻的並列）"""
+        from src.data import news_fetcher
+        
+        times = pd.to_datetime('2024-01-01') + pd.to_timedelta([5, 1, 5, 3, 9, 3, 0, 9], unit='h')
+        df = pd.DataFrame({'發布時間': times, 'n': range(len(times))})
+        
+        sorted_rows = news_fetcher._latest_rows(df, 5)
+        monkeypatch.setattr(news_fetcher, '_NLARGEST_MIN_ROWS', 0)
+        partial_rows = news_fetcher._latest_rows(df, 5)
+        
+        assert list(sorted_rows['n']) == [4, 7, 0, 2, 3]
+        assert list(partial_rows['n']) == list(sorted_rows['n'])
+        
+    def test_recent_mask(self):
+        """測試最近 N 天的時間掩碼，缺失時間不計入"""
+        from src.data.news_fetcher import _recent_mask
+        
+        now = datetime.now()
+        times = pd.to_datetime(pd.Series([now, now - timedelta(days=3), None, now - timedelta(hours=1)]))
+        
+        assert _recent_mask(times, days=1).tolist() == [True, False, False, True]
+        
     def test_fetch_company_news_empty(self, fetcher):
         """測試獲取新聞無數據的情況"""
         with patch('akshare.stock_news_em') as mock_news:
@@ -160,6 +280,21 @@ class TestNewsDataFetcher:
                 assert len(result) == 2  # 只有包含股票名稱的公告
                 assert result[0]['importance'] == 'high'  # 重組公告為高重要性
                 
+    def test_filter_announcements_literal(self, fetcher):
+        """測試公告按字面匹配股票名稱與代碼，並過濾過期快訊"""
+        now = datetime.now()
+        alerts_df = pd.DataFrame({
+            '標題': ['*ST測試：重大資產重組公告', '*ST測試：季度報告', '其他公司公告', '提及 000001 的快訊'],
+            '發布時間': [now, now - timedelta(days=30), now, now],
+            '內容': ['重組內容', '報告內容', '涉及 000001', '無關內容']
+        })
+        
+        result = fetcher._filter_announcements(alerts_df, '000001', '*ST測試', days=7)
+        
+        # 名稱中的 '*' 不當作正則；過期的季度報告被過濾；代碼只在內容中匹配
+        assert [item['title'] for item in result] == ['*ST測試：重大資產重組公告', '其他公司公告']
+        assert result[0]['importance'] == 'high'
+        
     def test_fetch_research_reports(self, fetcher):
         """測試獲取研究報告"""
         with patch('akshare.stock_research_report_em') as mock_report:
@@ -214,6 +349,24 @@ class TestNewsDataFetcher:
         # 情緒分數應該偏正面
         assert result['sentiment_score'] > 50
         
+    def test_sentiment_keyword_counts(self, fetcher):
+        """測試標題關鍵詞按是否包含計數，重疊的關鍵詞各自計入"""
+        news_data = {
+            'company_news': [
+                {'title': '股價創新高，再創新高'},
+                {'title': '業績增長不及預期，存在虧損風險'}
+            ],
+            'announcements': [{'title': '收到監管調查通知'}]
+        }
+        
+        result = fetcher._analyze_market_sentiment(news_data)
+        
+        # '創新高' 同時包含 '創新' 與 '新高'；同一標題內重複出現只計一次
+        assert result['sentiment_keywords'] == {
+            '創新': 1, '新高': 1, '增長': 1, '虧損': 1, '風險': 1, '調查': 1
+        }
+        assert result['sentiment_score'] == int(3 / 6 * 100)
+        
     def test_generate_news_summary(self, fetcher):
         """測試生成新聞摘要"""
         # 構建測試數據
@@ -248,6 +401,24 @@ class TestNewsDataFetcher:
         # 驗證趨勢判斷
         assert result['news_trend'] == 'positive'
         
+    def test_news_summary_key_events(self, fetcher):
+        """測試關鍵事件取前5條新聞並按時間倒序"""
+        news_data = {
+            'company_news': [
+                {'title': f'新聞{i}', 'time': f'2024-01-0{i} 10:00:00'} for i in range(1, 8)
+            ],
+            'announcements': [
+                {'title': '重大資產重組', 'time': '2024-01-01 08:00:00', 'importance': 'high'},
+                {'title': '會議通知', 'time': '2024-01-01 09:00:00', 'importance': 'low'}
+            ]
+        }
+        
+        result = fetcher._generate_news_summary(news_data)
+        
+        assert [event['title'] for event in result['key_events']] == ['新聞5', '新聞4', '新聞3', '新聞2', '新聞1']
+        assert result['key_events'][0] == {'time': '2024-01-05 10:00:00', 'title': '新聞5', 'type': 'news'}
+        assert result['important_announcements'] == [{'time': '2024-01-01 08:00:00', 'title': '重大資產重組'}]
+        
     def test_get_stock_name(self, fetcher):
         """測試獲取股票名稱"""
         with patch('akshare.stock_individual_info_em') as mock_info:
@@ -263,6 +434,49 @@ class TestNewsDataFetcher:
             # 驗證結果
             assert result == '平安銀行'
             
+    def test_shared_cache(self, fetcher):
+        """測試快訊表與個股信息在實例間共用，過期後重新獲取"""
+        from src.data import news_fetcher
+        
+        with patch('akshare.stock_zh_a_alerts_cls', create=True) as mock_alerts, \
+                patch('akshare.stock_individual_info_em') as mock_info:
+            mock_alerts.return_value = pd.DataFrame({'標題': [], '發布時間': [], '內容': []})
+            mock_info.return_value = pd.DataFrame({'item': ['股票簡稱'], 'value': ['平安銀行']})
+            
+            other = NewsDataFetcher()
+            for instance in (fetcher, other):
+                instance._fetch_alerts()
+                assert instance._get_stock_name('000001') == '平安銀行'
+            assert mock_alerts.call_count == 1
+            assert mock_info.call_count == 1
+            
+            # 使快訊表條目過期
+            fetched_at, data = NewsDataFetcher._shared_cache['alerts_cls']
+            NewsDataFetcher._shared_cache['alerts_cls'] = (fetched_at - news_fetcher._ALERTS_CACHE_TTL, data)
+            fetcher._fetch_alerts()
+            assert mock_alerts.call_count == 2
+            
+    def test_stock_name_cached(self, fetcher):
+        """測試股票名稱解析後緩存，請求失敗或未取得名稱時不緩存"""
+        with patch('akshare.stock_individual_info_em') as mock_info:
+            mock_info.side_effect = Exception("API Error")
+            assert fetcher._get_stock_name('000001') is None
+            
+            # 空表或缺少股票簡稱時同樣不緩存
+            mock_info.side_effect = None
+            mock_info.return_value = pd.DataFrame({'item': [], 'value': []})
+            assert fetcher._get_stock_name('000001') is None
+            mock_info.return_value = pd.DataFrame({'item': ['股票代碼'], 'value': ['000001']})
+            assert fetcher._get_stock_name('000001') is None
+            assert 'stock_name:000001' not in NewsDataFetcher._shared_cache
+            
+            mock_info.return_value = pd.DataFrame({'item': ['股票簡稱'], 'value': ['平安銀行']})
+            assert fetcher._get_stock_name('000001') == '平安銀行'
+            assert fetcher._get_stock_name('000001') == '平安銀行'
+            assert mock_info.call_count == 4
+            
+        assert NewsDataFetcher._shared_cache['stock_name:000001'][1] == '平安銀行'
+        
     def test_judge_announcement_importance(self, fetcher):
         """測試判斷公告重要性"""
         # 測試高重要性
@@ -277,6 +491,16 @@ class TestNewsDataFetcher:
         # 測試普通重要性
         assert fetcher._judge_announcement_importance('普通公告') == 'normal'
         
+    def test_judge_announcement_importance_batch(self, fetcher):
+        """測試批量判斷公告重要性與逐條判斷一致"""
+        titles = ['關於重大資產重組的公告', '重大事項摘要', '股東大會會議通知', '普通公告']
+        
+        result = fetcher._judge_announcement_importance_batch(pd.Series(titles + [None]))
+        
+        assert list(result[:-1]) == [fetcher._judge_announcement_importance(t) for t in titles]
+        assert result[-1] == 'normal'  # 缺失標題視為普通
+        assert list(result.categories) == ['high', 'normal', 'low']
+        
     def test_news_cache_functionality(self, fetcher):
         """測試新聞緩存功能"""
         with patch('akshare.stock_news_em') as mock_news:
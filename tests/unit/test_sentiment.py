@@ -0,0 +1,205 @@
+"""
+情緒分析模組的單元測試
+"""
+
+import pytest
+from src.analysis.sentiment import SentimentAnalyzer
+
+
+class TestSentimentAnalyzer:
+    """情緒分析器測試"""
+
+    @pytest.fixture
+    def analyzer(self):
+        """創建測試用的分析器"""
+        return SentimentAnalyzer()
+
+    @pytest.fixture
+    def news_data(self):
+        """樣本新聞數據"""
+        return [
+            {
+                'title': '公司業績大幅增長，營收增長創新高',
+                'content': '機構看好，評級上調',
+                'type': '公司新聞',
+                'date': '2024-01-02 09:30:00'
+            },
+            {
+                'title': '公司遭監管處罰',
+                'content': '涉及訴訟，股價下跌',
+                'type': '公司公告',
+                'date': '2024-01-03 15:00:00'
+            },
+            {
+                'title': '行業景氣度維持穩定',
+                'content': '市場震盪整理',
+                'type': '行業新聞',
+                'date': '2024-01-03'
+            }
+        ]
+
+    def test_analyze_single_news(self, analyzer):
+        """測試單條新聞的詞頻統計"""
+        result = analyzer._analyze_single_news({
+            'title': '業績大幅增長，營收增長',
+            'content': '但面臨訴訟'
+        })
+
+        # '增長' 出現兩次，'營收增長' 出現一次
+        assert result['positive_count'] == 3
+        assert result['negative_count'] == 1
+        assert result['intensity'] == 1.5
+        assert result['score'] == 0.75
+        assert ('負面', '訴訟') in result['keywords']
+
+    def test_scan_paths_agree(self, analyzer, news_data):
+        """測試自動機掃描與正則掃描結果一致"""
+        if analyzer._ac is None:
+            pytest.skip('未安裝 pyahocorasick')
+
+        fallback = SentimentAnalyzer()
+        fallback._ac = None
+
+        for news in news_data:
+            fast = analyzer._analyze_single_news(news)
+            slow = fallback._analyze_single_news(news)
+            fast_keywords, slow_keywords = fast.pop('keywords'), slow.pop('keywords')
+            assert fast == slow
+            assert sorted(fast_keywords) == sorted(slow_keywords)
+
+    def test_regex_counts_nested_words(self, analyzer):
+        """測試正則路徑計入嵌套詞與前綴詞"""
+        analyzer._ac = None
+
+        result = analyzer._analyze_single_news({'title': '股價創新高', 'content': '營收增長'})
+
+        # '創新高' 同時計入 '創新'，'營收增長' 同時計入 '增長'
+        assert result['positive_count'] == 4
+        assert sorted(result['keywords']) == sorted([
+            ('正面', '創新'), ('正面', '創新高'), ('正面', '營收增長'), ('正面', '增長')
+        ])
+
+    def test_repeated_words_counted(self, analyzer):
+        """測試重複出現的詞按命中次數計數（無需再 count）"""
+        news = {'title': '虧損擴大，虧損持續', 'content': '虧損'}
+        fallback = SentimentAnalyzer()
+        fallback._ac = None
+
+        for scanner in (analyzer, fallback):
+            result = scanner._analyze_single_news(news)
+            assert result['negative_count'] == 3
+            assert result['keywords'] == [('負面', '虧損')]
+
+    def test_lexicon_shared(self, analyzer):
+        """測試詞典與匹配器在實例間共用且不可修改"""
+        other = SentimentAnalyzer()
+
+        assert other.positive_words is analyzer.positive_words
+        assert other._ac is analyzer._ac
+        with pytest.raises(TypeError):
+            analyzer.intensity_modifiers['極度'] = 2.0
+
+    def test_single_news_cached(self, analyzer, news_data):
+        """測試相同文本的新聞只掃描一次"""
+        calls = []
+        analyze_text = analyzer._analyze_text
+        analyzer._analyze_text = lambda text: calls.append(text) or analyze_text(text)
+
+        analyzer.analyze(news_data)
+        analyzer.analyze(news_data + [dict(news_data[0], type='研究報告')])
+
+        assert len(calls) == len(news_data)
+
+    def test_result_mutation_isolated(self, analyzer, news_data):
+        """測試修改分析結果不會污染緩存，再次分析結果不變"""
+        first = analyzer.analyze(news_data)
+        expected = analyzer.analyze(news_data)['analysis']['keyword_sentiments']
+        assert expected
+
+        first['analysis']['analysis_details'][0]['keywords'].clear()
+        second = analyzer.analyze(news_data)
+
+        assert second['analysis']['analysis_details'][0]['keywords']
+        assert second['analysis']['keyword_sentiments'] == expected
+
+    def test_parallel_prefetch(self, news_data):
+        """測試大批量新聞經進程池並行分析的結果與串行一致"""
+        from src.analysis import sentiment
+
+        many_news = [dict(news, title=f"{news['title']}{i}") for i in range(30) for news in news_data]
+        serial = SentimentAnalyzer().analyze(many_news)
+
+        analyzer = SentimentAnalyzer()
+        analyzer._ac = None
+        analyzer._prefetch_sentiments(many_news)
+        assert len(analyzer._sentiment_cache) == len(many_news)
+        # 子進程以 spawn 啟動，不從多線程的宿主進程 fork
+        assert sentiment._get_executor()._mp_context.get_start_method() == 'spawn'
+
+        parallel = analyzer.analyze(many_news)
+        assert parallel['analysis']['sentiment_distribution'] == serial['analysis']['sentiment_distribution']
+        assert parallel['score'] == pytest.approx(serial['score'])
+        assert len(many_news) > sentiment._PARALLEL_THRESHOLD
+
+    def test_kernel_matches_vectorized(self):
+        """測試編譯內核與 NumPy 向量化匯總結果一致"""
+        import numpy as np
+        from src.analysis import sentiment
+        from src.analysis._kernels import sentiment_aggregate
+
+        rng = np.random.default_rng(0)
+        scores = np.round(rng.uniform(-1, 1, 500), 2)
+        type_ids = rng.integers(0, 4, 500)
+
+        kernel = sentiment_aggregate(scores, type_ids, 5)
+
+        # 強制走 NumPy 路徑作為對照
+        original = sentiment.NUMBA_AVAILABLE
+        sentiment.NUMBA_AVAILABLE = False
+        try:
+            vectorized = sentiment._aggregate_scores(scores, type_ids, 5)
+        finally:
+            sentiment.NUMBA_AVAILABLE = original
+
+        assert kernel[:2] == vectorized[:2]
+        np.testing.assert_array_equal(kernel[2], vectorized[2])
+        np.testing.assert_array_equal(kernel[3], vectorized[3])
+        assert kernel[4] == pytest.approx(vectorized[4])
+
+    def test_analyze(self, analyzer, news_data):
+        """測試完整的情緒分析"""
+        result = analyzer.analyze(news_data)
+
+        assert result['status'] == 'success'
+        assert 0 <= result['score'] <= 100
+        analysis = result['analysis']
+        assert analysis['total_analyzed'] == 3
+        assert sum(analysis['sentiment_distribution'].values()) == 3
+        assert [item['date'] for item in analysis['sentiment_trend']] == ['2024-01-02', '2024-01-03']
+
+    def test_sentiment_trend_dates(self, analyzer):
+        """測試趨勢分析的日期分組與無效日期處理"""
+        trend = analyzer._analyze_sentiment_trend([
+            ('2024-01-05 10:00:00', 0.5),
+            ('2024-1-5', 0.1),
+            ('2024-02-30 09:00:00', -1.0),
+            ('無效日期', -1.0),
+            ('', -1.0),
+            (None, -1.0)
+        ])
+
+        assert trend == [{'date': '2024-01-05', 'sentiment': 0.3, 'count': 2}]
+
+    def test_malformed_news_skipped(self, analyzer, news_data):
+        """測試格式錯誤的單條新聞被跳過，不影響整批分析"""
+        result = analyzer.analyze(news_data + [None, '非字典新聞'])
+
+        assert result['status'] == 'success'
+        assert result['analysis']['total_analyzed'] == len(news_data)
+
+    def test_analyze_empty(self, analyzer):
+        """測試無新聞時返回默認結果"""
+        result = analyzer.analyze([])
+
+        assert result['status'] == 'no_data'
+        assert result['score'] == 50.0
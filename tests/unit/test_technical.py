@@ -0,0 +1,369 @@
+"""
+技術分析模組的單元測試
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.analysis.technical import PriceArrays, TechnicalAnalyzer
+
+
+def _make_price_data(n, seed=0):
+    """生成隨機遊走的 OHLCV 數據"""
+    rng = np.random.default_rng(seed)
+    close = np.round(10 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 2)
+    return pd.DataFrame({
+        'open': close,
+        'high': np.round(close * (1 + rng.uniform(0, 0.03, n)), 2),
+        'low': np.round(close * (1 - rng.uniform(0, 0.03, n)), 2),
+        'close': close,
+        'volume': rng.integers(1000, 100000, n)
+    })
+
+
+def _assert_indicators_equal(actual, expected):
+    """逐項比較指標字典，浮點數允許舍入誤差"""
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys()
+        for key in expected:
+            _assert_indicators_equal(actual[key], expected[key])
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-12)
+    else:
+        assert actual == expected
+
+
+class TestTechnicalAnalyzer:
+    """技術分析器測試"""
+
+    @pytest.fixture
+    def analyzer(self):
+        """創建測試用的分析器"""
+        return TechnicalAnalyzer()
+
+    @pytest.fixture
+    def price_data(self):
+        """樣本價格數據"""
+        return _make_price_data(120)
+
+    def test_analyze(self, analyzer, price_data):
+        """測試完整的技術分析"""
+        result = analyzer.analyze(price_data)
+
+        assert result['status'] == 'success'
+        assert 0 <= result['score'] <= 100
+        indicators = result['indicators']
+        assert set(indicators) == {'ma', 'rsi', 'macd', 'bollinger', 'volume', 'kdj', 'volatility'}
+        assert indicators['ma']['values']['current'] == price_data['close'].iloc[-1]
+        assert 0 <= indicators['rsi']['value'] <= 100
+
+    def test_analyze_empty(self, analyzer):
+        """測試無數據時返回默認結果"""
+        result = analyzer.analyze(pd.DataFrame())
+
+        assert result['status'] == 'no_data'
+        assert result['score'] == 50.0
+
+    def test_calculate_score(self, analyzer):
+        """測試各指標信號的評分加減"""
+        indicators = {
+            'ma': {'trend': '空頭排列'},
+            'rsi': {'value': 55.0, 'signal': '中性'},
+            'macd': {'signal': '金叉向上'},
+            'bollinger': {'position': 0.8, 'signal': '偏高'},
+            'volume': {'status': '放量下跌'},
+            'kdj': {'signal': '死叉'},
+            'volatility': {'current': 0.06}
+        }
+
+        # 50 - 20 + 5 + 15 + 0 - 10 - 5 - 5
+        assert analyzer.calculate_score(indicators) == 30.0
+        assert analyzer.calculate_score({}) == 60.0
+        assert analyzer.calculate_score(analyzer._get_default_indicators()) == 60.0
+
+    def test_single_row(self, analyzer):
+        """測試只有一根 K 線時的指標"""
+        indicators = analyzer.calculate_indicators(_make_price_data(1))
+
+        assert indicators['rsi']['trend'] == '未知'
+        assert indicators['macd']['signal'] == '數據不足'
+        assert indicators['kdj']['signal'] == '中性'
+        assert indicators['volatility'] == {'current': 0.02, 'level': '正常'}
+
+    def test_kdj_short_series(self, analyzer):
+        """測試不足一個窗口時 KDJ 的累計極值與 pandas 滑動極值一致（含缺失值）"""
+        price_data = _make_price_data(6)
+        price_data['low'] = price_data['low'].astype(float)
+        price_data.loc[[0, 3], 'low'] = np.nan
+        price_data.loc[2, 'high'] = np.nan
+
+        low_min = price_data['low'].rolling(window=9, min_periods=1).min()
+        high_max = price_data['high'].rolling(window=9, min_periods=1).max()
+        rsv = (100 * (price_data['close'] - low_min) / (high_max - low_min)).fillna(50)
+        k = rsv.ewm(com=2, adjust=False).mean()
+        d = k.ewm(com=2, adjust=False).mean()
+
+        result = analyzer._calculate_kdj(PriceArrays.from_dataframe(price_data))
+        assert result == analyzer._build_kdj_result(k.iloc[-1], d.iloc[-1], k.iloc[-2], d.iloc[-2])
+
+    def test_kdj_bottleneck_matches_pandas(self, analyzer):
+        """測試 bottleneck 滑動極值與 pandas 滑動極值的 KDJ 結果一致"""
+        from src.analysis import technical
+
+        if technical.bn is None:
+            pytest.skip('未安裝 bottleneck')
+
+        price_data = _make_price_data(40)
+        price_data['low'] = price_data['low'].astype(float)
+        price_data.loc[[5, 20, 21], 'low'] = np.nan
+        prices = PriceArrays.from_dataframe(price_data)
+
+        original = technical.NUMBA_AVAILABLE, technical.bn
+        technical.NUMBA_AVAILABLE = False
+        try:
+            fast = analyzer._calculate_kdj(prices)
+            technical.bn = None
+            slow = analyzer._calculate_kdj(prices)
+        finally:
+            technical.NUMBA_AVAILABLE, technical.bn = original
+
+        assert fast == slow
+
+    @pytest.mark.parametrize('window', [1, 3, 9])
+    def test_rolling_min_max(self, window):
+        """測試單調隊列的滑動極值與 pandas rolling 逐位相同（含缺失值與重複值）"""
+        from src.analysis._kernels import rolling_min_max
+
+        rng = np.random.default_rng(window)
+        low = np.round(rng.uniform(9, 11, 60), 1)
+        high = low + 0.5
+        low[[3, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19]] = np.nan
+        high[[0, 30, 31]] = np.nan
+
+        mins, maxs = rolling_min_max(low, high, window)
+
+        np.testing.assert_array_equal(mins, pd.Series(low).rolling(window, min_periods=1).min())
+        np.testing.assert_array_equal(maxs, pd.Series(high).rolling(window, min_periods=1).max())
+
+    def test_sma_last(self):
+        """測試尾部均線與 pandas rolling 一致，平盤窗口取原值"""
+        from src.analysis.technical import _sma_last
+
+        close = _make_price_data(80)['close'].to_numpy(np.float64, copy=True)
+        close[-12:] = 10.01
+
+        for window in (5, 10, 20, 60, 100):
+            expected = pd.Series(close).rolling(window=window, min_periods=1).mean().iloc[-1]
+            assert _sma_last(close, window) == pytest.approx(expected, rel=1e-12)
+
+        assert _sma_last(close, 5) == 10.01
+        assert _sma_last(close, 10) == 10.01
+
+    def test_sma_last_skips_nan(self, analyzer):
+        """測試窗口內含缺失值時跳過缺失值求均線，與 pandas rolling 一致"""
+        import math
+        from src.analysis.technical import _sma_last
+
+        price_data = _make_price_data(80)
+        price_data.loc[77, 'close'] = np.nan
+        close = price_data['close'].to_numpy(np.float64)
+
+        for window in (5, 10, 20, 60):
+            expected = pd.Series(close).rolling(window=window, min_periods=1).mean().iloc[-1]
+            assert _sma_last(close, window) == pytest.approx(expected, rel=1e-12)
+        assert math.isnan(_sma_last(np.array([1.0, np.nan, np.nan]), 2))
+
+        values = analyzer._calculate_moving_averages(PriceArrays.from_dataframe(price_data))['values']
+        assert values['ma5'] != values['current']
+        assert values['ma20'] == pytest.approx(pd.Series(close).rolling(20, min_periods=1).mean().iloc[-1])
+
+    def test_tail_mean_std(self):
+        """測試尾部均值與標準差與 pandas rolling 一致"""
+        import math
+        from src.analysis.technical import _tail_mean_std
+
+        close = _make_price_data(50)['close'].to_numpy(np.float64)
+        mean, std = _tail_mean_std(close, 20)
+
+        assert mean == pytest.approx(pd.Series(close).rolling(20).mean().iloc[-1], rel=1e-12)
+        assert std == pytest.approx(pd.Series(close).rolling(20).std().iloc[-1], rel=1e-12)
+        assert _tail_mean_std(np.full(30, 10.01), 20) == (10.01, 0.0)
+        assert math.isnan(_tail_mean_std(close[:1], 20)[1])
+
+    def test_tail_indicators_skip_nan(self, analyzer):
+        """測試含缺失值時布林帶、RSI 與均量與 pandas rolling(min_periods=1) 一致"""
+        from src.analysis.technical import _tail_mean_std
+
+        price_data = _make_price_data(80)
+        price_data.loc[77, 'close'] = np.nan
+        price_data.loc[75, 'volume'] = np.nan
+        prices = PriceArrays.from_dataframe(price_data)
+        close = price_data['close']
+
+        mean, std = _tail_mean_std(prices.close, 20)
+        assert mean == pytest.approx(close.rolling(20, min_periods=1).mean().iloc[-1], rel=1e-12)
+        assert std == pytest.approx(close.rolling(20, min_periods=1).std().iloc[-1], rel=1e-12)
+        assert _tail_mean_std(np.array([np.nan, 10.0, np.nan]), 20)[0] == 10.0
+
+        bollinger = analyzer._calculate_bollinger_bands(prices)
+        assert bollinger['values']['middle'] == round(mean, 2)
+        assert bollinger['values']['upper'] > bollinger['values']['lower'] > 0
+
+        # 原 pandas 實現：缺失價格前後的變化經 where(..., 0) 記為 0
+        delta = close.diff()
+        gain = delta.where(delta > 0, 0).rolling(14, min_periods=1).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(14, min_periods=1).mean()
+        expected_rsi = 100 - 100 / (1 + gain.iloc[-1] / loss.iloc[-1])
+        assert analyzer._calculate_rsi(prices)['value'] == round(expected_rsi, 2)
+
+        expected_volume = price_data['volume'].rolling(20, min_periods=1).mean().iloc[-1]
+        assert analyzer._analyze_volume(prices)['values']['average'] == pytest.approx(expected_volume)
+
+    def test_safe_float(self, analyzer):
+        """測試缺失值、NaN、無窮大與非數值返回默認值"""
+        for value in (None, pd.NA, pd.NaT, np.nan, np.inf, -np.inf, 'abc'):
+            assert analyzer._safe_float(value, -1.0) == -1.0
+
+        assert analyzer._safe_float(np.float64(2.5)) == 2.5
+        assert analyzer._safe_float(np.int64(3)) == 3.0
+        assert analyzer._safe_float('1.5') == 1.5
+
+    def test_signal_levels(self, analyzer):
+        """測試分檔查找在各斷點上與原判斷鏈一致"""
+        for rsi, signal in [(29.99, '超賣'), (30, '中性'), (70, '中性'), (70.01, '超買')]:
+            assert analyzer._build_rsi_result(rsi, None)['signal'] == signal
+
+        for ratio, status in [(0.49, '縮量調整'), (0.5, '成交清淡'), (0.7, '正常'), (1.5, '正常'),
+                              (1.51, '放量上漲'), (2.0, '放量上漲'), (2.01, '巨量上漲')]:
+            assert analyzer._build_volume_result(ratio * 100, 100.0, 1.0)['status'] == status
+
+        for vol, level in [(0.0099, '極低'), (0.01, '低'), (0.02, '正常'), (0.04, '高'), (0.06, '極高')]:
+            assert analyzer._build_volatility_result(10, vol, vol, vol, vol)['level'] == level
+
+        # 中軌 10、標準差 1 時上下軌為 12/8，收盤價與位置一一對應
+        for close, signal in [(8.39, '超賣區'), (8.4, '偏低'), (9.2, '中性'), (10.8, '中性'),
+                              (10.84, '偏高'), (11.6, '偏高'), (11.64, '超買區')]:
+            assert analyzer._build_bollinger_result(close, 10.0, 1.0)['signal'] == signal
+
+    def test_finite(self):
+        """測試內部浮點數的缺失處理返回 Python float"""
+        from src.analysis.technical import _finite
+
+        assert _finite(np.nan, 50.0) == 50.0
+        assert _finite(np.float64(-np.inf)) == 0.0
+        result = _finite(np.float64(2.5))
+        assert result == 2.5 and type(result) is float
+
+    def test_price_data_not_modified(self, analyzer, price_data):
+        """測試計算指標不改動傳入的 DataFrame"""
+        from src.analysis import technical
+
+        original = technical.NUMBA_AVAILABLE
+        technical.NUMBA_AVAILABLE = False
+        try:
+            snapshot = price_data.copy()
+            analyzer.analyze(price_data)
+        finally:
+            technical.NUMBA_AVAILABLE = original
+
+        pd.testing.assert_frame_equal(price_data, snapshot)
+
+    def test_price_arrays(self, analyzer, price_data):
+        """測試直接傳入列數組與傳入 DataFrame 的分析結果一致"""
+        price_data['change_pct'] = (price_data['close'].pct_change() * 100).astype(object)
+        price_data.loc[price_data.index[-1], 'change_pct'] = 'N/A'
+        prices = PriceArrays.from_dataframe(price_data)
+
+        assert prices.close.dtype == np.float64
+        assert np.shares_memory(prices.close, price_data['close'].to_numpy())
+        assert np.isnan(prices.change_pct[-1])
+        assert TechnicalAnalyzer().analyze(prices) == analyzer.analyze(price_data)
+
+    @pytest.mark.parametrize('use_kernel', [True, False])
+    def test_analyze_batch_matches_analyze(self, use_kernel):
+        """測試批量分析與逐隻分析的結果一致"""
+        from src.analysis import technical
+
+        frames = [_make_price_data(70, seed=seed) for seed in range(4)]
+        frames[1].loc[frames[1].index[-3:], ['high', 'low', 'close']] = frames[1]['close'].iloc[-4]
+        change_pcts = np.stack([frame['close'].pct_change().fillna(0).to_numpy() * 100 for frame in frames])
+
+        original = technical.NUMBA_AVAILABLE
+        technical.NUMBA_AVAILABLE = use_kernel
+        try:
+            results = TechnicalAnalyzer().analyze_batch(
+                *(np.stack([frame[column] for frame in frames]) for column in ('close', 'high', 'low', 'volume')),
+                change_pcts=change_pcts
+            )
+            expected = [
+                TechnicalAnalyzer().analyze(frame.assign(change_pct=pct))
+                for frame, pct in zip(frames, change_pcts)
+            ]
+        finally:
+            technical.NUMBA_AVAILABLE = original
+
+        assert len(results) == len(frames)
+        for result, single in zip(results, expected):
+            _assert_indicators_equal(result, single)
+
+    def test_analyze_batch_empty(self, analyzer):
+        """測試空批量與無 K 線的批量"""
+        assert analyzer.analyze_batch(*(np.empty((0, 10)) for _ in range(4))) == []
+
+        results = analyzer.analyze_batch(*(np.empty((2, 0)) for _ in range(4)))
+        assert [result['status'] for result in results] == ['no_data', 'no_data']
+
+    def test_indicators_cached(self, analyzer, price_data):
+        """測試相同價格數據只計算一次指標，且緩存結果不受調用方修改影響"""
+        calls = []
+        fused = analyzer._calculate_indicators_fused
+        moving_averages = analyzer._calculate_moving_averages
+        analyzer._calculate_indicators_fused = lambda data: calls.append(1) or fused(data)
+        analyzer._calculate_moving_averages = lambda data: calls.append(1) or moving_averages(data)
+
+        first = analyzer.calculate_indicators(price_data)
+        first['ma']['trend'] = '已修改'
+        second = analyzer.calculate_indicators(price_data.copy())
+        assert len(calls) == 1
+        assert second['ma']['trend'] != '已修改'
+
+        changed = price_data.copy()
+        changed.loc[changed.index[-1], 'close'] += 0.01
+        analyzer.calculate_indicators(changed)
+        assert len(calls) == 2
+
+    def test_ema_matches_pandas(self):
+        """測試遞推 EMA 與 pandas ewm 逐位一致"""
+        from src.analysis._kernels import ema
+
+        close = _make_price_data(250)['close'].to_numpy(np.float64)
+
+        for com in (5.5, 12.5, 4, 2):
+            expected = pd.Series(close).ewm(com=com, adjust=False).mean().to_numpy()
+            np.testing.assert_array_equal(ema(close, 1 / (1 + com)), expected)
+
+        # span 與 com 換算得到的平滑係數相同
+        expected = pd.Series(close).ewm(span=12, adjust=False).mean().to_numpy()
+        np.testing.assert_array_equal(ema(close, 2 / (1 + 12)), expected)
+
+    @pytest.mark.parametrize('n', [1, 2, 5, 9, 10, 21, 61, 250])
+    def test_kernel_matches_pandas(self, analyzer, n):
+        """測試編譯內核與逐項 pandas 計算的指標一致"""
+        from src.analysis import technical
+
+        price_data = _make_price_data(n, seed=n)
+        # 含停牌期間的平價數據
+        flat_price = price_data['close'].iloc[-min(4, n)]
+        price_data.loc[price_data.index[-3:], ['high', 'low', 'close']] = flat_price
+
+        kernel = analyzer._calculate_indicators_fused(PriceArrays.from_dataframe(price_data))
+
+        # 強制走 pandas 路徑作為對照
+        original = technical.NUMBA_AVAILABLE
+        technical.NUMBA_AVAILABLE = False
+        try:
+            expected = analyzer.calculate_indicators(price_data.copy())
+        finally:
+            technical.NUMBA_AVAILABLE = original
+
+        _assert_indicators_equal(kernel, expected)